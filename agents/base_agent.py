@@ -1,5 +1,4 @@
 # agents\base_agent.py
-import pygame
 from configs.settings import *
 
 class BaseAgent:
@@ -19,11 +18,3 @@ class BaseAgent:
             self.y = ny # 更新y坐标
             return True # 返回True表示移动成功
         return False # 返回False表示移动失败
-
-    def draw(self, surface):
-        """在屏幕上绘制自己 (简单的方块或圆形)"""
-        px = self.x * CELL_SIZE
-        py = self.y * CELL_SIZE
-        padding = 2
-        rect = pygame.Rect(px + padding, py + padding, CELL_SIZE - padding*2, CELL_SIZE - padding*2)
-        pygame.draw.rect(surface, self.color, rect)
\ No newline at end of file
@@ -1,7 +1,7 @@
-import pygame
 import random
+import numpy as np
 from agents.base_agent import BaseAgent
-from configs.settings import COLOR_UAV, CELL_SIZE
+from configs.settings import COLOR_UAV
 
 
 class Drone(BaseAgent):
@@ -57,36 +57,13 @@ class Drone(BaseAgent):
         if abs(self.x - tx) + abs(self.y - ty) <= 1:
             self.select_new_target(grid_map, frame_id)
 
-    def scan(self, grid_map, frame_id):
-        """执行感知任务，返回发现的火点"""
-        grid_map.mark_scanned(self.x, self.y, self.scan_radius, frame_id)
-        found_fires = []
-        # 遍历无人机扫描半径内的区域，如果区域内有火点，则记录火点坐标
-        for dx in range(-self.scan_radius, self.scan_radius + 1):
-            for dy in range(-self.scan_radius, self.scan_radius + 1):
-                nx, ny = self.x + dx, self.y + dy
-                if grid_map.get_state(nx, ny) == 2:
-                    found_fires.append((nx, ny))
-        return found_fires
 
-    def draw(self, surface):
-        """绘制无人机"""
-        px, py = self.x * CELL_SIZE, self.y * CELL_SIZE # 计算无人机中心坐标
-        pygame.draw.circle(
-            surface,
-            self.color,
-            (px + CELL_SIZE // 2, py + CELL_SIZE // 2),
-            CELL_SIZE // 2 - 2,
-        )
-        # 绘制扫描范围阴影
-        scan_rect = pygame.Rect(
-            (self.x - self.scan_radius) * CELL_SIZE,
-            (self.y - self.scan_radius) * CELL_SIZE,
-            (self.scan_radius * 2 + 1) * CELL_SIZE,
-            (self.scan_radius * 2 + 1) * CELL_SIZE,
-        )
-        s = pygame.Surface((scan_rect.width, scan_rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(
-            s, (0, 191, 255, 30), (0, 0, scan_rect.width, scan_rect.height)
-        )
-        surface.blit(s, (scan_rect.x, scan_rect.y))
+def scan_windows(drones, width, height):
+    """全体无人机的扫描方窗 (越界裁剪)，每行 [x0, x1, y0, y1)，形如 (D, 4)"""
+    x = np.array([d.x for d in drones])
+    y = np.array([d.y for d in drones])
+    r = np.array([d.scan_radius for d in drones])
+    return np.stack([
+        np.maximum(0, x - r), np.minimum(width, x + r + 1),
+        np.maximum(0, y - r), np.minimum(height, y + r + 1),
+    ], axis=1)
@@ -1,159 +1,169 @@
-import pygame
 import numpy as np
+from functools import lru_cache
 from agents.base_agent import BaseAgent
 from configs.settings import *
-from core.pathfinding import astar
+from core.pathfinding import astar_fast
+from core import kernels
+
+@lru_cache(maxsize=None)
+def _distance_template(r):
+    """(2r+1)x(2r+1) 窗口内各格到中心的曼哈顿距离，按搜索半径缓存"""
+    d = np.abs(np.arange(-r, r + 1))
+    return d[:, None] + d[None, :]
+
+
+# 机器人状态编码 (RobotFleet 中以整数存储)
+STATUS_NAMES = ["IDLE", "MOVING", "RETURNING", "STRANDED"]
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+IDLE, MOVING, RETURNING, STRANDED = range(4)
+
 
 class Robot(BaseAgent):
-    def __init__(self, agent_id, x, y):
+    """
+    地面机器人：状态全部存放在所属 RobotFleet 的数组中，
+    本类只是第 index 号机器人的视图，供调度器和绘制代码按属性访问。
+    """
+
+    def __init__(self, agent_id, x, y, fleet=None):
+        if fleet is None:
+            fleet = RobotFleet()
+        self.fleet = fleet
+        self.index = fleet._allocate()
         super().__init__(agent_id, x, y, COLOR_UGV)
         self.status = "IDLE" # 机器人状态
         self.target = None # 机器人目标
         self.current_path = [] # 机器人当前路径
-        self.battery = ROBOT_MAX_BATTERY # 机器人电池电量
-        self.water = ROBOT_MAX_WATER # 机器人水资源
+        self.battery = fleet.max_battery # 机器人电池电量
+        self.water = fleet.max_water # 机器人水资源
         self.last_task_features = None # 机器人上次任务特征
         self.idle_timer = 0 # 机器人闲置时间
+        fleet.robots.append(self)
+
+    # --- 指向舰队数组的属性视图 ---
+    @property
+    def x(self):
+        return int(self.fleet.x[self.index])
+
+    @x.setter
+    def x(self, value):
+        self.fleet.x[self.index] = value
+
+    @property
+    def y(self):
+        return int(self.fleet.y[self.index])
+
+    @y.setter
+    def y(self, value):
+        self.fleet.y[self.index] = value
+
+    @property
+    def status(self):
+        return STATUS_NAMES[self.fleet.status[self.index]]
+
+    @status.setter
+    def status(self, value):
+        self.fleet.status[self.index] = STATUS_CODES[value]
+
+    @property
+    def battery(self):
+        return int(self.fleet.battery[self.index])
+
+    @battery.setter
+    def battery(self, value):
+        self.fleet.battery[self.index] = value
+
+    @property
+    def water(self):
+        return int(self.fleet.water[self.index])
 
-    def aoe_extinguish(self, grid_map, current_genome=None):
-        """执行 3x3 区域灭火：遍历机器人周围3x3范围内的区域，如果区域内有火点，且机器人有水资源，则灭火"""
-        if self.water <= 0:
-            return False
-        ext = False # 是否灭火成功
-        for dx in [-1, 0, 1]: # 遍历机器人周围3x3范围内的区域
-            for dy in [-1, 0, 1]:
-                nx, ny = self.x + dx, self.y + dy
-                if grid_map.get_state(nx, ny) == 2:
-                    if current_genome:
-                        x_min, x_max = max(0, nx - 1), min(grid_map.width, nx + 2)
-                        y_min, y_max = max(0, ny - 1), min(grid_map.height, ny + 2)
-                        sev = np.sum(grid_map.grid[x_min:x_max, y_min:y_max] == 2)
-                        current_genome.severity_bonus += sev # 增加火点严重度奖励
-                    grid_map.set_state(nx, ny, 6)
-                    self.water -= 1
-                    ext = True
-                    if self.water <= 0:
-                        return True
-        return ext
+    @water.setter
+    def water(self, value):
+        self.fleet.water[self.index] = value
+
+    @property
+    def idle_timer(self):
+        return int(self.fleet.idle_timer[self.index])
+
+    @idle_timer.setter
+    def idle_timer(self, value):
+        self.fleet.idle_timer[self.index] = value
+
+    @property
+    def target(self):
+        i = self.index
+        if not self.fleet.has_target[i]:
+            return None
+        return (int(self.fleet.target_x[i]), int(self.fleet.target_y[i]))
+
+    @target.setter
+    def target(self, value):
+        i = self.index
+        self.fleet.has_target[i] = value is not None
+        if value is not None:
+            self.fleet.target_x[i], self.fleet.target_y[i] = value
+
+    @property
+    def current_path(self):
+        """剩余路径 (从游标开始的坐标列表)"""
+        i = self.index
+        return [tuple(p) for p in self.fleet.paths[i, self.fleet.path_pos[i]:self.fleet.path_len[i]].tolist()]
+
+    @current_path.setter
+    def current_path(self, value):
+        self.fleet.set_path(self.index, value)
+
+    @property
+    def last_task_features(self):
+        return self.fleet.features[self.index]
+
+    @last_task_features.setter
+    def last_task_features(self, value):
+        self.fleet.features[self.index] = value
 
     def find_local_fire(self, grid_map, neighbors=None, search_radius=6, dynamic_radius=2):
         """
         [自主决策] 寻找附近的火点，同时严格遵守社交距离
+        向量化实现：一次切片取窗口火点掩码，用曼哈顿距离模板排除队友位置/目标附近的格子，
+        再在距离模板上 argmin 取最近者 (同距离时按 dx、dy 从小到大，与逐格遍历一致)
         """
-        candidates = []
+        r = search_radius
         social_r = dynamic_radius  # 保持与 main.py 一致的避嫌半径
-        # 遍历机器人周围search_radius范围内的区域，如果区域内有火点，则记录火点坐标
-        for dx in range(-search_radius, search_radius + 1):
-            for dy in range(-search_radius, search_radius + 1):
-                if dx == 0 and dy == 0:
-                    continue
+        ox, oy = self.x - r, self.y - r  # 窗口左上角的地图坐标
 
-                nx, ny = self.x + dx, self.y + dy
-
-                if grid_map.get_state(nx, ny) == 2:
-
-                    # --- 避嫌检查 ---
-                    is_taken = False
-                    if neighbors:
-                        for other_bot in neighbors:
-                            if other_bot.id == self.id:
-                                continue
-
-                            # 1. 检查队友的目标 (Target) - 防止撞车
-                            if other_bot.target:
-                                t_dist = abs(other_bot.target[0] - nx) + abs(
-                                    other_bot.target[1] - ny
-                                )
-                                if t_dist <= social_r: # 如果队友目标与当前火点距离小于等于避嫌半径，则认为该火点被占用
-                                    is_taken = True
-                                    break
-
-                            # 2. 检查队友的当前位置 (Position) - 防止扎堆
-                            p_dist = abs(other_bot.x - nx) + abs(other_bot.y - ny)
-                            if p_dist <= social_r: # 如果队友当前位置与当前火点距离小于等于避嫌半径，则认为该火点被占用
-                                is_taken = True
-                                break
-                    # 如果该火点没有被占用，则记录火点坐标
-                    if not is_taken:
-                        dist = abs(dx) + abs(dy) # 计算当前火点与机器人距离
-                        candidates.append((dist, (nx, ny)))
-        # 如果找到的火点不为空，则返回距离最近的火点坐标
-        if candidates:
-            candidates.sort(key=lambda x: x[0])
-            return candidates[0][1]
-        return None
-
-    def step(self, grid_map, predictor=None, neighbors=None, current_genome=None):
-        if self.battery <= 0:
-            self.status = "STRANDED" # 机器人电量不足，进入 stranded 状态
-            return
-        # 1. 闲置超时返航：如果机器人闲置时间超过阈值，则返回最近的 depot
-        if self.status == "IDLE":
-            self.idle_timer += 1
-            if self.idle_timer >= ROBOT_IDLE_RETURN_THRESHOLD: # 如果机器人闲置时间超过阈值
-                depot = min(grid_map.depots, key=lambda d: abs(self.x - d[0]) + abs(self.y - d[1])) # 找到距离最近的 depot
-                if (self.x, self.y) != depot: # 如果机器人当前位置不等于 depot，则返回 depot
-                    self.status = "RETURNING" # 机器人进入 returning 状态
-                    self.set_target(depot[0], depot[1], grid_map) # 设置机器人目标为 depot
-                    self.idle_timer = 0 # 重置闲置时间
-        # 2. 目标有效性验证：如果机器人目标状态为 moving，且目标不为空，则验证目标有效性
-        if self.status == "MOVING" and self.target:
-            target_state = grid_map.get_state(*self.target) # 获取目标状态
-            if target_state != 2:
-                if predictor and self.last_task_features: # 如果预测器和上次任务特征不为空，则训练预测器
-                    predictor.train(self.last_task_features, 0) # 训练预测器
-                self.status, self.target, self.current_path = "IDLE", None, [] # 机器人进入 idle 状态
-                return
-        # 3. 边走边灭：执行 3x3 区域灭火
-        self.aoe_extinguish(grid_map, current_genome=current_genome)
-        # 4. 武装返航协议
-        if self.status not in ["RETURNING", "STRANDED"] and (
-            self.battery < ROBOT_LOW_BATTERY_THRESHOLD
-            or self.water <= ROBOT_WATER_RESERVE
-        ):
-            depot = min(
-                grid_map.depots, key=lambda d: abs(self.x - d[0]) + abs(self.y - d[1])
-            )
-            self.status, self.target = "RETURNING", None
-            self.set_target(depot[0], depot[1], grid_map)
+        # 1. 窗口火点掩码 (越界部分视为非火点)
+        candidates = kernels.window_fire(grid_map.grid, self.x, self.y, r)
+        candidates[r, r] = False
+        if not candidates.any():
+            return None
 
-        # 5. 移动逻辑
-        if self.status in ["MOVING", "RETURNING"] and self.current_path:
-            self.x, self.y = self.current_path.pop(0)
-            self.battery -= 1
+        # 2. 避嫌：队友的目标 (防止撞车) 与当前位置 (防止扎堆) 周围 social_r 内的格子都不能选
+        if neighbors:
+            points = []
+            for other_bot in neighbors:
+                if other_bot.id == self.id:
+                    continue
+                if other_bot.target:
+                    points.append(other_bot.target)
+                points.append((other_bot.x, other_bot.y))
+            if points:
+                rel = np.array(points) - (ox, oy)
+                # 只保留曼哈顿半径可能覆盖窗口的点
+                rel = rel[((rel >= -social_r) & (rel <= 2 * r + social_r)).all(axis=1)]
+                axis = np.arange(2 * r + 1)
+                dist_x = np.abs(axis[None, :] - rel[:, 0, None])  # (P, 2r+1)
+                dist_y = np.abs(axis[None, :] - rel[:, 1, None])
+                taken = ((dist_x[:, :, None] + dist_y[:, None, :]) <= social_r).any(axis=0)
+                candidates &= ~taken
 
-            # --- 到达逻辑 ---
-            if (self.x, self.y) == self.target:
-                if self.status == "RETURNING":
-                    self.battery, self.water = ROBOT_MAX_BATTERY, ROBOT_MAX_WATER
-                    self.status, self.target = "IDLE", None
-                else:
-                    if predictor and self.last_task_features:
-                        predictor.train(self.last_task_features, 1)
-                    # 到达火点后，尝试连击 (Mopping Up)
-                    local_fire = None
-                    if (
-                        self.water > ROBOT_WATER_RESERVE
-                        and self.battery > ROBOT_LOW_BATTERY_THRESHOLD
-                    ):
-                        # 传入 neighbors 进行避嫌
-                        local_fire = self.find_local_fire(grid_map, neighbors, dynamic_radius=current_genome.radius)
-
-                    if local_fire:
-                        self.set_target(
-                            local_fire[0],
-                            local_fire[1],
-                            grid_map,
-                            self.last_task_features,
-                        )
-                    else:
-                        self.status, self.target = "IDLE", None
-
-        elif not self.current_path:
-            self.status = "IDLE"
+        # 3. 距离最近的火点
+        if not candidates.any():
+            return None
+        dist = np.where(candidates, _distance_template(r), np.iinfo(np.int64).max)
+        dx, dy = divmod(int(np.argmin(dist)), 2 * r + 1)
+        return (ox + dx, oy + dy)
 
     def set_target(self, tx, ty, grid_map, feats=None):
-        path = astar(grid_map, (self.x, self.y), (tx, ty), has_water=(self.water > 0))
+        path = astar_fast(grid_map, (self.x, self.y), (tx, ty), has_water=(self.water > 0))
         if path:
             self.target, self.current_path, self.last_task_features = (
                 (tx, ty),
@@ -169,36 +179,200 @@ class Robot(BaseAgent):
         dist = abs(self.x - fire_pos[0]) + abs(self.y - fire_pos[1])
         prob = predictor.predict_prob(feats)
         risk = (1.0 - prob) * penalty
-        return dist + risk + (1.0 - self.battery / ROBOT_MAX_BATTERY) * 50
-
-    def draw(self, surface):
-        px, py = self.x * CELL_SIZE, self.y * CELL_SIZE
-        if self.current_path and self.target:
-            pts = [(self.x * CELL_SIZE + 10, self.y * CELL_SIZE + 10)] + [
-                (p[0] * CELL_SIZE + 10, p[1] * CELL_SIZE + 10)
-                for p in self.current_path
-            ]
-            if len(pts) > 1:
-                pygame.draw.lines(surface, self.color, False, pts, 1)
+        return dist + risk + (1.0 - self.battery / self.fleet.max_battery) * 50
 
-        rect_color = self.color if self.status != "STRANDED" else (100, 100, 100)
-        pygame.draw.rect(
-            surface, rect_color, (px + 2, py + 2, CELL_SIZE - 4, CELL_SIZE - 4)
-        )
-        pygame.draw.rect(
-            surface,
-            (0, 255, 0),
-            (px + 1, py - 3, int(18 * self.battery / ROBOT_MAX_BATTERY), 2),
+
+class RobotFleet:
+    """
+    结构化数组 (SoA) 形式的地面机器人编队：位置、电量、水量、状态码、目标和路径游标
+    都存放在 NumPy 数组里。电量消耗、低资源返航检查、到达检测和路径推进每帧批量完成，
+    只有寻路 (A*) 和到达火点后的连击搜索仍逐个机器人执行。
+    """
+
+    def __init__(self, capacity=8, path_capacity=64,
+                 max_battery=ROBOT_MAX_BATTERY, max_water=ROBOT_MAX_WATER,
+                 water_reserve=ROBOT_WATER_RESERVE,
+                 low_battery=ROBOT_LOW_BATTERY_THRESHOLD,
+                 idle_return=ROBOT_IDLE_RETURN_THRESHOLD):
+        # 资源上限与返航阈值按编队保存，便于参数扫描按局注入
+        self.max_battery = max_battery
+        self.max_water = max_water
+        self.water_reserve = water_reserve
+        self.low_battery = low_battery
+        self.idle_return = idle_return
+        self.size = 0
+        self.robots = []  # 各机器人的 Robot 视图
+        self.features = []  # 上次任务特征 (Python 对象，按索引存放)
+        n = capacity
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.status = np.zeros(n, dtype=np.int8)
+        self.battery = np.zeros(n, dtype=np.int64)
+        self.water = np.zeros(n, dtype=np.int64)
+        self.idle_timer = np.zeros(n, dtype=np.int64)
+        self.has_target = np.zeros(n, dtype=bool)
+        self.target_x = np.zeros(n, dtype=np.int64)
+        self.target_y = np.zeros(n, dtype=np.int64)
+        # 路径缓冲区：paths[i, path_pos[i]:path_len[i]] 为剩余路径，游标推进代替 pop(0)
+        self.paths = np.zeros((n, path_capacity, 2), dtype=np.int64)
+        self.path_len = np.zeros(n, dtype=np.int64)
+        self.path_pos = np.zeros(n, dtype=np.int64)
+
+    _ARRAYS = ("x", "y", "status", "battery", "water", "idle_timer",
+               "has_target", "target_x", "target_y", "paths", "path_len", "path_pos")
+
+    def __len__(self):
+        return self.size
+
+    def add(self, agent_id, x, y):
+        """新增一个机器人并返回它的 Robot 视图"""
+        return Robot(agent_id, x, y, fleet=self)
+
+    def _allocate(self):
+        if self.size == len(self.x):
+            for name in self._ARRAYS:
+                arr = getattr(self, name)
+                grown = np.zeros((len(arr) * 2,) + arr.shape[1:], dtype=arr.dtype)
+                grown[: len(arr)] = arr
+                setattr(self, name, grown)
+        self.features.append(None)
+        self.size += 1
+        return self.size - 1
+
+    def set_path(self, i, path):
+        n = len(path)
+        if n > self.paths.shape[1]:
+            grown = np.zeros((len(self.paths), max(n, self.paths.shape[1] * 2), 2), dtype=np.int64)
+            grown[:, : self.paths.shape[1]] = self.paths
+            self.paths = grown
+        if n:
+            self.paths[i, :n] = path
+        self.path_len[i] = n
+        self.path_pos[i] = 0
+
+    def queue_extinguish(self, grid_map, idx):
+        """
+        为 idx 中的机器人登记灭火意图：登记时就按动作前的网格扣除预计用水 (3x3 内火点数，不超过水量)，
+        本帧后续的返航判断因此看到的是喷水后的水量；帧末结算后退回没用上的部分 (被其他 Agent 先占的格子)，
+        退回后不超过水箱上限，本帧在补给站加满的机器人不会再被扣水。
+        """
+        _, _, on_fire = grid_map.fire_windows(self.x[idx], self.y[idx])
+        charged = np.minimum(on_fire.sum(axis=1), self.water[idx])
+        self.water[idx] -= charged
+
+        def refund(used):
+            self.water[idx] = np.minimum(self.water[idx] + charged - used, self.max_water)
+        grid_map.queue_extinguish(
+            self.x[idx], self.y[idx], budget=charged, scored=True, on_resolved=refund
         )
-        pygame.draw.rect(
-            surface,
-            (0, 191, 255),
-            (px + 1, py + CELL_SIZE + 1, int(18 * self.water / ROBOT_MAX_WATER), 2),
+
+    def nearest_depots(self, grid_map, idx):
+        """批量计算 idx 中各机器人最近的补给站 (同距离时取列表中靠前的)"""
+        depots = np.array(grid_map.depots)
+        dist = (np.abs(self.x[idx, None] - depots[None, :, 0])
+                + np.abs(self.y[idx, None] - depots[None, :, 1]))
+        return depots[np.argmin(dist, axis=1)]
+
+    def step(self, grid_map, predictor=None, current_genome=None):
+        """批量推进全部机器人一帧 (对应原先逐个调用的 Robot.step)"""
+        n = self.size
+        robots = self.robots
+        status = self.status[:n]
+        battery = self.battery[:n]
+
+        # 0. 电量耗尽：进入 stranded 状态，本帧不再处理
+        alive = battery > 0
+        status[~alive] = STRANDED
+
+        # 1. 闲置超时返航：闲置时间超过阈值则返回最近的 depot
+        idle = alive & (status == IDLE)
+        self.idle_timer[:n][idle] += 1
+        timeout = np.flatnonzero(idle & (self.idle_timer[:n] >= self.idle_return))
+        if len(timeout):
+            for i, (dx, dy) in zip(timeout, self.nearest_depots(grid_map, timeout)):
+                r = robots[i]
+                if (r.x, r.y) != (dx, dy):
+                    r.status = "RETURNING"
+                    r.set_target(int(dx), int(dy), grid_map)
+                    r.idle_timer = 0
+
+        # 2. 目标有效性验证：MOVING 且目标已不再燃烧 -> 记录失败样本并回到 idle
+        active = alive.copy()
+        check = np.flatnonzero(alive & (status == MOVING) & self.has_target[:n])
+        if len(check):
+            lost = check[grid_map.grid[self.target_x[check], self.target_y[check]] != 2]
+            for i in lost:
+                if predictor and self.features[i]:
+                    predictor.enqueue(self.features[i], 0) # 记录失败样本，由调度周期批量训练
+            status[lost] = IDLE
+            self.has_target[lost] = False
+            self.path_len[lost] = 0
+            self.path_pos[lost] = 0
+            active[lost] = False
+
+        # 3. 边走边灭：有水的机器人批量登记 3x3 灭火意图，帧末统一结算
+        sprayers = np.flatnonzero(active & (self.water[:n] > 0))
+        if len(sprayers):
+            self.queue_extinguish(grid_map, sprayers)
+
+        # 4. 武装返航协议：电量或水量不足的机器人批量转入返航
+        low = np.flatnonzero(
+            active
+            & (status != RETURNING) & (status != STRANDED)
+            & ((battery < self.low_battery) | (self.water[:n] <= self.water_reserve))
         )
-        if self.status == "IDLE":
-            font = pygame.font.SysFont("Arial", 10)
-            text = font.render("Wait", True, (255, 255, 255))
-            surface.blit(text, (px, py - 12))
+        if len(low):
+            status[low] = RETURNING
+            self.has_target[low] = False
+            for i, (dx, dy) in zip(low, self.nearest_depots(grid_map, low)):
+                robots[i].set_target(int(dx), int(dy), grid_map)
+
+        # 5. 移动逻辑：沿路径游标前进一步并消耗电量
+        has_path = self.path_pos[:n] < self.path_len[:n]
+        movers = np.flatnonzero(active & ((status == MOVING) | (status == RETURNING)) & has_path)
+        stopped = active & ~has_path
+        status[stopped] = IDLE
+
+        if len(movers):
+            step = self.paths[movers, self.path_pos[movers]]
+            self.x[movers], self.y[movers] = step[:, 0], step[:, 1]
+            self.path_pos[movers] += 1
+            battery[movers] -= 1
+
+            # --- 到达逻辑 ---
+            arrived = movers[
+                self.has_target[movers]
+                & (self.x[movers] == self.target_x[movers])
+                & (self.y[movers] == self.target_y[movers])
+            ]
+            home = arrived[status[arrived] == RETURNING]
+            battery[home] = self.max_battery
+            self.water[home] = self.max_water
+            status[home] = IDLE
+            self.has_target[home] = False
+
+            for i in arrived[status[arrived] == MOVING]:
+                r = robots[i]
+                if predictor and r.last_task_features:
+                    predictor.enqueue(r.last_task_features, 1)
+                # 到达火点后，尝试连击 (Mopping Up)
+                local_fire = None
+                if (
+                    r.water > self.water_reserve
+                    and r.battery > self.low_battery
+                ):
+                    # 传入 neighbors 进行避嫌
+                    local_fire = r.find_local_fire(grid_map, robots, dynamic_radius=current_genome.radius)
+
+                if local_fire:
+                    r.set_target(
+                        local_fire[0],
+                        local_fire[1],
+                        grid_map,
+                        r.last_task_features,
+                    )
+                else:
+                    r.status, r.target = "IDLE", None
 
 
 class SupportBot(BaseAgent):
@@ -215,7 +389,7 @@ class SupportBot(BaseAgent):
                     stranded, key=lambda r: abs(self.x - r.x) + abs(self.y - r.y)
                 )
                 self.path = (
-                    astar(
+                    astar_fast(
                         grid_map,
                         (self.x, self.y),
                         (self.target_robot.x, self.target_robot.y),
@@ -226,17 +400,15 @@ class SupportBot(BaseAgent):
         for _ in range(2):
             if self.path:
                 self.x, self.y = self.path.pop(0)
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if grid_map.get_state(self.x + dx, self.y + dy) == 2:
-                            grid_map.set_state(self.x + dx, self.y + dy, 6)
+                # 推土机模式：不限水量的 3x3 灭火意图，帧末统一结算
+                grid_map.queue_extinguish(self.x, self.y)
 
                 if (
                     abs(self.x - self.target_robot.x) <= 1
                     and abs(self.y - self.target_robot.y) <= 1
                 ):
-                    self.target_robot.battery = ROBOT_MAX_BATTERY
-                    self.target_robot.water = ROBOT_MAX_WATER
+                    self.target_robot.battery = self.target_robot.fleet.max_battery
+                    self.target_robot.water = self.target_robot.fleet.max_water
                     self.target_robot.status = "IDLE"
                     self.target_robot = None
                     self.path = []
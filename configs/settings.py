@@ -6,6 +6,14 @@ SIDEBAR_WIDTH = 220
 WINDOW_WIDTH = GRID_WIDTH * CELL_SIZE + SIDEBAR_WIDTH
 WINDOW_HEIGHT = GRID_HEIGHT * CELL_SIZE
 FPS = 60
+CAMERA_MAX_CELL_SIZE = 64  # 视口放大上限 (每格像素数)
+CAMERA_LOD_CELL_PIXELS = 4  # 每格不足这么多像素时按块聚合绘制 (块内有火显示为火，否则取多数状态)
+CAMERA_PAN_SPEED = 12  # 方向键每帧平移的像素数
+SIM_TICK_RATE = 60  # 仿真线程每秒推进的帧数 (与渲染帧率解耦)
+KERNEL_BACKEND = "auto"  # 网格内核后端："auto" (有 numba 则用) / "numba" / "numpy"
+SPREAD_WORKERS = 0  # 火势条带分解的 worker 进程数 (0 表示在仿真进程内直接推进)
+STREAM_KEYFRAME_INTERVAL = 120  # 状态流每隔多少条消息插入一次完整关键帧 (供中途加入的看板同步)
+STREAM_MAX_BACKLOG = 4 * 1024 * 1024  # 单个看板允许积压的字节数，超出后丢弃积压并用关键帧重新同步
 
 # --- 颜色定义 ---
 COLOR_BG = (30, 30, 30)
@@ -25,10 +33,15 @@ COLOR_DEPOT = (138, 43, 226)
 FIRE_SPREAD_PROB = 0.05
 TREE_DENSITY = 0.7
 TREE_MAX_FUEL = 100
+WALL_DENSITY = 0.05
+FOREST_PATCH_SCALE = 0           # 树木 / 墙体斑块的尺度 (格)，0 表示逐格独立随机
 WIND_STRENGTH = 2.5
+WIND_SHIFT_TICKS = 0             # 每隔多少个火势刻随机转一次风 (0 表示风向不变)
 DRYNESS_INCREASE_RATE = 1.5
 IGNITION_DRYNESS_THRESHOLD = 100
 SPONTANEOUS_FIRE_PROB = 0.0001
+FIRE_TICK_INTERVAL = 12          # 每隔多少帧推进一次火势 (同时更新干燥度)
+FAST_FORWARD_EXACT = False       # 静默期快进时逐刻复现随机数 (与逐帧推进完全一致，但较慢)；默认直接抽样下一次自燃
 
 # --- 机器人参数 ---
 ROBOT_MAX_BATTERY = 200
@@ -36,11 +49,41 @@ ROBOT_MAX_WATER = 30
 ROBOT_WATER_RESERVE = 5          # 武装返航预留水量
 ROBOT_LOW_BATTERY_THRESHOLD = 40
 ROBOT_IDLE_RETURN_THRESHOLD = 100
+N_ROBOTS = 3                     # 地面机器人数量
 STATUS_BAR_WIDTH = 18
 STATUS_BAR_HEIGHT = 3
 
 # --- ML & GA 参数 ---
 ML_LEARNING_RATE = 0.05
 BID_REJECT_THRESHOLD = 5000
+DISPATCH_INTERVAL = 20           # 每隔多少帧执行一次任务调度
 PREDICTION_PENALTY = 2500.0       # 由 GA 动态调节
-GA_EVOLVE_INTERVAL = 200        # 每 1000 帧进化一次
\ No newline at end of file
+GA_EVOLVE_INTERVAL = 200        # 每 1000 帧进化一次
+
+# --- 参数扫描 ---
+# 可以按局覆盖的参数：Simulation 通过 resolve_settings 读取，而不是在导入时固定
+SWEEPABLE_SETTINGS = (
+    "FIRE_SPREAD_PROB",
+    "WIND_STRENGTH",
+    "TREE_DENSITY",
+    "FOREST_PATCH_SCALE",
+    "N_ROBOTS",
+    "ROBOT_MAX_BATTERY",
+    "ROBOT_MAX_WATER",
+    "ROBOT_WATER_RESERVE",
+    "ROBOT_LOW_BATTERY_THRESHOLD",
+    "ROBOT_IDLE_RETURN_THRESHOLD",
+    "BID_REJECT_THRESHOLD",
+    "GA_EVOLVE_INTERVAL",
+    "FAST_FORWARD_EXACT",
+)
+
+
+def resolve_settings(overrides=None):
+    """返回可扫描参数的默认值字典，并用 overrides 覆盖；未知参数直接报错"""
+    values = {name: globals()[name] for name in SWEEPABLE_SETTINGS}
+    for name, value in (overrides or {}).items():
+        if name not in values:
+            raise KeyError(f"Setting {name!r} cannot be overridden per run")
+        values[name] = value
+    return values
@@ -0,0 +1,327 @@
+# core/domain.py
+"""
+超大地图的区域分解：把网格沿第一个数组轴 (x) 切成连续的条带，每个条带由一个 worker 进程负责，
+状态数组 (grid / fuel / dryness / fire_cleared 以及风场与蔓延系数) 放在 multiprocessing.shared_memory 中，
+协调进程 (仿真主循环) 里的 GridMap 直接以这些共享数组为底层存储，Agent、无人机和调度器照常读写。
+
+每个火势刻分三段，段间用 Barrier 同步：
+1. 干燥度与自燃 (只涉及本条带)
+2. 读取本条带及上下各一行的 halo (交换边界火点)
+3. 燃料消耗、燃尽与蔓延，结果原地写回本条带
+
+随机数由 (种子, 火势刻, 用途, 格子索引) 哈希得到 (计数器式随机数)，与条带划分无关，
+因此任意 worker 数的结果都与单进程 (serial) 完全一致。
+"""
+import multiprocessing
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from configs.settings import *
+from core.kernels import NEIGHBOR_OFFSETS
+from core.grid_map import direction_weights
+
+# 随机数用途编号：0 干燥度噪声，1 自燃，2..9 八个方向的蔓延
+_STREAM_DRYNESS, _STREAM_IGNITION, _STREAM_SPREAD = 0, 1, 2
+
+_FIELDS = (
+    ("grid", "grid"),
+    ("fuel", "fuel_grid"),
+    ("dryness", "dryness_grid"),
+    ("cleared", "fire_cleared"),
+    ("wind_u", "wind_u"),
+    ("wind_v", "wind_v"),
+    ("modifier", "spread_modifier"),
+)
+
+
+def _mix(z):
+    """splitmix64 的混合函数 (uint64 数组，溢出按 2^64 取模)"""
+    z = z ^ (z >> np.uint64(30))
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def counter_uniform(seed, tick, stream, cells):
+    """格子 cells (扁平索引) 在 (seed, tick, stream) 下的 [0, 1) 均匀随机数，只取决于这些计数器"""
+    with np.errstate(over="ignore"):
+        counter = (seed * 0x100000001B3 + tick * 16 + stream) & 0xFFFFFFFFFFFFFFFF
+        key = _mix(np.array([counter], dtype=np.uint64))
+        z = _mix(cells.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + key)
+    return (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+# close() 时仍有视图存活的共享内存块 [(block, 共享数组的弱引用)]：名字已删除，映射留到视图释放后再关闭。
+# 不能直接关闭：视图存活时关闭映射，取决于 NumPy 版本要么抛 BufferError，要么留下指向已解除映射内存的数组
+_pending_blocks = []
+
+
+def _release_blocks():
+    """关闭已没有 NumPy 视图引用的共享内存映射 (弱引用失效即没有任何视图)，其余留待下次"""
+    pending = []
+    for block, ref in _pending_blocks:
+        if ref() is None:
+            block.close()
+        else:
+            pending.append((block, ref))
+    _pending_blocks[:] = pending
+
+
+class StripState:
+    """一个条带 [x0, x1) 的共享数组视图及其单刻推进逻辑 (worker 与 serial 模式共用)"""
+
+    def __init__(self, arrays, x0, x1, params):
+        self.grid, self.fuel, self.dryness, self.cleared, self.wind_u, self.wind_v, self.modifier = arrays
+        self.x0, self.x1 = x0, x1
+        self.width, self.height = self.grid.shape
+        self.seed = params["seed"]
+        self.track = False  # 是否记录本刻改变的格子 (GridMap.track_changes)
+        self.changed = []
+        self.update_table(params["spread_prob"], params["wind_strength"])
+
+    def update_table(self, spread_prob, wind_strength):
+        """由共享风场重算本条带的方向权重表 (float32 以节省大地图内存)，只在风场变化后调用"""
+        rows = slice(self.x0, self.x1)
+        self.table = direction_weights(
+            self.wind_u[rows], self.wind_v[rows], self.modifier[rows],
+            spread_prob, wind_strength, dtype=np.float32,
+        )
+
+    def take_changes(self):
+        """取走本刻改变状态的格子 (全局扁平索引)"""
+        changed, self.changed = self.changed, []
+        return np.concatenate(changed) if changed else np.empty(0, dtype=np.int64)
+
+    def _cells(self, mask, x_offset):
+        """掩码 (局部坐标) 中为真的格子的全局扁平索引"""
+        xs, ys = np.nonzero(mask)
+        return (xs + x_offset) * self.height + ys
+
+    def dryness_phase(self, tick, draw_ignition=True):
+        """第 1 段：树木干燥度增加，越过阈值的树按概率自燃。返回自燃数"""
+        grid = self.grid[self.x0:self.x1]
+        dryness = self.dryness[self.x0:self.x1]
+        tree = grid == 1
+        cells = self._cells(tree, self.x0)
+        noise = 0.5 + counter_uniform(self.seed, tick, _STREAM_DRYNESS, cells)
+        dryness[tree] += DRYNESS_INCREASE_RATE * noise
+        if not draw_ignition:
+            return 0
+        hot = tree & (dryness > IGNITION_DRYNESS_THRESHOLD)
+        if not hot.any():
+            return 0
+        hot_cells = self._cells(hot, self.x0)
+        fire = counter_uniform(self.seed, tick, _STREAM_IGNITION, hot_cells) < SPONTANEOUS_FIRE_PROB
+        xs, ys = np.divmod(hot_cells[fire], self.height)
+        grid[xs - self.x0, ys] = 2
+        dryness[xs - self.x0, ys] = 0
+        if self.track:
+            self.changed.append(hot_cells[fire])
+        return int(fire.sum())
+
+    def read_halo(self):
+        """第 2 段：复制本条带及上下各一行 (越界补非火点) 作为本刻蔓延的输入快照"""
+        lo, hi = max(0, self.x0 - 1), min(self.width, self.x1 + 1)
+        snapshot = np.zeros((self.x1 - self.x0 + 2, self.height), dtype=self.grid.dtype)
+        snapshot[lo - (self.x0 - 1):hi - (self.x0 - 1)] = self.grid[lo:hi]
+        self.snapshot = snapshot
+
+    def spread_phase(self, tick):
+        """第 3 段：燃料消耗、燃尽，以及从快照火点 (含 halo) 向本条带树木的蔓延"""
+        pre = self.snapshot
+        n, h = self.x1 - self.x0, self.height
+        own = pre[1:-1]
+        grid = self.grid[self.x0:self.x1]
+        fuel = self.fuel[self.x0:self.x1]
+
+        fire_own = own == 2
+        fuel[fire_own] -= 1
+        burned_out = fire_own & (fuel <= 0)
+        grid[burned_out] = 4
+        self.cleared[self.x0:self.x1] |= burned_out
+        if self.track:
+            self.changed.append(self._cells(burned_out, self.x0))
+
+        # 候选格：本条带中 8 邻域内有火点的树木
+        fire = np.pad(pre == 2, ((0, 0), (1, 1)))
+        shifted = [fire[1 - dx:1 - dx + n, 1 - dy:1 - dy + h] for dx, dy in NEIGHBOR_OFFSETS]
+        near = np.logical_or.reduce(shifted) & (own == 1)
+        if not near.any():
+            return
+        xs, ys = np.nonzero(near)
+        cells = (xs + self.x0) * h + ys
+        ignite = np.zeros(len(cells), dtype=bool)
+        for k, src in enumerate(shifted):
+            lit = src[xs, ys]
+            if lit.any():
+                u = counter_uniform(self.seed, tick, _STREAM_SPREAD + k, cells[lit])
+                ignite[lit] |= u < self.table[k][xs[lit], ys[lit]]
+        grid[xs[ignite], ys[ignite]] = 2
+        self.dryness[self.x0:self.x1][xs[ignite], ys[ignite]] = 0
+        if self.track:
+            self.changed.append(cells[ignite])
+
+
+def _attach(names, shape, dtypes):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    arrays = [np.ndarray(shape, dtype=dtype, buffer=b.buf) for b, dtype in zip(blocks, dtypes)]
+    return blocks, arrays
+
+
+def _worker(names, shape, dtypes, x0, x1, params, barrier, conn):
+    """条带 worker：等待协调进程的命令，按三段式推进本条带"""
+    blocks, arrays = _attach(names, shape, dtypes)
+    strip = StripState(arrays, x0, x1, params)
+    try:
+        while True:
+            command = conn.recv()
+            if command[0] == "stop":
+                break
+            if command[0] == "wind":
+                strip.update_table(*command[1:])
+                continue
+            _, tick, draw_ignition, strip.track = command
+            ignitions = strip.dryness_phase(tick, draw_ignition)
+            barrier.wait()
+            strip.read_halo()
+            barrier.wait()
+            strip.spread_phase(tick)
+            conn.send((ignitions, strip.take_changes() if strip.track else None))
+    finally:
+        del strip, arrays
+        for b in blocks:
+            b.close()
+
+
+class FireDomain:
+    """
+    GridMap 的多进程火势后端：把 GridMap 的状态数组搬进共享内存，按条带分给 workers 个进程。
+    workers=0 时在当前进程内按同样的规则推进 (serial 模式，用于对照和小地图)。
+    """
+
+    def __init__(self, env, workers=SPREAD_WORKERS, seed=0):
+        self.env = env
+        self.workers = workers
+        self.seed = seed
+        self.tick_count = 0
+        self.shape = env.grid.shape
+        self._blocks = []
+        arrays = []
+        for _, attr in _FIELDS:
+            src = getattr(env, attr)
+            block = shared_memory.SharedMemory(create=True, size=max(1, src.nbytes))
+            arr = np.ndarray(src.shape, dtype=src.dtype, buffer=block.buf)
+            arr[...] = src
+            setattr(env, attr, arr)  # GridMap 此后直接读写共享数组
+            self._blocks.append(block)
+            arrays.append(arr)
+        self.arrays = arrays
+        self._refs = [weakref.ref(arr) for arr in arrays]  # 视图的 base 链指向这些数组，据此判断能否关闭映射
+        env.domain = self
+
+        params = {"seed": seed, "spread_prob": env.spread_prob, "wind_strength": env.wind_strength}
+        self._wind_version = env.wind_version
+        width = self.shape[0]
+        self.procs, self.conns = [], []
+        if workers <= 0:
+            self.serial = StripState(arrays, 0, width, params)
+            return
+        bounds = np.linspace(0, width, workers + 1).astype(int)
+        ctx = multiprocessing.get_context("spawn")
+        barrier = self._barrier = ctx.Barrier(workers)  # 须保留引用，直到 worker 全部退出
+        names = [b.name for b in self._blocks]
+        dtypes = [a.dtype for a in arrays]
+        for x0, x1 in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(names, self.shape, dtypes, int(x0), int(x1), params, barrier, child),
+                daemon=True,
+            )
+            proc.start()
+            self.procs.append(proc)
+            self.conns.append(parent)
+
+    def tick(self):
+        """推进一个火势刻 (干燥度、自燃、燃尽、蔓延)，原地写入共享数组。返回自燃数"""
+        env = self.env
+        self.tick_count += 1
+        tick = self.tick_count
+
+        # 快进阶段预定的自燃：由协调进程直接点燃，本刻不再抽样
+        draw_ignition = env.forced_ignition is None
+        forced = 0
+        if not draw_ignition:
+            cells, env.forced_ignition = env.forced_ignition, None
+            cells = cells[env.grid.ravel()[cells] == 1]
+            env.grid.ravel()[cells] = 2
+            env.dryness_grid.ravel()[cells] = 0
+            env.log_changes(cells)
+            forced = len(cells)
+
+        # 风场或蔓延系数变化：各条带从共享数组重算自己的方向权重表
+        if env.wind_version != self._wind_version:
+            self._wind_version = env.wind_version
+            if self.workers <= 0:
+                self.serial.update_table(env.spread_prob, env.wind_strength)
+            for conn in self.conns:
+                conn.send(("wind", env.spread_prob, env.wind_strength))
+
+        track = env.track_changes
+        if self.workers <= 0:
+            self.serial.track = track
+            ignitions = self.serial.dryness_phase(tick, draw_ignition)
+            self.serial.read_halo()
+            self.serial.spread_phase(tick)
+            if track:
+                env.log_changes(self.serial.take_changes())
+            return forced + ignitions
+        for conn in self.conns:
+            conn.send(("tick", tick, draw_ignition, track))
+        for conn in self.conns:
+            ignitions, changed = conn.recv()
+            forced += ignitions
+            if track:
+                env.log_changes(changed)
+        return forced
+
+    def quiet_tick(self):
+        """
+        无火静默期在协调进程内推进一个火势刻的干燥度 (计数器式随机数与条带推进逐格相同)；
+        本刻会发生自燃时不做修改并返回 False，交给 tick() 正常推进。
+        """
+        env = self.env
+        tick = self.tick_count + 1
+        tree = env.grid == 1
+        cells = np.flatnonzero(tree)
+        noise = 0.5 + counter_uniform(self.seed, tick, _STREAM_DRYNESS, cells)
+        dryness = env.dryness_grid[tree] + DRYNESS_INCREASE_RATE * noise
+        hot = cells[dryness > IGNITION_DRYNESS_THRESHOLD]
+        if (counter_uniform(self.seed, tick, _STREAM_IGNITION, hot) < SPONTANEOUS_FIRE_PROB).any():
+            return False
+        env.dryness_grid[tree] = dryness
+        self.tick_count = tick
+        return True
+
+    def close(self):
+        """停止 worker，把状态复制回普通数组并释放共享内存"""
+        for conn in self.conns:
+            conn.send(("stop",))
+        for proc in self.procs:
+            proc.join(5.0)
+        self.conns, self.procs = [], []
+        env = self.env
+        for _, attr in _FIELDS:
+            setattr(env, attr, np.array(getattr(env, attr)))
+        env.domain = None
+        # 先丢掉本进程持有的全部共享数组视图，只有没有视图存活的映射才能关闭
+        self.arrays = None
+        self.serial = None
+        for block, ref in zip(self._blocks, self._refs):
+            block.unlink()  # 先删除名字：即使映射暂时关不掉，共享内存段也会在映射关闭后释放
+            _pending_blocks.append((block, ref))
+        self._blocks, self._refs = [], []
+        _release_blocks()
@@ -0,0 +1,189 @@
+# core/fire_batch.py
+import numpy as np
+from configs.settings import *
+from core.grid_map import GridMap, direction_weights
+from core.kernels import NEIGHBOR_OFFSETS
+
+
+class BatchFireResult:
+    """批量蒙特卡洛火灾仿真的汇总结果"""
+
+    def __init__(self, burn_probability, containment_ticks, burned_fraction, ticks):
+        self.burn_probability = burn_probability  # (W, H) 每个格子被烧到的概率
+        self.containment_ticks = containment_ticks  # (N,) 火势熄灭所用 tick，-1 表示未熄灭
+        self.burned_fraction = burned_fraction  # (N,) 每个场景被烧毁的树木比例
+        self.ticks = ticks  # 实际推进的 tick 数
+
+    def containment_distribution(self, quantiles=(0.1, 0.5, 0.9)):
+        """熄灭时间分位数 (只统计已熄灭的场景)"""
+        done = self.containment_ticks[self.containment_ticks >= 0]
+        if len(done) == 0:
+            return {}
+        return {q: float(np.quantile(done, q)) for q in quantiles}
+
+    def contained_ratio(self):
+        """在模拟时长内熄灭的场景比例"""
+        return float(np.mean(self.containment_ticks >= 0))
+
+
+class BatchFireSimulator:
+    """
+    把 N 片互相独立的森林堆叠成 (N, width, height) 数组，
+    用同一组向量化运算推进干燥度、自燃与风驱动蔓延。
+    规则与 GridMap.update_dryness / update_fire_spread 相同，每个场景拥有独立的随机种子和风向；
+    也可以像 GridMap 一样给出逐格风场 wind_u / wind_v 与蔓延系数 spread_modifier
+    ((W, H) 为所有场景共用，(N, W, H) 为逐场景)，给出逐格风场时忽略 winds。
+    """
+
+    def __init__(self, n_scenarios, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 seeds=None, winds=None, density=TREE_DENSITY, n_ignitions=3,
+                 wind_u=None, wind_v=None, spread_modifier=None):
+        self.n = n_scenarios
+        self.width = width
+        self.height = height
+        if seeds is None:
+            seeds = np.random.SeedSequence().spawn(n_scenarios)
+        self.rngs = [np.random.default_rng(s) for s in seeds]
+
+        # 每个场景的风向：未指定时从 WIND_DATA 中按各自种子随机抽取
+        if winds is None:
+            winds = [
+                GridMap.WIND_DATA[rng.integers(len(GridMap.WIND_DATA))][1]
+                for rng in self.rngs
+            ]
+        self.wind_directions = np.array(winds, dtype=float).reshape(self.n, 2)
+
+        # 方向权重表与 GridMap 共用 direction_weights；风场与蔓延系数都均匀时只按场景计算 (8, N, 1, 1)
+        if wind_u is None or wind_v is None:
+            wind_u = self.wind_directions[:, 0, None, None]
+            wind_v = self.wind_directions[:, 1, None, None]
+        modifier = 1.0 if spread_modifier is None else spread_modifier
+        shape = np.broadcast_shapes(np.shape(wind_u), np.shape(wind_v), np.shape(modifier), (self.n, 1, 1))
+        fields = [np.broadcast_to(field, shape) for field in (wind_u, wind_v, modifier)]
+        spread_prob = direction_weights(*fields, FIRE_SPREAD_PROB, WIND_STRENGTH)
+        # 用对数存活概率合并多个火源：P(点燃) = 1 - Π(1 - p_d)
+        with np.errstate(divide="ignore"):
+            log_survival = np.log1p(-np.minimum(spread_prob, 1.0))
+        self.log_survival = np.broadcast_to(log_survival, (len(NEIGHBOR_OFFSETS), self.n, width, height))
+
+        shape = (self.n, width, height)
+        self.grid = np.zeros(shape, dtype=np.int8)
+        self.fuel_grid = np.zeros(shape, dtype=np.int16)
+        self.dryness_grid = np.zeros(shape, dtype=np.float32)
+        self._rand = np.empty(shape, dtype=np.float32)  # 随机数缓冲区，逐 tick 复用
+        self.generate_forests(density)
+        self.initial_trees = (self.grid == 1).sum(axis=(1, 2))
+        for _ in range(n_ignitions):
+            self.ignite_random()
+
+        self.burned = self.grid == 2  # 每个格子是否曾经着火
+        self.containment_ticks = np.full(self.n, -1, dtype=int)
+        self.tick = 0
+
+    def _draw(self):
+        """按场景各自的随机流填充稠密随机数缓冲区"""
+        for i, rng in enumerate(self.rngs):
+            rng.random(dtype=np.float32, out=self._rand[i])
+        return self._rand
+
+    def _draw_sparse(self, scenario_idx):
+        """为按场景排序的稀疏格子抽取随机数，每个场景只消耗自己的随机流"""
+        counts = np.bincount(scenario_idx, minlength=self.n)
+        out = np.empty(len(scenario_idx), dtype=np.float32)
+        pos = 0
+        for i in np.flatnonzero(counts):
+            out[pos:pos + counts[i]] = self.rngs[i].random(counts[i], dtype=np.float32)
+            pos += counts[i]
+        return out
+
+    def generate_forests(self, density=TREE_DENSITY):
+        rand = self._draw()
+        tree_mask = rand < density
+        self.grid[:] = 0
+        self.grid[(rand >= density) & (rand < density + WALL_DENSITY)] = 3
+        self.grid[tree_mask] = 1
+        self.fuel_grid[tree_mask] = TREE_MAX_FUEL
+        dryness = self._draw() * (IGNITION_DRYNESS_THRESHOLD * 0.5)
+        self.dryness_grid[tree_mask] = dryness[tree_mask]
+        for dx, dy in [(0, 0), (self.width - 1, 0), (0, self.height - 1),
+                       (self.width - 1, self.height - 1)]:
+            self.grid[:, dx, dy] = 5
+            self.fuel_grid[:, dx, dy] = 0
+
+    def ignite_random(self):
+        """每个场景随机点燃一棵树"""
+        for i, rng in enumerate(self.rngs):
+            trees = np.flatnonzero(self.grid[i] == 1)
+            if len(trees) > 0:
+                x, y = divmod(int(trees[rng.integers(len(trees))]), self.height)
+                self.grid[i, x, y] = 2
+                self.dryness_grid[i, x, y] = 0
+
+    def update_dryness(self, tree_mask):
+        # 干燥度只在越过阈值前有意义 (越过后只有着火会把它清零)，
+        # 因此所有树都越过阈值后不再抽取稠密噪声
+        warming = tree_mask & (self.dryness_grid <= IGNITION_DRYNESS_THRESHOLD)
+        if warming.any():
+            noise = 0.5 + self._draw()  # U(0.5, 1.5)
+            self.dryness_grid += (DRYNESS_INCREASE_RATE * noise) * warming
+
+        # 自燃：每个场景按二项分布抽取自燃数量，再在可自燃的树中随机选位置
+        eligible = tree_mask & (self.dryness_grid > IGNITION_DRYNESS_THRESHOLD)
+        counts = eligible.sum(axis=(1, 2))
+        for i in np.flatnonzero(counts):
+            k = self.rngs[i].binomial(counts[i], SPONTANEOUS_FIRE_PROB)
+            if k == 0:
+                continue
+            cells = np.flatnonzero(eligible[i])
+            chosen = self.rngs[i].choice(cells, size=k, replace=False)
+            xs, ys = np.divmod(chosen, self.height)
+            self.grid[i, xs, ys] = 2
+            self.dryness_grid[i, xs, ys] = 0
+
+    def update_fire_spread(self):
+        """所有场景同时推进一个火势 tick"""
+        self.update_dryness(self.grid == 1)
+        fire_mask = self.grid == 2
+        new_grid = self.grid.copy()
+        np.subtract(self.fuel_grid, fire_mask, out=self.fuel_grid, casting="unsafe")
+        new_grid[fire_mask & (self.fuel_grid <= 0)] = 4
+
+        # 只对“邻近火源的树”计算点燃概率：先膨胀火源掩码筛出候选格
+        w, h = self.width, self.height
+        padded = np.pad(fire_mask, ((0, 0), (1, 1), (1, 1)))
+        near_fire = np.zeros(self.grid.shape, dtype=bool)
+        for dx, dy in NEIGHBOR_OFFSETS:
+            near_fire |= padded[:, 1 - dx:1 - dx + w, 1 - dy:1 - dy + h]
+        n_idx, x_idx, y_idx = np.nonzero(near_fire & (self.grid == 1))
+
+        # 多个火源合并：P(点燃) = 1 - Π(1 - p_d)，在对数域累加
+        log_survival = np.zeros(len(n_idx), dtype=float)
+        for d, (dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+            source = padded[n_idx, x_idx + 1 - dx, y_idx + 1 - dy]
+            log_survival += np.where(source, self.log_survival[d][n_idx, x_idx, y_idx], 0.0)
+        hit = self._draw_sparse(n_idx) < -np.expm1(log_survival)
+        n_idx, x_idx, y_idx = n_idx[hit], x_idx[hit], y_idx[hit]
+
+        new_grid[n_idx, x_idx, y_idx] = 2
+        self.dryness_grid[n_idx, x_idx, y_idx] = 0
+        self.grid = new_grid
+        self.burned |= fire_mask
+        self.burned[n_idx, x_idx, y_idx] = True
+        self.tick += 1
+
+        active = (self.grid == 2).any(axis=(1, 2))
+        newly_contained = (~active) & (self.containment_ticks < 0)
+        self.containment_ticks[newly_contained] = self.tick
+
+    def run(self, max_ticks=2000):
+        """推进到所有场景都已熄灭或达到 max_ticks，返回汇总结果"""
+        while self.tick < max_ticks and (self.containment_ticks < 0).any():
+            self.update_fire_spread()
+
+        trees_total = np.maximum(1, self.initial_trees)
+        return BatchFireResult(
+            burn_probability=self.burned.mean(axis=0),
+            containment_ticks=self.containment_ticks.copy(),
+            burned_fraction=self.burned.sum(axis=(1, 2)) / trees_total,
+            ticks=self.tick,
+        )
@@ -18,6 +18,14 @@ class Genome:
         self.crowded_frames = 0  # 记录发生拥挤的帧数
         self.idle_frames = 0  # [新增] 记录闲置总帧数
 
+    def reset_stats(self):
+        """清空上一次评估累计的表现统计 (重新仿真同一个基因前调用)"""
+        self.extinguished_count = 0
+        self.severity_bonus = 0
+        self.stranded_count = 0
+        self.crowded_frames = 0
+        self.idle_frames = 0
+
     def mutate(self, rate=0.1):
         """随机变异"""
         if random.random() < rate:
@@ -27,14 +35,75 @@ class Genome:
             self.radius += random.choice([-1, 1])
             self.radius = max(2, min(4, self.radius))
 
+    def key(self):
+        """基因型的记忆化键 (惩罚系数保留 1 位小数)"""
+        return (round(self.penalty, 1), int(self.radius))
+
+
+class FitnessSurrogate:
+    """
+    适应度代理模型：在 (penalty, radius) 上拟合高斯过程回归，
+    对候选子代同时给出预测均值与不确定度，用于决定哪些基因值得真实仿真。
+    """
+
+    def __init__(self, length_scale=0.3, noise=0.1, max_history=200):
+        self.length_scale = length_scale
+        self.noise = noise
+        self.max_history = max_history
+        self.X = np.zeros((0, 2))
+        self.y = np.zeros(0)
+        self._alpha = None
+
+    @staticmethod
+    def encode(penalty, radius):
+        """把基因归一化到 0~1 量级"""
+        return np.array([penalty / 4000.0, radius / 8.0])
+
+    def _kernel(self, a, b):
+        d2 = np.sum((a[:, None, :] - b[None, :, :]) ** 2, axis=-1)
+        return np.exp(-0.5 * d2 / self.length_scale ** 2)
+
+    def add(self, genome, fitness):
+        """加入一次真实评估结果并重新拟合"""
+        self.X = np.vstack([self.X, self.encode(genome.penalty, genome.radius)])[-self.max_history:]
+        self.y = np.append(self.y, fitness)[-self.max_history:]
+        self._y_mean = self.y.mean()
+        self._y_std = self.y.std() if self.y.std() > 1e-9 else 1.0
+        K = self._kernel(self.X, self.X) + self.noise * np.eye(len(self.y))
+        self._L = np.linalg.cholesky(K)
+        target = (self.y - self._y_mean) / self._y_std
+        self._alpha = np.linalg.solve(self._L.T, np.linalg.solve(self._L, target))
+
+    def predict(self, genomes):
+        """返回候选基因的 (预测均值, 标准差)；无历史时均值为 0、不确定度为无穷大"""
+        Xq = np.array([self.encode(g.penalty, g.radius) for g in genomes]).reshape(-1, 2)
+        if self._alpha is None:
+            return np.zeros(len(Xq)), np.full(len(Xq), np.inf)
+        k_star = self._kernel(Xq, self.X)
+        mean = k_star @ self._alpha
+        v = np.linalg.solve(self._L, k_star.T)
+        var = np.maximum(1.0 + self.noise - np.sum(v ** 2, axis=0), 1e-12)
+        return mean * self._y_std + self._y_mean, np.sqrt(var) * self._y_std
+
 
 class GeneticOptimizer:
-    def __init__(self, pop_size=4):
+    def __init__(self, pop_size=4, candidate_factor=4, explore_kappa=1.0, elite_reeval_interval=3):
         self.pop_size = pop_size
         self.population = [Genome() for _ in range(pop_size)]
         self.current_idx = 0
         self.generation = 1
 
+        # 代理模型辅助：每代先生成 candidate_factor 倍的候选子代，用代理模型预筛
+        self.candidate_factor = candidate_factor
+        self.explore_kappa = explore_kappa  # UCB 探索系数
+        self.surrogate = FitnessSurrogate()
+        self.memo = {}  # 已真实评估过的基因 -> (适应度均值, 评估次数)
+        # 单次评估受火情随机性影响，冠军每隔 elite_reeval_interval 代重新仿真一次，记忆表取多次的均值
+        self.elite_reeval_interval = elite_reeval_interval
+        self._reeval_key = None  # 本代需要重新仿真的记忆化基因
+        self.simulated_count = 0  # 真实仿真评估次数
+        self.skipped_count = 0  # 因记忆化或代理模型预筛而省下的评估次数
+
         # 确保种群里有一个较激进的初始值作为种子
         self.population[0] = Genome(penalty=2500, radius=5)
     def evaluate_fitness(self, genome):
@@ -71,47 +140,92 @@ class GeneticOptimizer:
         return score
 
     def next_step(self):
-        """切换到下一个个体，如果一轮结束则进化"""
-        # 1. 结算当前个体的适应度
+        """切换到下一个个体 (跳过已记忆化的基因)，如果一轮结束则进化"""
+        # 1. 结算当前个体的适应度，更新记忆表中的运行均值，并记入代理模型
         current = self.population[self.current_idx]
-        self.evaluate_fitness(current)
-
-        # 2. 移动索引
+        fitness = self.evaluate_fitness(current)
+        mean, count = self.memo.get(current.key(), (0.0, 0))
+        count += 1
+        mean += (fitness - mean) / count
+        self.memo[current.key()] = (mean, count)
+        current.fitness = mean
+        if current.key() == self._reeval_key:
+            self._reeval_key = None
+        self.surrogate.add(current, fitness)
+        self.simulated_count += 1
+
+        # 2. 移动索引，已评估过的重复基因直接复用结果
         self.current_idx += 1
+        self._skip_memoized()
 
-        # 3. 如果一代跑完了，进行进化
-        if self.current_idx >= self.pop_size:
-            self.evolve()
-            self.current_idx = 0
-            self.generation += 1
-            return True  # 表示开启了新的一代
-        return False
+        # 3. 如果一代跑完了，进行进化 (新一代总含未仿真过的个体，不会空转多代)
+        if self.current_idx < len(self.population):
+            return False
+        self.evolve()
+        self.current_idx = 0
+        self.generation += 1
+        self._skip_memoized()
+        return True
+
+    def _skip_memoized(self):
+        while self.current_idx < len(self.population):
+            genome = self.population[self.current_idx]
+            if genome.key() not in self.memo or genome.key() == self._reeval_key:
+                genome.reset_stats()
+                break
+            genome.fitness = self.memo[genome.key()][0]
+            self.skipped_count += 1
+            self.current_idx += 1
+
+    def best_fitness(self):
+        """记忆表中最高的适应度均值"""
+        return max((mean for mean, _ in self.memo.values()), default=0.0)
+
+    def _spawn_candidates(self, best):
+        """
+        从冠军变异出候选子代，去掉重复与已评估过的基因；
+        变异凑不够 pop_size - 1 个新基因时补充随机个体，保证下一代种群满员。
+        """
+        candidates, seen = [], set(self.memo)
+        for _ in range(self.candidate_factor * (self.pop_size - 1)):
+            child = Genome(best.penalty, best.radius)
+            child.mutate(rate=0.5)  # 较高的变异率以探索
+            if child.key() in seen:
+                continue
+            seen.add(child.key())
+            candidates.append(child)
+        while len(candidates) < self.pop_size - 1:
+            child = Genome()
+            if child.key() not in seen:
+                seen.add(child.key())
+                candidates.append(child)
+        return candidates
 
     def evolve(self):
-        """进化逻辑: 精英保留 + 变异"""
+        """进化逻辑: 精英保留 + 变异 + 代理模型预筛"""
         # 按适应度排序 (高的在前)
         self.population.sort(key=lambda g: g.fitness, reverse=True)
 
         best = self.population[0]
         print(f"--- Generation {self.generation} Complete ---")
         print(
-            f"Best Genome: Penalty={best.penalty:.1f}, Radius={best.radius}, Score={best.fitness:.1f}"
+            f"Best Genome: Penalty={best.penalty:.1f}, Radius={best.radius}, Score={best.fitness:.1f} "
+            f"| Simulated: {self.simulated_count}, Skipped: {self.skipped_count}"
         )
 
-        # 精英策略: 保留最好的 1 个，剩下的由它变异产生
+        # 精英策略: 保留最好的 1 个 (已记忆化，只在重评代重新仿真，适应度取多次均值)
         new_pop = [best]  # 保留冠军
-
-        while len(new_pop) < self.pop_size:
-            # 复制冠军并变异
-            child = Genome(best.penalty, best.radius)
-            child.mutate(rate=0.5)  # 较高的变异率以探索
-            # 重置统计数据
-            child.extinguished_count = 0
-            child.crowded_frames = 0
-            new_pop.append(child)
-
-        # 重置冠军的统计数据以便下一轮测试
-        best.extinguished_count = 0
-        best.crowded_frames = 0
+        reeval = self.elite_reeval_interval and self.generation % self.elite_reeval_interval == 0
+        if reeval or self.pop_size == 1:
+            self._reeval_key = best.key()  # 只有冠军一个个体时每代都重新仿真它
+
+        # 按 UCB 从多出的候选中挑 pop_size - 1 个送去真实仿真，其余的省掉
+        candidates = self._spawn_candidates(best)
+        if candidates:
+            mean, std = self.surrogate.predict(candidates)
+            ucb = mean + self.explore_kappa * std
+            order = np.argsort(-ucb, kind="stable")
+            new_pop.extend(candidates[i] for i in order[: self.pop_size - 1])
+            self.skipped_count += len(candidates) - (self.pop_size - 1)
 
         self.population = new_pop
@@ -1,6 +1,54 @@
 import numpy as np
 import random
 from configs.settings import *
+from core.pathfinding import build_cost_grid
+from core import kernels
+
+
+def direction_weights(wind_u, wind_v, modifier, spread_prob, wind_strength, dtype=np.float64):
+    """
+    蔓延方向权重表 (8, W, H)：第 k 层为目标格被 k 方向 (NEIGHBOR_OFFSETS 顺序) 的火点引燃的概率，
+    = 基础概率 x 目标格蔓延系数 x max(0, 1 + 传播方向与目标格风向的点积 x 风力)
+    """
+    table = np.empty((len(kernels.NEIGHBOR_OFFSETS),) + wind_u.shape, dtype=dtype)
+    base = spread_prob * modifier
+    for k, (dx, dy) in enumerate(kernels.NEIGHBOR_OFFSETS):
+        table[k] = base * np.maximum(0, 1.0 + (dx * wind_u + dy * wind_v) * wind_strength)
+    return table
+
+
+def _box_blur(field, radius, axis):
+    """沿 axis 做半径 radius 的盒式平均 (边界镜像)，用前缀和实现，开销与半径无关"""
+    field = np.moveaxis(field, axis, 0)
+    n = len(field)
+    padded = np.pad(field, [(radius + 1, radius)] + [(0, 0)] * (field.ndim - 1), mode="symmetric")
+    csum = np.cumsum(padded, axis=0)
+    out = (csum[2 * radius + 1:2 * radius + 1 + n] - csum[:n]) / (2 * radius + 1)
+    return np.moveaxis(out, 0, axis)
+
+
+def patch_field(width, height, scale):
+    """空间相关的随机场：白噪声沿两个轴各做两次半径 scale 的盒式平均 (近似高斯平滑)"""
+    field = np.random.standard_normal((width, height))
+    for axis in (0, 1):
+        for _ in range(2):
+            field = _box_blur(field, scale, axis)
+    return field
+
+
+# 3x3 灭火窗口的偏移，dx 外层、dy 内层 (含中心)
+_WINDOW_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+
+
+class FireCluster:
+    """一个 8 连通的燃烧区域 (火团)：编号、格数、质心、包围盒和成员格的扁平索引"""
+
+    def __init__(self, label, cells, size, centroid, bbox):
+        self.label = label  # 对应 fire_labels 中的编号 (从 1 开始)
+        self.cells = cells  # 成员格扁平索引 x * height + y
+        self.size = size
+        self.centroid = centroid  # (cx, cy) 浮点质心
+        self.bbox = bbox  # (x_min, y_min, x_max, y_max)，闭区间
 
 
 class GridMap:
@@ -15,45 +63,112 @@ class GridMap:
         ("SE", (1, 1)),
     ]
 
-    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, density=TREE_DENSITY,
+                 spread_prob=FIRE_SPREAD_PROB, wind_strength=WIND_STRENGTH,
+                 patch_scale=FOREST_PATCH_SCALE, depots=None, terrain=None):
+        """
+        terrain (core.terrain.Terrain) 非空时直接使用其中 (通常是内存映射的) 状态、燃料和干燥度栅格，
+        地图尺寸以栅格为准；否则按 density / patch_scale 随机生成森林。
+        depots 为补给站坐标列表，默认取地形文件中记录的位置或地图四角。
+        """
+        if terrain is not None:
+            width, height = terrain.grid.shape
         self.width = width
         self.height = height
-        self.grid = np.zeros((width, height), dtype=int)
-        self.fuel_grid = np.zeros((width, height), dtype=int)
+        self.density = density  # 树木密度
+        self.spread_prob = spread_prob  # 基础蔓延概率
+        self.wind_strength = wind_strength  # 风力对蔓延的放大系数
+        if terrain is not None:
+            self.grid, self.fuel_grid, self.dryness_grid = terrain.grid, terrain.fuel, terrain.dryness
+        else:
+            self.grid = np.zeros((width, height), dtype=int)
+            self.fuel_grid = np.zeros((width, height), dtype=int)
+            self.dryness_grid = np.zeros((width, height), dtype=float)
         self.last_scan_frame = np.zeros((width, height), dtype=int) # 记录无人机扫描半径内的紧迫度
-        self.dryness_grid = np.zeros((width, height), dtype=float)
         self.wind_name, self.wind_direction = random.choice(self.WIND_DATA)
+        # 逐格风场 (x / y 分量) 与蔓延系数 (燃料类型)，默认全图一致
+        self.wind_u = np.full((width, height), float(self.wind_direction[0]))
+        self.wind_v = np.full((width, height), float(self.wind_direction[1]))
+        self.spread_modifier = np.ones((width, height))
+        self.wind_version = 0  # 风场 / 蔓延系数每次改变后递增
+        self.wind_schedule = []  # 计划中的风向切换 [(火势刻, u, v, 名称)]，按时间排序
+        self.fire_tick = 0  # 已推进的火势刻数
+        self._spread_table = None  # 方向权重表缓存 (wind_version, table)
         self.depots = []  # [新增] 补给站索引
+        self.version = 0  # 网格版本号，任何状态写入后递增
+        self._cost_cache = {}  # 寻路代价数组缓存 {has_water: (version, cost)}
+        self._fire_cells = (-1, None)  # 燃烧格缓存 (version, 扁平索引)
+        self._cell_counts = (-1, None)  # 各状态格数缓存 (version, 计数)
+        self._cleared_version = -1  # 上次取走熄灭格时的网格版本
+        self.pending_actions = []  # 本帧待结算的灭火意图批次
+        self.fire_labels = np.zeros((width, height), dtype=np.int32)  # 火团编号 (从 1 开始)，0 表示未燃烧
+        self._labeled = np.empty(0, dtype=np.int64)  # 上次标记时 fire_labels 非 0 的格子 (扁平索引)
+        self.fire_clusters = []  # 上次标记得到的 FireCluster 列表 (按编号排列)
+        self.fire_cleared = np.zeros((width, height), dtype=bool)  # 上次取走后停止燃烧的格子 (熄灭 / 燃尽)
+        self.domain = None  # 多进程条带后端 (core.domain.FireDomain)，None 表示单进程
+        self.forced_ignition = None  # 快进时预先抽样、在下一次火势刻点燃的格子 (扁平索引)
+        self.track_changes = False  # 开启后记录每次写入网格的格子，供状态流增量推送
+        self._changed = []  # 上次取走后改变过状态的格子 (扁平索引数组列表)
+        self._changed_count = 0  # _changed 中累计的格数 (含重复)
+        self.changes_overflowed = False  # 积压的变化超过整图格数后被丢弃，取用方需改为全图同步
         print(
             f"Simulation Init: Wind is blowing {self.wind_name} {self.wind_direction}"
         )
-        self.generate_forest()
-
-    def generate_forest(self, density=TREE_DENSITY):
-        self.fuel_grid.fill(0)
-        for x in range(self.width):
-            for y in range(self.height):
-                rand = random.random()
-                if rand < density:
-                    self.grid[x][y] = 1
-                    self.fuel_grid[x][y] = TREE_MAX_FUEL
-                    self.dryness_grid[x][y] = random.uniform(
-                        0, IGNITION_DRYNESS_THRESHOLD * 0.5
-                    )
-                elif rand < density + 0.05:
-                    self.grid[x][y] = 3
-                else:
-                    self.grid[x][y] = 0
-        depot_coords = [
-            (0, 0),
-            (self.width - 1, 0),
-            (0, self.height - 1),
-            (self.width - 1, self.height - 1),
-        ]
-        for dx, dy in depot_coords:
-            self.grid[dx][dy] = 5
-            self.fuel_grid[dx][dy] = 0
-            self.depots.append((dx, dy))  # [清单2] 记录坐标
+        if terrain is not None:
+            self.place_depots(depots if depots is not None else terrain.depots)
+        else:
+            self.generate_forest(patch_scale=patch_scale, depots=depots)
+
+    def generate_forest(self, density=None, patch_scale=0, depots=None):
+        """
+        整图向量化生成森林：patch_scale > 0 时树木和墙体按空间相关的斑块分布 (尺度约 patch_scale 格)，
+        按分位数取阈值，密度与独立抽样时一致；否则逐格独立抽样。
+        """
+        if density is None:
+            density = self.density
+        shape = (self.width, self.height)
+        if patch_scale > 0:
+            tree_field = patch_field(*shape, patch_scale)
+            tree = tree_field < np.quantile(tree_field, density)
+            # 墙体只占非树木格，取独立的斑块场使整体比例仍为 WALL_DENSITY
+            wall_field = patch_field(*shape, patch_scale)
+            wall_share = min(1.0, WALL_DENSITY / max(1.0 - density, 1e-9))
+            wall = ~tree & (wall_field < np.quantile(wall_field, wall_share))
+        else:
+            rand = np.random.random(shape)
+            tree = rand < density
+            wall = ~tree & (rand < density + WALL_DENSITY)
+        self.grid[...] = 0
+        self.grid[wall] = 3
+        self.grid[tree] = 1
+        self.fuel_grid[...] = 0
+        self.fuel_grid[tree] = TREE_MAX_FUEL
+        self.dryness_grid[...] = 0
+        self.dryness_grid[tree] = np.random.uniform(
+            0, IGNITION_DRYNESS_THRESHOLD * 0.5, size=int(np.count_nonzero(tree))
+        )
+        self.place_depots(depots)
+
+    def place_depots(self, depots=None):
+        """在任意格子放置补给站 (默认四个角)"""
+        if depots is None:
+            depots = [
+                (0, 0),
+                (self.width - 1, 0),
+                (0, self.height - 1),
+                (self.width - 1, self.height - 1),
+            ]
+        depots = [(int(x), int(y)) for x, y in depots]
+        if not depots:
+            raise ValueError("A map needs at least one depot")
+        for x, y in depots:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise ValueError(f"Depot {(x, y)} is outside the {self.width}x{self.height} map")
+        xs, ys = np.array(depots).T
+        self.grid[xs, ys] = 5
+        self.fuel_grid[xs, ys] = 0
+        self.depots = depots  # [清单2] 记录坐标
+        self.version += 1
 
     # [清单3] 向量化更新
     def update_dryness(self):
@@ -61,45 +176,166 @@ class GridMap:
         noise = np.random.uniform(0.5, 1.5, size=(self.width, self.height)) # 随机噪声
         self.dryness_grid[tree_mask] += DRYNESS_INCREASE_RATE * noise[tree_mask] # 增加干燥度
 
-        ignite_mask = tree_mask & (self.dryness_grid > IGNITION_DRYNESS_THRESHOLD) # 点燃掩码
-        # 遍历点燃掩码内的区域，如果区域内的干燥度大于点燃干燥度阈值，且随机数小于点燃概率，则点燃树木
-        for x, y in np.argwhere(
-            ignite_mask
-            & (np.random.random((self.width, self.height)) < SPONTANEOUS_FIRE_PROB)
-        ):
+        if self.forced_ignition is not None:
+            # 快进阶段已抽样出本刻的自燃格，直接点燃，不再重复抽样
+            cells, self.forced_ignition = self.forced_ignition, None
+            cells = cells[self.grid.ravel()[cells] == 1]  # 期间可能已被手动改动
+            ignitions = np.column_stack(np.divmod(cells, self.height))
+        else:
+            ignite_mask = tree_mask & (self.dryness_grid > IGNITION_DRYNESS_THRESHOLD) # 点燃掩码
+            # 遍历点燃掩码内的区域，如果区域内的干燥度大于点燃干燥度阈值，且随机数小于点燃概率，则点燃树木
+            ignitions = np.argwhere(
+                ignite_mask
+                & (np.random.random((self.width, self.height)) < SPONTANEOUS_FIRE_PROB)
+            )
+        for x, y in ignitions:
             self.grid[x][y] = 2
             self.dryness_grid[x][y] = 0
+            self.version += 1
             print(f"Spontaneous ignition at ({x}, {y})!")
+        if len(ignitions):
+            self.log_changes(ignitions[:, 0] * self.height + ignitions[:, 1])
+
+    def advance_dryness(self, ticks):
+        """
+        无火静默期闭式推进 ticks 个火势刻的干燥度：
+        ticks 个 U(0.5, 1.5) 噪声之和按正态近似 (均值 ticks，方差 ticks / 12) 一次抽样。
+        """
+        tree_mask = self.grid == 1
+        noise = ticks + np.sqrt(ticks / 12.0) * np.random.standard_normal(np.count_nonzero(tree_mask))
+        self.dryness_grid[tree_mask] += DRYNESS_INCREASE_RATE * noise
+
+    def sample_spontaneous_ignition(self):
+        """
+        无火静默期直接抽样下一次自燃：返回 (k, cells)，即从下一个火势刻数起第 k 刻点燃 cells。
+        每棵树越过阈值所需的刻数按正态近似抽样，越过后每刻以 SPONTANEOUS_FIRE_PROB 独立点燃 (几何分布)。
+        没有树时返回 (None, 空数组)。
+        """
+        trees = np.flatnonzero(self.grid == 1)
+        if not len(trees):
+            return None, trees
+        dryness = self.dryness_grid.ravel()[trees]
+        # 越过阈值的刻数：平均需要 gap 刻，噪声之和的标准差约 sqrt(gap / 12)
+        gap = np.maximum(IGNITION_DRYNESS_THRESHOLD - dryness, 0) / DRYNESS_INCREASE_RATE
+        crossing = np.floor(gap - np.sqrt(gap / 12.0) * np.random.standard_normal(len(trees))) + 1
+        ticks = np.maximum(crossing, 1) + np.random.geometric(SPONTANEOUS_FIRE_PROB, len(trees)) - 1
+        k = ticks.min()
+        return int(k), trees[ticks == k]
+
+    def skip_fire_ticks(self, ticks):
+        """快进跳过 ticks 个火势刻：推进刻计数并应用期间到期的风向切换"""
+        if not (self.wind_schedule or WIND_SHIFT_TICKS):
+            self.fire_tick += ticks
+            return
+        for _ in range(ticks):
+            self.fire_tick += 1
+            self.apply_wind_schedule()
+
+    def quiet_fire_tick(self):
+        """
+        无火静默期逐刻推进一个火势刻 (只有干燥度变化)，消耗的随机数与 update_fire_spread 完全相同，
+        快进后的状态因此与逐刻推进一致 (FAST_FORWARD_EXACT 模式)。本刻会发生自燃时不做任何修改
+        (随机数状态也恢复) 并返回 False，由正常推进的 update_fire_spread 重新抽到同一次自燃。
+        """
+        if self.domain is not None:
+            if not self.domain.quiet_tick():
+                return False
+        else:
+            state = np.random.get_state()
+            tree_mask = self.grid == 1
+            noise = np.random.uniform(0.5, 1.5, size=(self.width, self.height))
+            dryness = self.dryness_grid[tree_mask] + DRYNESS_INCREASE_RATE * noise[tree_mask]
+            draws = np.random.random((self.width, self.height))[tree_mask]
+            if np.any((dryness > IGNITION_DRYNESS_THRESHOLD) & (draws < SPONTANEOUS_FIRE_PROB)):
+                np.random.set_state(state)
+                return False
+            self.dryness_grid[tree_mask] = dryness  # 没有火点，蔓延不抽随机数
+        self.fire_tick += 1
+        self.apply_wind_schedule()
+        return True
 
     # [清单3] 向量化核心
+    def set_wind(self, u, v, name=None):
+        """设置风场：u / v 为标量 (全图一致) 或 (W, H) 数组；名称仅用于日志"""
+        self.wind_u[...] = u
+        self.wind_v[...] = v
+        if np.isscalar(u) and np.isscalar(v):
+            self.wind_direction = (u, v)
+            self.wind_name = name or f"({u}, {v})"
+        else:
+            self.wind_name = name or "field"
+        self.wind_version += 1
+
+    def set_spread_modifier(self, modifier):
+        """设置逐格蔓延系数 (如按燃料类型)，标量或 (W, H) 数组"""
+        self.spread_modifier[...] = modifier
+        self.wind_version += 1
+
+    def schedule_wind_shift(self, tick, direction=None, u=None, v=None):
+        """计划在第 tick 个火势刻开始时转风：direction 为 WIND_DATA 中的名称，或直接给出 u / v"""
+        name = None
+        if direction is not None:
+            directions = dict(self.WIND_DATA)
+            if direction not in directions:
+                raise ValueError(f"Unknown wind direction: {direction!r}")
+            name, (u, v) = direction, directions[direction]
+        self.wind_schedule.append((tick, u, v, name))
+        self.wind_schedule.sort(key=lambda shift: shift[0])
+
+    def apply_wind_schedule(self):
+        """应用所有已到期的风向切换；开启 WIND_SHIFT_TICKS 时按周期随机转风"""
+        shifted = False
+        while self.wind_schedule and self.wind_schedule[0][0] <= self.fire_tick:
+            _, u, v, name = self.wind_schedule.pop(0)
+            self.set_wind(u, v, name)
+            shifted = True
+        if WIND_SHIFT_TICKS and self.fire_tick % WIND_SHIFT_TICKS == 0:
+            name, (u, v) = random.choice(self.WIND_DATA)
+            self.set_wind(u, v, name)
+            shifted = True
+        if shifted:
+            print(f"Wind shift: now blowing {self.wind_name}")
+
+    def spread_table(self):
+        """方向权重表，只在风场或蔓延系数变化后重算"""
+        if self._spread_table is None or self._spread_table[0] != self.wind_version:
+            table = direction_weights(
+                self.wind_u, self.wind_v, self.spread_modifier, self.spread_prob, self.wind_strength
+            )
+            self._spread_table = (self.wind_version, table)
+        return self._spread_table[1]
+
     def update_fire_spread(self):
+        self.fire_tick += 1
+        self.apply_wind_schedule()
+        if self.domain is not None:
+            # 条带 worker 在共享数组上原地推进干燥度、自燃与蔓延
+            ignitions = self.domain.tick()
+            if ignitions:
+                print(f"Spontaneous ignition: {ignitions} cell(s)!")
+            self.version += 1
+            self.label_fire_clusters()
+            return
         self.update_dryness() # 更新干燥度
-        new_grid = self.grid.copy()
-        fire_mask = self.grid == 2
-        self.fuel_grid[fire_mask] -= 1 # 已点燃树木燃料减少1
-        new_grid[fire_mask & (self.fuel_grid <= 0)] = 4 # 已点燃树木燃料减少到0，则标记为已熄灭
-
-        fire_indices = np.argwhere(self.grid == 2) # 已点燃树木索引
-        for fx, fy in fire_indices:
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx == 0 and dy == 0:
-                        continue
-                    nx, ny = fx + dx, fy + dy
-                    if (
-                        0 <= nx < self.width
-                        and 0 <= ny < self.height
-                        and self.grid[nx][ny] == 1
-                    ):
-                        # 计算风向与火焰传播方向的点积
-                        dot_prod = (
-                            dx * self.wind_direction[0] + dy * self.wind_direction[1]
-                        )
-                        factor = 1.0 + (dot_prod * WIND_STRENGTH)
-                        if random.random() < FIRE_SPREAD_PROB * max(0, factor):
-                            new_grid[nx][ny] = 2
-                            self.dryness_grid[nx][ny] = 0
-        self.grid = new_grid
+        fx, fy = np.nonzero(self.grid == 2)
+        # 蔓延候选取自本刻开始时的火点，之后再原地写入燃尽与引燃 (两者互不重叠)
+        dirs, cells = kernels.spread_candidates(self.grid, fx, fy)
+        self.fuel_grid[fx, fy] -= 1 # 已点燃树木燃料减少1
+        out = self.fuel_grid[fx, fy] <= 0
+        bx, by = fx[out], fy[out]
+        self.grid[bx, by] = 4 # 已点燃树木燃料减少到0，则标记为已熄灭
+        self.fire_cleared[bx, by] = True
+
+        # 只为火点邻近的树抽随机数，按 (方向, 目标格) 查逐格概率表 (风场变化时才重算)
+        table = self.spread_table()
+        hit = np.random.random(len(cells)) < table.reshape(len(table), -1)[dirs, cells]
+        ignited = np.unique(cells[hit])
+        self.grid.ravel()[ignited] = 2
+        self.dryness_grid.ravel()[ignited] = 0
+        if self.track_changes:
+            self.log_changes(np.concatenate([bx * self.height + by, ignited]))
+        self.version += 1
+        self.label_fire_clusters()  # 每个火势刻只标记一次
 
     # --- 以下完全保持原始逻辑与格式 ---
     def ignite_random(self):
@@ -110,6 +346,9 @@ class GridMap:
             x, y = trees[idx]
             self.grid[x][y] = 2  # 点燃树木
             self.dryness_grid[x][y] = 0  # 初始干燥度
+            self.version += 1
+            self.log_changes([x * self.height + y])
+            self.label_fire_clusters()
             print(f"Fire started at ({x}, {y})")
             return (x, y)
         return None
@@ -122,18 +361,221 @@ class GridMap:
 
     def set_state(self, x, y, state):
         if 0 <= x < self.width and 0 <= y < self.height:
+            if self.grid[x][y] == 2 and state != 2:
+                self.fire_cleared[x, y] = True
             self.grid[x][y] = state
+            self.version += 1
+            self.log_changes([x * self.height + y])
             if state == 4 or state == 2:
                 self.dryness_grid[x][y] = random.uniform(0, 5)
 
-    def mark_scanned(self, cx, cy, radius, frame_id):
-        """标记最后一次扫描该区域的时间"""
-        x_min, x_max = max(0, cx - radius), min(self.width, cx + radius + 1)
-        y_min, y_max = max(0, cy - radius), min(self.height, cy + radius + 1)
-        self.last_scan_frame[x_min:x_max, y_min:y_max] = frame_id
-    
+    def fire_cells(self):
+        """燃烧格的扁平索引，按网格版本缓存：感知、静默判断、遥测在同一版本内共用一次全图扫描"""
+        if self._fire_cells[0] != self.version:
+            self._fire_cells = (self.version, np.flatnonzero(self.grid == 2))
+        return self._fire_cells[1]
+
+    def cell_counts(self):
+        """各状态的格数 (按状态编码索引)，按网格版本缓存"""
+        if self._cell_counts[0] != self.version:
+            self._cell_counts = (self.version, np.bincount(self.grid.ravel(), minlength=7))
+        return self._cell_counts[1]
+
+    def drain_cleared_fires(self):
+        """
+        取走上次调用以来停止燃烧的格子 (扁平索引)，供感知层增量维护已发现火点。
+        写 fire_cleared 的地方都会递增 version，版本未变时不必扫描
+        """
+        if self._cleared_version == self.version:
+            return np.empty(0, dtype=np.int64)
+        self._cleared_version = self.version
+        cells = np.flatnonzero(self.fire_cleared)
+        if len(cells):
+            self.fire_cleared.ravel()[cells] = False
+        return cells
+
+    def log_changes(self, cells):
+        """
+        记录状态被改写的格子 (扁平索引)；未开启 track_changes 时不记录。
+        取用方长时间不取 (如状态流线程卡住) 导致积压超过整图格数时，丢弃积压并置 changes_overflowed，
+        此时增量已不比全图小，内存占用也因此有界
+        """
+        if self.track_changes:
+            cells = np.asarray(cells, dtype=np.int64).ravel()
+            self._changed_count += len(cells)
+            if self._changed_count > self.grid.size:
+                self._changed, self._changed_count = [], 0
+                self.changes_overflowed = True
+            else:
+                self._changed.append(cells)
+
+    def drain_changed_cells(self):
+        """取走上次调用以来改变过状态的格子 (去重后的扁平索引)，开销只与改变的格数有关"""
+        if not self._changed:
+            return np.empty(0, dtype=np.int64)
+        cells, self._changed = np.unique(np.concatenate(self._changed)), []
+        self._changed_count = 0
+        return cells
+
+    def mark_scanned_windows(self, windows, frame_id):
+        """按各无人机的扫描窗口 [x0, x1) x [y0, y1) 标记扫描时间，开销只与窗口面积有关"""
+        for x0, x1, y0, y1 in windows:
+            self.last_scan_frame[x0:x1, y0:y1] = frame_id
+
     def get_average_urgency(self, cx, cy, radius, frame_id):
         """获取无人机扫描半径内的平均紧迫度"""
         x_min, x_max = max(0, cx - radius), min(self.width, cx + radius + 1) # 计算x坐标范围，具有防越界处理
         y_min, y_max = max(0, cy - radius), min(self.height, cy + radius + 1) # 计算y坐标范围
-        return np.mean(frame_id - self.last_scan_frame[x_min:x_max, y_min:y_max]) # 计算平均紧迫度=该区域（当前帧数-上次扫描帧数）的平均值
\ No newline at end of file
+        return np.mean(frame_id - self.last_scan_frame[x_min:x_max, y_min:y_max]) # 计算平均紧迫度=该区域（当前帧数-上次扫描帧数）的平均值
+
+    def label_fire_clusters(self):
+        """
+        8 连通标记燃烧格，结果写入 fire_labels：只在火点之间的邻接边上迭代 (二分查找相邻火点)，
+        每个火点以自身序号为初值，反复沿边取最小值并做指针跳跃，收敛后同一火团指向团内最小索引。
+        再用 bincount 汇总每个火团的格数、质心和包围盒，写入 fire_clusters。
+        开销只与火点数有关，与火点分布的包围盒大小无关 (除一次取火点)。
+        """
+        self.fire_labels.ravel()[self._labeled] = 0
+        cells = np.flatnonzero(self.grid == 2)
+        self._fire_cells = (self.version, cells)
+        self._labeled = cells
+        self.fire_clusters = []
+        if not len(cells):
+            return self.fire_clusters
+        xs, ys = np.divmod(cells, self.height)
+        k = len(cells)
+        # 每对相邻火点只取一次：向 (0, 1) (1, -1) (1, 0) (1, 1) 四个方向找邻居
+        src, dst = [], []
+        for dx, dy in ((0, 1), (1, -1), (1, 0), (1, 1)):
+            nx, ny = xs + dx, ys + dy
+            inside = np.flatnonzero((nx < self.width) & (ny >= 0) & (ny < self.height))
+            target = nx[inside] * self.height + ny[inside]
+            pos = np.minimum(np.searchsorted(cells, target), k - 1)
+            hit = cells[pos] == target
+            src.append(inside[hit])
+            dst.append(pos[hit])
+        src, dst = np.concatenate(src), np.concatenate(dst)
+        labels = np.arange(k)
+        while True:
+            merged = labels.copy()
+            np.minimum.at(merged, src, labels[dst])
+            np.minimum.at(merged, dst, labels[src])
+            merged = merged[merged]  # 指针跳跃：直接指向“父节点的父节点”
+            if np.array_equal(merged, labels):
+                break
+            labels = merged
+
+        # 火点按全图扁平索引排列，编号按团内最小 (x, y) 排列
+        roots, inverse = np.unique(labels, return_inverse=True)
+        self.fire_labels.ravel()[cells] = inverse + 1
+        n = len(roots)
+        sizes = np.bincount(inverse)
+        cx = np.bincount(inverse, weights=xs) / sizes
+        cy = np.bincount(inverse, weights=ys) / sizes
+        x_min = np.full(n, self.width); np.minimum.at(x_min, inverse, xs)
+        y_min = np.full(n, self.height); np.minimum.at(y_min, inverse, ys)
+        x_max = np.zeros(n, dtype=int); np.maximum.at(x_max, inverse, xs)
+        y_max = np.zeros(n, dtype=int); np.maximum.at(y_max, inverse, ys)
+        members = np.split(cells[np.argsort(inverse, kind="stable")], np.cumsum(sizes)[:-1])
+        for k in range(n):
+            self.fire_clusters.append(FireCluster(
+                k + 1, members[k], int(sizes[k]), (float(cx[k]), float(cy[k])),
+                (int(x_min[k]), int(y_min[k]), int(x_max[k]), int(y_max[k])),
+            ))
+        return self.fire_clusters
+
+    def fire_severity_at(self, x, y):
+        """(x, y) 的 3x3 邻域 (越界部分不计) 内的火点数 / 9 (分母固定为 9，保持特征尺度一致)"""
+        return np.count_nonzero(self.grid[max(0, x - 1):x + 2, max(0, y - 1):y + 2] == 2) / 9.0
+
+    def obstacle_density_at(self, x, y):
+        """(x, y) 的 3x3 邻域 (越界部分不计) 内障碍物占邻域格数的比例"""
+        window = self.grid[max(0, x - 1):x + 2, max(0, y - 1):y + 2]
+        return np.count_nonzero(window == 3) / window.size
+
+    def get_cost_grid(self, has_water=True):
+        """获取 A* 用的扁平代价数组，网格未变化时复用缓存"""
+        cached = self._cost_cache.get(has_water)
+        if cached is None or cached[0] != self.version:
+            cost = memoryview(build_cost_grid(self.grid, has_water))
+            cached = (self.version, cost)
+            self._cost_cache[has_water] = cached
+        return cached[1]
+
+    def fire_windows(self, xs, ys):
+        """
+        以 (xs, ys) 为中心的 3x3 窗口：返回按 dx、dy 顺序排列的坐标 cx, cy 与火点掩码 on_fire，形状均为 (K, 9)；
+        越界格视为非火点，开销只与窗口数有关
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        cx = xs[:, None] + _WINDOW_OFFSETS[None, :, 0]
+        cy = ys[:, None] + _WINDOW_OFFSETS[None, :, 1]
+        inside = (cx >= 0) & (cx < self.width) & (cy >= 0) & (cy < self.height)
+        on_fire = np.zeros(cx.shape, dtype=bool)
+        on_fire[inside] = self.grid[cx[inside], cy[inside]] == 2
+        return cx, cy, on_fire
+
+    def queue_extinguish(self, xs, ys, budget=None, scored=False, on_resolved=None):
+        """
+        登记一批 3x3 灭火意图 (中心坐标 xs, ys)，在 resolve_actions 中统一结算。
+        budget: 每个意图最多熄灭的格数 (水量)，None 表示不限
+        scored: 是否计入 GA 的火场强度奖励
+        on_resolved: 结算后回调，参数为每个意图实际用掉的水量数组
+        """
+        xs = np.atleast_1d(np.asarray(xs, dtype=np.int64))
+        ys = np.atleast_1d(np.asarray(ys, dtype=np.int64))
+        if budget is None:
+            budget = np.full(len(xs), np.iinfo(np.int64).max)
+        budget = np.broadcast_to(np.asarray(budget, dtype=np.int64), xs.shape)
+        self.pending_actions.append((xs, ys, budget, scored, on_resolved))
+
+    def resolve_actions(self, current_genome=None):
+        """
+        统一结算本帧所有灭火意图：
+        - 所有意图都基于动作前的网格快照判断火点，结果与 Agent 的更新顺序无关
+        - 多个意图覆盖同一火点时只由第一个 (按登记顺序、窗口内 dx、dy 顺序) 认领并扣水，
+          每个意图最多认领 budget 个火点
+        - 严重度奖励在快照上按认领格的 3x3 火点数计算，同一格只计一次
+        - 最后一次性写回网格；开销只与意图数有关
+        """
+        if not self.pending_actions:
+            return 0
+        batches, self.pending_actions = self.pending_actions, []
+        xs = np.concatenate([b[0] for b in batches])
+        ys = np.concatenate([b[1] for b in batches])
+        budget = np.concatenate([b[2] for b in batches])
+        scored = np.concatenate([np.full(len(b[0]), b[3]) for b in batches])
+
+        # 动作前快照上各意图 3x3 窗口的火点，按 (意图, dx, dy) 顺序逐个认领
+        cx, cy, on_fire = self.fire_windows(xs, ys)
+        flat = cx * self.height + cy
+        claimed = np.zeros(on_fire.shape, dtype=bool)
+        left = budget.copy()
+        taken = set()
+        for i, j in zip(*np.nonzero(on_fire)):
+            cell = flat[i, j]
+            if left[i] > 0 and cell not in taken:
+                taken.add(cell)
+                claimed[i, j] = True
+                left[i] -= 1
+        used = claimed.sum(axis=1)
+
+        cells = flat[claimed]
+        if len(cells):
+            if current_genome:
+                # 火场强度：每个被扑灭格子在快照上的 3x3 火点数 (认领已去重，同一格只计一次)
+                mine = flat[claimed & scored[:, None]]
+                sx, sy = np.divmod(mine, self.height)
+                current_genome.severity_bonus += int(self.fire_windows(sx, sy)[2].sum())
+            np.put(self.grid, cells, 6)  # 一次性写回
+            self.fire_cleared.ravel()[cells] = True
+            self.version += 1
+            self.log_changes(cells)
+
+        # 按批次把实际用水量交还给发起者
+        bounds = np.cumsum([len(b[0]) for b in batches])[:-1]
+        for batch, part in zip(batches, np.split(used, bounds)):
+            if batch[4]:
+                batch[4](part)
+        return len(cells)
@@ -0,0 +1,285 @@
+# core/kernels.py
+"""
+网格内核：火势蔓延候选、扁平代价数组上的 A*、窗口火点扫描。
+每个内核都有两份实现：
+- 逐格循环版：安装了 numba 时用 njit 编译，同时也是校验用的参考实现
+- NumPy 版：整块数组运算，未安装 numba 时自动使用
+后端由 configs.settings.KERNEL_BACKEND ("auto" / "numba" / "numpy") 或 set_backend() 选择。
+numba 导入较慢 (数百毫秒)，因此推迟到第一次调用内核 (或显式 set_backend) 时才导入，
+无头导入 core 模块不为它付出启动开销；KERNEL_BACKEND="numpy" 时从不导入。
+"""
+import numpy as np
+
+from configs.settings import KERNEL_BACKEND
+
+# 8 邻域方向，顺序与原蔓延循环一致 (dx 外层、dy 内层)
+NEIGHBOR_OFFSETS = np.array(
+    [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)],
+    dtype=np.int64,
+)
+
+
+# --- 逐格循环实现 (numba 源码 / 参考实现) ---
+
+def _spread_candidates_loops(grid, xs, ys, offsets):
+    w, h = grid.shape
+    n = xs.shape[0]
+    dirs = np.empty(offsets.shape[0] * n, dtype=np.int64)
+    cells = np.empty(offsets.shape[0] * n, dtype=np.int64)
+    m = 0
+    for k in range(offsets.shape[0]):
+        for i in range(n):
+            nx, ny = xs[i] + offsets[k, 0], ys[i] + offsets[k, 1]
+            if 0 <= nx < w and 0 <= ny < h and grid[nx, ny] == 1:
+                dirs[m] = k
+                cells[m] = nx * h + ny
+                m += 1
+    return dirs[:m], cells[:m]
+
+
+def _window_fire_loops(grid, cx, cy, r):
+    w, h = grid.shape
+    out = np.zeros((2 * r + 1, 2 * r + 1), dtype=np.bool_)
+    for x in range(max(0, cx - r), min(w, cx + r + 1)):
+        for y in range(max(0, cy - r), min(h, cy + r + 1)):
+            if grid[x, y] == 2:
+                out[x - cx + r, y - cy + r] = True
+    return out
+
+
+def _astar_loops(cost, width, height, start_idx, end_idx, g, parent, g_stamp, closed, heap_f, heap_idx, gen):
+    """
+    与 GridAStar.search 相同的搜索顺序，返回路径的扁平索引数组。
+    堆用 heap_f / heap_idx 两个数组手写，上浮 / 下沉照搬 heapq 且只比较 f，
+    因此 f 相同时的出堆顺序与 heapq + Node (只比较 f) 完全一致。
+    """
+    ex, ey = end_idx // height, end_idx % height
+    g[start_idx] = 0
+    g_stamp[start_idx] = gen
+    parent[start_idx] = -1
+    heap_f[0] = 0
+    heap_idx[0] = start_idx
+    n = 1
+    while n > 0:
+        # heappop：末尾元素放到根，先把较小的孩子一路上提到叶子，再上浮
+        idx = heap_idx[0]
+        n -= 1
+        if n > 0:
+            last_f, last_idx = heap_f[n], heap_idx[n]
+            pos = 0
+            child = 1
+            while child < n:
+                if child + 1 < n and not heap_f[child] < heap_f[child + 1]:
+                    child += 1
+                heap_f[pos] = heap_f[child]
+                heap_idx[pos] = heap_idx[child]
+                pos = child
+                child = 2 * pos + 1
+            while pos > 0:
+                up = (pos - 1) >> 1
+                if not last_f < heap_f[up]:
+                    break
+                heap_f[pos] = heap_f[up]
+                heap_idx[pos] = heap_idx[up]
+                pos = up
+            heap_f[pos] = last_f
+            heap_idx[pos] = last_idx
+        if closed[idx] == gen:
+            continue
+        closed[idx] = gen
+        if idx == end_idx:
+            m = 0
+            i = idx
+            while i != -1:
+                m += 1
+                i = parent[i]
+            path = np.empty(m, dtype=np.int64)
+            i = idx
+            for k in range(m - 1, -1, -1):
+                path[k] = i
+                i = parent[i]
+            return path
+        x, y = idx // height, idx % height
+        # 邻居顺序：上、下、左、右
+        for k in range(4):
+            if k == 0:
+                if y == 0:
+                    continue
+                nidx, nx, ny = idx - 1, x, y - 1
+            elif k == 1:
+                if y == height - 1:
+                    continue
+                nidx, nx, ny = idx + 1, x, y + 1
+            elif k == 2:
+                if x == 0:
+                    continue
+                nidx, nx, ny = idx - height, x - 1, y
+            else:
+                if x == width - 1:
+                    continue
+                nidx, nx, ny = idx + height, x + 1, y
+            step = cost[nidx]
+            if step < 0:
+                continue
+            new_g = g[idx] + step
+            if g_stamp[nidx] != gen or new_g < g[nidx]:
+                g[nidx] = new_g
+                g_stamp[nidx] = gen
+                parent[nidx] = idx
+                # heappush：放到末尾后上浮
+                f = new_g + abs(nx - ex) + abs(ny - ey)
+                pos = n
+                while pos > 0:
+                    up = (pos - 1) >> 1
+                    if not f < heap_f[up]:
+                        break
+                    heap_f[pos] = heap_f[up]
+                    heap_idx[pos] = heap_idx[up]
+                    pos = up
+                heap_f[pos] = f
+                heap_idx[pos] = nidx
+                n += 1
+    return np.empty(0, dtype=np.int64)
+
+
+# --- NumPy 实现 ---
+
+def _spread_candidates_numpy(grid, xs, ys, offsets):
+    w, h = grid.shape
+    nx = xs[None, :] + offsets[:, 0:1]
+    ny = ys[None, :] + offsets[:, 1:2]
+    dirs = np.broadcast_to(np.arange(len(offsets))[:, None], nx.shape)
+    inside = (nx >= 0) & (nx < w) & (ny >= 0) & (ny < h)  # 按行优先取出，顺序为方向在外、火点在内
+    nx, ny, dirs = nx[inside], ny[inside], dirs[inside]
+    tree = grid[nx, ny] == 1
+    return dirs[tree], nx[tree] * h + ny[tree]
+
+
+def _window_fire_numpy(grid, cx, cy, r):
+    w, h = grid.shape
+    out = np.zeros((2 * r + 1, 2 * r + 1), dtype=bool)
+    x0, x1 = max(0, cx - r), min(w, cx + r + 1)
+    y0, y1 = max(0, cy - r), min(h, cy + r + 1)
+    if x0 < x1 and y0 < y1:
+        out[x0 - cx + r:x1 - cx + r, y0 - cy + r:y1 - cy + r] = grid[x0:x1, y0:y1] == 2
+    return out
+
+
+REFERENCE = {
+    "spread_candidates": _spread_candidates_loops,
+    "window_fire": _window_fire_loops,
+    "astar": _astar_loops,
+}
+NUMPY = {
+    "spread_candidates": _spread_candidates_numpy,
+    "window_fire": _window_fire_numpy,
+}
+NUMBA = None  # numba 编译版内核 {名称: 函数}，由 numba_kernels() 按需构建
+_numba_checked = False
+
+_BACKENDS = ("auto", "numba", "numpy")
+backend = None  # 当前后端名："numba" 或 "numpy"；None 表示尚未解析 (第一次调用内核时解析)
+_impl = None
+if KERNEL_BACKEND not in _BACKENDS:  # 配置错误在导入时就报出
+    raise ValueError(f"Unknown kernel backend: {KERNEL_BACKEND!r}")
+
+
+def numba_kernels():
+    """导入 numba 并包装逐格循环实现 (只尝试一次)；未安装时返回 None"""
+    global NUMBA, _numba_checked
+    if not _numba_checked:
+        _numba_checked = True
+        try:
+            import numba
+        except ImportError:  # numba 是可选依赖
+            return None
+        NUMBA = {name: numba.njit(cache=True)(fn) for name, fn in REFERENCE.items()}
+    return NUMBA
+
+
+def set_backend(name="auto"):
+    """选择内核后端；要求 numba 但未安装时打印提示并回退到 NumPy"""
+    global backend, _impl
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {name!r}")
+    compiled = numba_kernels() if name != "numpy" else None
+    if name == "numba" and compiled is None:
+        print("[Kernels] numba is not installed, falling back to NumPy kernels")
+    if compiled is not None:
+        backend, _impl = "numba", compiled
+    else:
+        backend, _impl = "numpy", NUMPY
+    return backend
+
+
+def _active():
+    """当前后端的内核表；第一次调用时按 KERNEL_BACKEND 解析"""
+    if _impl is None:
+        set_backend(KERNEL_BACKEND)
+    return _impl
+
+
+def use_numba():
+    _active()
+    return backend == "numba"
+
+
+# --- 对外接口 ---
+
+def spread_candidates(grid, xs, ys):
+    """
+    一刻火势蔓延的候选：火点 (xs, ys) 8 邻域内的树木，开销只与火点数有关。
+    返回 (dirs, cells)：方向编号 (NEIGHBOR_OFFSETS 顺序) 与目标格扁平索引，按方向在外、火点在内排列；
+    被多个火点包围的树出现多次，每个 (方向, 目标格) 各判定一次引燃
+    """
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    return _active()["spread_candidates"](grid, xs, ys, NEIGHBOR_OFFSETS)
+
+
+def window_fire(grid, cx, cy, r):
+    """以 (cx, cy) 为中心、半径 r 的方窗火点掩码，形状 (2r+1, 2r+1)，越界部分为 False"""
+    return _active()["window_fire"](grid, int(cx), int(cy), int(r))
+
+
+class AStarBuffers:
+    """numba A* 的工作数组，跨调用复用 (同 GridAStar 的代数计数器技巧)"""
+
+    def __init__(self):
+        self.size = 0
+        self.generation = 0
+
+    def prepare(self, size):
+        if size > self.size:
+            self.size = size
+            self.g = np.zeros(size, dtype=np.int64)
+            self.parent = np.full(size, -1, dtype=np.int64)
+            self.g_stamp = np.zeros(size, dtype=np.int64)
+            self.closed = np.zeros(size, dtype=np.int64)
+            # 每格至多关闭一次、每次至多入堆 4 个邻居，堆容量 4 * size + 1 足够
+            self.heap_f = np.zeros(4 * size + 1, dtype=np.int64)
+            self.heap_idx = np.zeros(4 * size + 1, dtype=np.int64)
+            self.generation = 0
+        self.generation += 1
+        return self.generation
+
+
+_ASTAR = AStarBuffers()
+
+
+def astar_path(cost, width, height, start, end):
+    """编译版 A*：返回坐标列表或 None，与 GridAStar.search 结果一致 (需要 numba 后端)"""
+    ex, ey = end
+    cost = np.asarray(cost)
+    if not (0 <= ex < width and 0 <= ey < height) or cost[ex * height + ey] < 0:
+        return None
+    buf = _ASTAR
+    gen = buf.prepare(width * height)
+    compiled = numba_kernels()
+    impl = compiled["astar"] if compiled is not None else _astar_loops
+    path = impl(cost, width, height, start[0] * height + start[1], ex * height + ey,
+                buf.g, buf.parent, buf.g_stamp, buf.closed, buf.heap_f, buf.heap_idx, gen)
+    if not len(path):
+        return None
+    return [divmod(int(i), height) for i in path]
+
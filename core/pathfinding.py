@@ -1,6 +1,7 @@
 import heapq
+import numpy as np
+from core import kernels
 
-# Node 类保持不变
 class Node:
     def __init__(self, parent=None, position=None):
         self.parent = parent
@@ -85,4 +86,152 @@ def astar(grid_map, start, end, has_water=True):
                 new_node.f = new_node.g + new_node.h
                 heapq.heappush(open_list, new_node)
 
-    return None
\ No newline at end of file
+    return None
+
+
+def build_cost_grid(grid, has_water=True):
+    """由状态网格构建扁平代价数组：墙为 -1，火为 1/50，其余为 1"""
+    cost = np.ones(grid.size, dtype=np.int64)
+    flat = grid.ravel()
+    cost[flat == 2] = 1 if has_water else 50
+    cost[flat == 3] = -1
+    return cost
+
+
+class _HeapIdx(int):
+    """
+    堆条目 (f, idx) 中的单元格索引：相等比较恒为真，元组因此只按 f 比较。
+    与 Node.__lt__ 一样 f 相同即视为相等，heapq 的上浮 / 下沉走完全相同的分支，出堆顺序与 astar 一致
+    (heapq 不是稳定排序，换成 (f, 插入计数) 也复现不了它的决胜顺序)。
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return True
+
+    __hash__ = int.__hash__
+
+
+class GridAStar:
+    """
+    扁平数组 A* 引擎：
+    - 单元格用整数索引 idx = x * height + y 表示
+    - g 值 / 父节点 / closed 标记存放在预分配的 NumPy 数组中，跨调用复用
+    - 用代数计数器 (generation) 代替每次清空数组
+    - 堆中只存 (f, idx) 元组，idx 只参与携带不参与比较 (见 _HeapIdx)，路径与 astar 完全相同
+    """
+
+    def __init__(self):
+        self.capacity = 0
+        self.generation = 0
+        self._allocate(0)
+
+    def _allocate(self, size):
+        self.capacity = size
+        self.g = np.zeros(size, dtype=np.int64)
+        self.parent = np.full(size, -1, dtype=np.int64)
+        self.g_stamp = np.zeros(size, dtype=np.int64)  # g 值有效的代数
+        self.closed = np.zeros(size, dtype=np.int64)  # 已关闭的代数
+        self.keys = list(map(_HeapIdx, range(size)))  # 预先建好的堆条目索引，避免每次入堆构造
+        # memoryview 索引直接返回 Python int，避免 NumPy 标量开销
+        self._g = memoryview(self.g)
+        self._parent = memoryview(self.parent)
+        self._g_stamp = memoryview(self.g_stamp)
+        self._closed = memoryview(self.closed)
+        self.generation = 0
+
+    def search(self, cost, width, height, start, end):
+        """在扁平代价数组上搜索 start -> end，返回坐标列表或 None"""
+        size = width * height
+        if size > self.capacity:
+            self._allocate(size)
+        self.generation += 1
+        gen = self.generation
+
+        ex, ey = end
+        if not (0 <= ex < width and 0 <= ey < height) or cost[ex * height + ey] < 0:
+            return None
+
+        g, parent, g_stamp, closed = self._g, self._parent, self._g_stamp, self._closed
+        start_idx = start[0] * height + start[1]
+        end_idx = ex * height + ey
+        g[start_idx] = 0
+        g_stamp[start_idx] = gen
+        parent[start_idx] = -1
+
+        keys = self.keys
+        open_list = [(0, keys[start_idx])]
+        heappush, heappop = heapq.heappush, heapq.heappop
+        max_x, max_y = width - 1, height - 1
+
+        while open_list:
+            idx = int(heappop(open_list)[1])
+            # 延迟删除：同一单元格的过时条目直接跳过
+            if closed[idx] == gen:
+                continue
+            closed[idx] = gen
+
+            if idx == end_idx:
+                path = []
+                while idx != -1:
+                    path.append(divmod(idx, height))
+                    idx = parent[idx]
+                return path[::-1]
+
+            x, y = divmod(idx, height)
+            base_g = g[idx]
+            # 邻居顺序与 astar 一致：上、下、左、右
+            if y > 0:
+                nidx = idx - 1
+                step = cost[nidx]
+                if step >= 0:
+                    new_g = base_g + step
+                    if g_stamp[nidx] != gen or new_g < g[nidx]:
+                        g[nidx], g_stamp[nidx], parent[nidx] = new_g, gen, idx
+                        heappush(open_list, (new_g + abs(x - ex) + abs(y - 1 - ey), keys[nidx]))
+            if y < max_y:
+                nidx = idx + 1
+                step = cost[nidx]
+                if step >= 0:
+                    new_g = base_g + step
+                    if g_stamp[nidx] != gen or new_g < g[nidx]:
+                        g[nidx], g_stamp[nidx], parent[nidx] = new_g, gen, idx
+                        heappush(open_list, (new_g + abs(x - ex) + abs(y + 1 - ey), keys[nidx]))
+            if x > 0:
+                nidx = idx - height
+                step = cost[nidx]
+                if step >= 0:
+                    new_g = base_g + step
+                    if g_stamp[nidx] != gen or new_g < g[nidx]:
+                        g[nidx], g_stamp[nidx], parent[nidx] = new_g, gen, idx
+                        heappush(open_list, (new_g + abs(x - 1 - ex) + abs(y - ey), keys[nidx]))
+            if x < max_x:
+                nidx = idx + height
+                step = cost[nidx]
+                if step >= 0:
+                    new_g = base_g + step
+                    if g_stamp[nidx] != gen or new_g < g[nidx]:
+                        g[nidx], g_stamp[nidx], parent[nidx] = new_g, gen, idx
+                        heappush(open_list, (new_g + abs(x + 1 - ex) + abs(y - ey), keys[nidx]))
+
+        return None
+
+
+_ENGINE = GridAStar()
+
+
+def astar_fast(grid_map, start, end, has_water=True):
+    """
+    astar 的扁平数组版本，返回相同路径 (堆只按 f 比较，决胜顺序与 astar 相同)；
+    代价数组由 GridMap 按网格版本缓存
+    """
+    cost = grid_map.get_cost_grid(has_water)
+    if kernels.use_numba():
+        return kernels.astar_path(
+            cost, grid_map.width, grid_map.height,
+            (int(start[0]), int(start[1])), (int(end[0]), int(end[1])),
+        )
+    return _ENGINE.search(
+        cost, grid_map.width, grid_map.height,
+        (int(start[0]), int(start[1])), (int(end[0]), int(end[1])),
+    )
@@ -3,7 +3,7 @@ import math
 
 
 class EfficiencyPredictor:
-    def __init__(self, learning_rate=0.1):
+    def __init__(self, learning_rate=0.1, buffer_size=512, batch_size=32):
         self.lr = learning_rate
         self.base_lr = learning_rate
         self.weights = np.array([
@@ -18,29 +18,73 @@ class EfficiencyPredictor:
 
         self.training_count = 0
 
+        # 经验回放缓冲区：预分配环形数组，最后一列恒为 1.0 (偏置项)
+        self.batch_size = batch_size
+        self.buffer_x = np.ones((buffer_size, len(self.weights)))
+        self.buffer_y = np.zeros(buffer_size)
+        self.buffer_pos = 0  # 下一个写入位置
+        self.buffer_count = 0  # 已填充的样本数
+        self.pending = 0  # 上次更新后新入队的样本数
+
     def sigmoid(self, x):
         return 1 / (1 + np.exp(-np.clip(x, -20, 20)))
 
     def predict_prob(self, features):
-        x = np.append(features, 1.0)
-        return self.sigmoid(np.dot(self.weights, x))
+        return self.sigmoid(np.dot(self.weights[:-1], features) + self.weights[-1])
 
-    def train(self, features, label):
-        x = np.append(features, 1.0)
-        pred = self.sigmoid(np.dot(self.weights, x))
+    def enqueue(self, features, label):
+        """记录一次任务结果 (features, label)，训练推迟到 update() 批量进行"""
+        size = len(self.buffer_y)
+        self.buffer_x[self.buffer_pos, :-1] = features
+        self.buffer_y[self.buffer_pos] = label
+        self.buffer_pos = (self.buffer_pos + 1) % size
+        self.buffer_count = min(self.buffer_count + 1, size)
+        self.pending = min(self.pending + 1, size)
+
+    def update(self):
+        """
+        小批量更新：本轮新样本 + 从缓冲区随机回放的旧样本组成一个批次，
+        做一次向量化梯度下降。没有新样本时直接返回。
+        """
+        if self.pending == 0:
+            return False
+        size = len(self.buffer_y)
+        n_new = min(self.pending, self.batch_size)
+        # 最新入队的样本一定参与本次更新
+        idx = (self.buffer_pos - 1 - np.arange(n_new)) % size
+        n_replay = min(self.batch_size, self.buffer_count) - n_new
+        if n_replay > 0:
+            replay = (self.buffer_pos - 1 - np.random.randint(
+                n_new, self.buffer_count, size=n_replay)) % size
+            idx = np.concatenate([idx, replay])
+
+        x = self.buffer_x[idx]
+        y = self.buffer_y[idx]
+        pred = self.sigmoid(x @ self.weights)
 
-        # 学习率衰减
+        # 学习率衰减 (按样本数推进，与逐样本训练的衰减节奏一致)
         current_lr = max(0.01, self.base_lr * (0.9995 ** self.training_count))
 
-        error = pred - label
-        self.weights -= current_lr * error * x
+        # 批次平均梯度乘以新样本数：每个新样本贡献一次逐样本更新的步长，回放样本只用来平滑方向
+        # (只取平均梯度时步长与单样本相同，学习速度约慢 batch 倍)
+        error = pred - y
+        self.weights -= current_lr * n_new * (x.T @ error) / len(idx)
+        self.apply_constraints()
+
+        self.training_count += self.pending
+        self.pending = 0
+        return True
+
+    def train(self, features, label):
+        """单样本立即训练 (入队后马上更新)"""
+        self.enqueue(features, label)
+        self.update()
 
+    def apply_constraints(self):
         # 权重限制
-        self.weights = np.clip(self.weights, -10.0, 10.0)
+        np.clip(self.weights, -10.0, 10.0, out=self.weights)
         self.weights[0] = max(0.4, self.weights[0]) # W_Prox 至少为正
         self.weights[1] = max(0.1, self.weights[1]) # W_Sev 至少为正
         self.weights[2] = max(0.3, self.weights[2]) # W_Bat
         self.weights[3] = max(0.3, self.weights[3]) # W_Wat
         self.weights[5] = min(-0.2, self.weights[5]) # 强制风向权重至少是 -0.2
-        self.training_count += 1
-        print(f"[Learn] Label:{label} Pred:{pred:.2f} -> NewWeights:{np.round(self.weights, 3)}")
\ No newline at end of file
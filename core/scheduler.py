@@ -0,0 +1,37 @@
+# core/scheduler.py
+
+
+class Scheduler:
+    """
+    周期任务调度表：记录每个周期系统的下一次到期帧。
+    due(name, frame) 取代 frame % period == 0；快进时用 skip_before 一次跳过中间的到期。
+    """
+
+    def __init__(self):
+        self.period = {}
+        self.next_due = {}
+
+    def every(self, name, period, first=None):
+        """登记周期任务，默认第一次在第 period 帧到期 (与 frame % period == 0 一致)"""
+        self.period[name] = period
+        self.next_due[name] = period if first is None else first
+
+    def due(self, name, frame):
+        """frame 帧是否到期；到期则排入下一周期"""
+        if frame < self.next_due[name]:
+            return False
+        self.next_due[name] += self.period[name]
+        return True
+
+    def occurrence(self, name, k):
+        """第 k 次 (从 1 开始) 即将到期的帧号"""
+        return self.next_due[name] + (k - 1) * self.period[name]
+
+    def skip_before(self, name, frame):
+        """跳过 frame 之前 (不含) 的全部到期，返回跳过的次数"""
+        due, period = self.next_due[name], self.period[name]
+        if due >= frame:
+            return 0
+        count = (frame - 1 - due) // period + 1
+        self.next_due[name] = due + count * period
+        return count
@@ -0,0 +1,608 @@
+# core/simulation.py
+import queue
+import threading
+import time
+import numpy as np
+
+from configs.settings import *
+from core.grid_map import GridMap
+from core.predictor import EfficiencyPredictor
+from core.genetic_optimizer import GeneticOptimizer
+from core.scheduler import Scheduler
+from agents.robot import RobotFleet, SupportBot
+from agents.drone import Drone, scan_windows
+
+
+def log_system_status(frame, env, robots, predictor, ga, penalty):
+    w = predictor.weights
+    genome = ga.get_current_genome()
+    idle_stat = getattr(genome, "idle_frames", 0)
+
+    print(f"\n" + "=" * 50)
+    print(f" FRAME: {frame} | GEN: {ga.generation} | INDIVIDUAL: {ga.current_idx + 1}")
+    print("-" * 50)
+
+    # 1. 环境状态
+    counts = env.cell_counts()
+    active_fires, extinguished = counts[2], counts[6]
+    print(f"[ENV] Active Fires: {active_fires} | Total Extinguished: {extinguished}")
+
+    # 2. 机器人实时状态
+    # 监控 Stranded 是为了检查是否有机器人因为贪婪抢单而死在半路
+    stranded_count = sum(1 for r in robots if r.status == "STRANDED")
+    idle_current = sum(1 for r in robots if r.status == "IDLE")
+    print(
+        f"[BOT] Idle: {idle_current} | Stranded: {stranded_count} | Moving: {len(robots)-idle_current-stranded_count}"
+    )
+
+    # 3. 遗传算法参数 (核心监控区)
+    # Radius: 决定了避嫌范围 (越小越激进)
+    # IdleSum: 决定了闲置惩罚力度 (如果你发现 Radius 很小但 IdleSum 很大，说明地图太大了或者火太少了)
+    print(
+        f"[GA ] Radius: {genome.radius} | Penalty: {penalty:.1f} | IdleSum (累计闲置): {idle_stat}"
+    )
+
+    # 4. 机器学习权重 (ML监控)
+    # 检查 Bat/Wat 是否死守 0.3 底线，检查 Sev 是否过低
+    print(f"[ML ] Weights Snapshot:")
+    print(f"      Prox: {w[0]:.3f} | Sev: {w[1]:.3f} | Wind: {w[5]:.3f}")
+    print(f"      Bat : {w[2]:.3f} | Wat: {w[3]:.3f} | Obs : {w[4]:.3f}")
+
+    # 警告提示
+    if w[2] <= 0.31 or w[3] <= 0.31:
+        print("      ⚠️  WARNING: Resource weights near floor (Risk of Stranding)")
+
+    print("=" * 50 + "\n")
+
+
+class SimSnapshot:
+    """
+    某一帧的只读快照：网格副本 + 智能体位置数组 + 侧边栏信息。
+    由仿真线程构建，渲染线程只读不写。
+    """
+
+    def __init__(self, sim, warp_label="1x"):
+        env = sim.env
+        self.frame = sim.frame
+        self.warp_label = warp_label
+        self.generation = sim.ga.generation
+        self.individual = sim.ga.current_idx
+        # 网格未变 (同一版本) 时沿用上一份只读副本，火势刻之间不必每帧复制整图
+        cached = sim._snapshot_grid
+        if cached is None or cached[0] != env.version:
+            grid = env.grid.copy()
+            grid.setflags(write=False)
+            cached = sim._snapshot_grid = (env.version, grid)
+        self.grid = cached[1]
+        self.width, self.height = env.width, env.height
+
+        robots = sim.robots
+        self.robot_x = np.array([r.x for r in robots], dtype=int)
+        self.robot_y = np.array([r.y for r in robots], dtype=int)
+        self.robot_status = tuple(r.status for r in robots)
+        self.robot_battery = np.array([r.battery for r in robots], dtype=float)
+        self.robot_water = np.array([r.water for r in robots], dtype=float)
+        self.max_battery, self.max_water = sim.fleet.max_battery, sim.fleet.max_water
+        self.robot_paths = tuple(
+            tuple(r.current_path) if (r.current_path and r.target) else ()
+            for r in robots
+        )
+        self.drone_x = np.array([d.x for d in sim.drones], dtype=int)
+        self.drone_y = np.array([d.y for d in sim.drones], dtype=int)
+        self.drone_radius = np.array([d.scan_radius for d in sim.drones], dtype=int)
+        self.supporter = (sim.supporter.x, sim.supporter.y)
+        for arr in (self.robot_x, self.robot_y, self.robot_battery, self.robot_water,
+                    self.drone_x, self.drone_y, self.drone_radius):
+            arr.setflags(write=False)
+
+        self.extinguished = int(env.cell_counts()[6])
+        self.discovered_count = sim.discovered_count
+        self.penalty = sim.current_penalty
+        self.weights = tuple(float(w) for w in sim.predictor.weights)
+        self.logs = tuple(sim.logs[-10:])
+
+
+class SnapshotBuffer:
+    """
+    双缓冲快照：仿真线程在后台构建新快照 (back)，构建完成后在锁内与前台 (front) 交换；
+    渲染线程随时读取最新的前台快照，不会看到半成品。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._front = None
+        self._back = None
+        self.version = 0
+
+    def publish(self, snapshot):
+        self._back = snapshot
+        with self._lock:
+            self._front, self._back = self._back, self._front
+            self.version += 1
+
+    def latest(self):
+        with self._lock:
+            return self._front
+
+
+class Simulation:
+    """一局仿真的全部状态与单帧推进逻辑 (不含任何绘制)"""
+
+    def __init__(self, chart_callback=None, telemetry=None, settings=None,
+                 spread_workers=SPREAD_WORKERS, terrain=None):
+        # 按局注入的参数 (默认取 configs.settings)，参数扫描时由 worker 传入覆盖值
+        self.settings = cfg = resolve_settings(settings)
+        # terrain：地形目录 / .npy 路径或 core.terrain.Terrain，按内存映射加载而不是随机生成
+        if isinstance(terrain, str):
+            from core.terrain import load_terrain
+            terrain = load_terrain(terrain)
+        self.env = GridMap(
+            density=cfg["TREE_DENSITY"],
+            spread_prob=cfg["FIRE_SPREAD_PROB"],
+            wind_strength=cfg["WIND_STRENGTH"],
+            patch_scale=cfg["FOREST_PATCH_SCALE"],
+            terrain=terrain,
+        )
+
+        # 超大地图：火势推进交给共享内存中的条带 worker
+        self.domain = None
+        if spread_workers > 0:
+            from core.domain import FireDomain
+            self.domain = FireDomain(self.env, spread_workers, seed=int(np.random.randint(2**31)))
+
+        # 初始点火
+        for _ in range(3):
+            self.env.ignite_random()
+
+        # 已发现且仍在燃烧的火点 (布尔地图)，只随新发现和 GridMap 报告的熄灭 / 燃尽事件增量更新
+        self.discovered = np.zeros((self.env.width, self.env.height), dtype=bool)
+        self.discovered_count = 0
+        self._snapshot_grid = None  # SimSnapshot 共用的只读网格副本 (version, grid)
+
+        # 初始化 AI 模块
+        self.predictor = EfficiencyPredictor(ML_LEARNING_RATE)
+        self.ga = GeneticOptimizer(pop_size=4)
+        self.current_penalty = self.ga.get_current_genome().penalty
+        self.last_extinguished_total = 0  # 用于计算本周期内的灭火增量
+
+        # 初始化 Agents
+        env = self.env
+        self.fleet = RobotFleet(
+            max_battery=cfg["ROBOT_MAX_BATTERY"],
+            max_water=cfg["ROBOT_MAX_WATER"],
+            water_reserve=cfg["ROBOT_WATER_RESERVE"],
+            low_battery=cfg["ROBOT_LOW_BATTERY_THRESHOLD"],
+            idle_return=cfg["ROBOT_IDLE_RETURN_THRESHOLD"],
+        )
+        depots = env.depots
+        self.robots = [
+            self.fleet.add(i, *depots[i % len(depots)])
+            for i in range(cfg["N_ROBOTS"])
+        ]
+        self.supporter = SupportBot(99, depots[0][0], depots[0][1])
+        self.drones = [
+            Drone(201, min(10, env.width - 1), min(10, env.height - 1)),
+            Drone(202, min(30, env.width - 1), min(20, env.height - 1)),
+        ]
+
+        self.frame, self.logs = 0, []
+        # 周期系统的下一次到期帧 (取代 frame % N == 0)
+        self.schedule = Scheduler()
+        self.schedule.every("fire", FIRE_TICK_INTERVAL)
+        self.schedule.every("dispatch", DISPATCH_INTERVAL)
+        self.schedule.every("ga", cfg["GA_EVOLVE_INTERVAL"])
+        self.skipped_frames = 0  # 静默期快进跳过的帧数
+        self.weight_history = []  # 用于存储历史权重数据
+        self.chart_callback = chart_callback  # 每代结束时保存权重图 (可选)
+        self.telemetry = telemetry  # 列式遥测写入器 (可选)
+
+    def handle_command(self, command):
+        """执行来自输入线程的命令，如 ("ignite_random",)"""
+        name = command[0]
+        if name == "ignite_random":
+            self.env.ignite_random()
+
+    def step(self):
+        """推进一帧：火势、无人机感知、任务调度、Agent 更新、GA 结算"""
+        self.frame += 1
+        frame, env = self.frame, self.env
+        current_genome = self.ga.get_current_genome()
+        if not hasattr(current_genome, "idle_frames"):
+            current_genome.idle_frames = 0
+
+        # --- 环境更新 ---
+        if self.schedule.due("fire", frame):
+            env.update_fire_spread()
+
+        # --- 无人机感知 ---
+        for drone in self.drones:
+            drone.step(env, frame)
+        self.sense(frame)
+
+        # --- [核心逻辑] 任务调度 (Dispatcher) ---
+        if self.schedule.due("dispatch", frame):
+            self.dispatch(current_genome)
+
+        # --- 执行 Agent 更新 ---
+        self.fleet.step(env, self.predictor, current_genome=current_genome)
+        self.supporter.step(env, self.robots)
+        env.resolve_actions(current_genome)  # 统一结算本帧所有灭火意图
+        idle_count = sum(1 for r in self.robots if r.status == "IDLE")
+        current_genome.idle_frames += idle_count
+        self.weight_history.append(self._plot_weights())
+
+        # --- 遗传算法进化 ---
+        if self.schedule.due("ga", frame):
+            self.evaluate_genome()
+
+        if self.telemetry:
+            self.telemetry.record_frame(self)
+
+    def sense(self, frame):
+        """
+        全体无人机一次性感知：落在任一扫描窗口内、尚未发现的燃烧格即新发现的火点；
+        再用 GridMap 报告的熄灭 / 燃尽格子移除不再燃烧的火点。开销与窗口面积和火点数有关，与地图大小无关。
+        """
+        env = self.env
+        windows = scan_windows(self.drones, env.width, env.height)
+        env.mark_scanned_windows(windows, frame)
+        fires = env.fire_cells()
+        fires = fires[~self.discovered.ravel()[fires]]
+        if len(fires):
+            fx, fy = np.divmod(fires, env.height)
+            x0, x1, y0, y1 = windows.T
+            seen = ((fx[:, None] >= x0) & (fx[:, None] < x1) & (fy[:, None] >= y0) & (fy[:, None] < y1)).any(1)
+            self.discovered.ravel()[fires[seen]] = True
+            self.discovered_count += int(np.count_nonzero(seen))
+
+        cleared = env.drain_cleared_fires()
+        if len(cleared):
+            flat = self.discovered.ravel()
+            gone = cleared[flat[cleared] & (env.grid.ravel()[cleared] != 2)]
+            flat[gone] = False
+            self.discovered_count -= len(gone)
+
+    def _plot_weights(self):
+        indices_to_plot = [0, 1, 2, 3, 5, 4]  # Prox, Sev, Bat, Wat, Wind, Obs
+        return [self.predictor.weights[i] for i in indices_to_plot]
+
+    def advance(self, max_frames=1):
+        """推进至多 max_frames 帧：世界静止时先整段快进，再正常推进一帧。返回推进的帧数"""
+        skipped = self.fast_forward(max_frames - 1) if max_frames > 1 else 0
+        self.step()
+        return skipped + 1
+
+    def is_quiescent(self):
+        """无火、无待处理火点、机器人全部待命且补给车空闲、预测器没有待训练样本"""
+        return (
+            not self.discovered_count
+            and not self.predictor.pending
+            and self.supporter.target_robot is None
+            and not self.supporter.path
+            and all(r.status == "IDLE" for r in self.robots)
+            and not len(self.env.fire_cells())
+        )
+
+    def fast_forward(self, max_frames):
+        """
+        静默期快进：直接跳到下一个“有事发生”的帧之前，返回跳过的帧数 (不静止时为 0)。
+        停止点取以下最早者：GA 结算、下一次自燃、不在补给站的机器人闲置超时、max_frames。
+        默认直接抽样下一次自燃、干燥度闭式推进，开销与跳过的帧数无关。这是统计近似：越过阈值的刻数按正态近似，
+        且抽到的自燃落在停止点之后时直接丢弃、干燥度另行抽样；200 个种子上首次自燃平均 691 帧 (逐帧推进 696 帧，
+        标准误约 13 帧)，差异在抽样误差之内，但同一种子的结果与逐帧推进不同。
+        FAST_FORWARD_EXACT 开启时改为逐刻推进干燥度，消耗与逐帧推进相同的随机数 (GridMap.quiet_fire_tick)，
+        自燃的时刻与位置与逐帧推进完全一致，但每个火势刻仍要整图抽样。
+        闲置计数、权重历史和遥测批量补记，无人机原地悬停扫描 (无人机位置与 Python random 的消耗会与逐帧推进不同)。
+        """
+        if max_frames < 1 or not self.is_quiescent():
+            return 0
+        env, fleet, schedule = self.env, self.fleet, self.schedule
+        start = self.frame
+        stop = min(start + max_frames + 1, schedule.next_due["ga"])  # 第一个需要正常推进的帧
+
+        # 闲置超时：不在最近补给站的机器人到期后会返航，必须正常推进
+        n = len(fleet)
+        if n:
+            idx = np.arange(n)
+            depots = fleet.nearest_depots(env, idx)
+            away = (fleet.x[:n] != depots[:, 0]) | (fleet.y[:n] != depots[:, 1])
+            if away.any():
+                wait = np.maximum(fleet.idle_return - fleet.idle_timer[:n][away], 1)
+                stop = min(stop, start + int(wait.min()))
+
+        exact = self.settings["FAST_FORWARD_EXACT"]
+        if exact:
+            # 区间内的火势刻逐刻推进；某刻会发生自燃时停在该帧之前，由正常推进点燃
+            while schedule.next_due["fire"] < stop:
+                if not env.quiet_fire_tick():
+                    stop = schedule.next_due["fire"]
+                    break
+                schedule.due("fire", schedule.next_due["fire"])
+        else:
+            # 下一次自燃：从下一个火势刻数起第 k 刻；落在停止点之内时预定在该刻点燃
+            k, cells = env.sample_spontaneous_ignition()
+            if k is not None:
+                ignition_frame = schedule.occurrence("fire", k)
+                if ignition_frame <= stop:
+                    stop = ignition_frame
+                    env.forced_ignition = cells
+
+        count = stop - 1 - start
+        if count <= 0:
+            return 0
+
+        if not exact:
+            ticks = schedule.skip_before("fire", stop)
+            if ticks:
+                env.skip_fire_ticks(ticks)
+                env.advance_dryness(ticks)
+        schedule.skip_before("dispatch", stop)  # 静默期调度没有可分配的火点
+        self.frame = stop - 1
+        env.mark_scanned_windows(scan_windows(self.drones, env.width, env.height), self.frame)
+
+        fleet.idle_timer[:n] += count
+        genome = self.ga.get_current_genome()
+        genome.idle_frames = getattr(genome, "idle_frames", 0) + n * count
+        self.weight_history.extend([self._plot_weights()] * count)
+        if self.telemetry:
+            self.telemetry.record_frames(self, start + 1, count)
+        self.skipped_frames += count
+        return count
+
+    def dispatch(self, current_genome):
+        env, robots, predictor = self.env, self.robots, self.predictor
+        # 0. 用本周期入队的任务结果小批量更新预测器
+        predictor.update()
+
+        # 1. 获取资源
+        idle_robots = [r for r in robots if r.status == "IDLE"]
+        if not (idle_robots and self.discovered_count):
+            return
+
+        # 2. 取含已发现火点的火团 (火团及其统计在每个火势刻由 GridMap 标记)，开销只与火点数有关
+        flat = self.discovered.ravel()
+        candidates = []
+        for cluster in env.fire_clusters:
+            found = cluster.cells[flat[cluster.cells]]
+            if len(found):
+                candidates.append((cluster, found))
+        # 火团大的优先，其次已发现格多的
+        candidates.sort(key=lambda c: (-c[0].size, -len(c[1])))
+
+        # 所有机器人当前目标 (无目标时取自身位置)，用于避嫌检查
+        targets = np.array([r.target if r.target else (r.x, r.y) for r in robots], dtype=np.int64)
+
+        for cluster, found in candidates:
+            if not idle_robots:
+                break
+
+            # 3. 代表目标格：团内未被避嫌半径覆盖、离火团质心最近的已发现火点
+            cells = np.stack(np.divmod(found, env.height), axis=1)
+            dist = np.abs(cells[:, None, :] - targets[None, :, :]).sum(axis=2)
+            free = dist.min(axis=1) > current_genome.radius
+            if not free.any():
+                continue
+            cells = cells[free]
+            best = np.argmin(np.abs(cells - np.array(cluster.centroid)).sum(axis=1))
+            f_pos = (int(cells[best, 0]), int(cells[best, 1]))
+
+            severity = env.fire_severity_at(*f_pos)
+            obstacle = env.obstacle_density_at(*f_pos)
+
+            # 竞价选拔
+            best_robot = None
+            min_cost = 999999
+            best_feat = None
+
+            for r in idle_robots:
+                dist_m = abs(r.x - f_pos[0]) + abs(r.y - f_pos[1])
+                vec_x = (f_pos[0] - r.x) / (dist_m if dist_m > 0 else 1)
+                vec_y = (f_pos[1] - r.y) / (dist_m if dist_m > 0 else 1)
+                wind_align = (
+                    vec_x * env.wind_u[f_pos]
+                    + vec_y * env.wind_v[f_pos]
+                )  # 火点处的局部风向
+                max_map_dist = env.width + env.height
+
+                feats = [
+                    1.0 - (dist_m / max_map_dist),  # 使用动态地图尺寸
+                    severity,  # 3x3 火点数 / 9.0
+                    r.battery / self.fleet.max_battery,  # 按局注入的上限 (默认 200)
+                    r.water / self.fleet.max_water,  # 按局注入的上限 (默认 30)
+                    obstacle,  # 3x3 障碍物比例，已归一化
+                    wind_align,  # 自然归一化 (-1~1)
+                ]
+
+                cost = r.calculate_bid(
+                    f_pos,
+                    feats,
+                    predictor,
+                    current_genome.penalty,
+                )
+
+                if cost < min_cost:
+                    min_cost = cost
+                    best_robot = r
+                    best_feat = feats
+
+            # 派遣逻辑
+            if best_robot and min_cost < self.settings["BID_REJECT_THRESHOLD"]:
+                if best_robot.set_target(f_pos[0], f_pos[1], env, best_feat):
+                    idle_robots.remove(best_robot)
+                    targets[robots.index(best_robot)] = f_pos
+                    msg = f"Dispatch: Fire {f_pos} (cluster of {cluster.size}) -> Bot {best_robot.id}"
+                    self.logs.append(msg)
+                    print(msg)  # [恢复控制台日志]
+
+    def evaluate_genome(self):
+        """GA 周期结算：统计当前个体表现并切换到下一个个体"""
+        env, robots, ga = self.env, self.robots, self.ga
+        current_total = env.cell_counts()[6]
+        current_genome = ga.get_current_genome()
+        current_genome.extinguished_count = current_total - self.last_extinguished_total
+        self.last_extinguished_total = current_total
+        current_genome.stranded_count = sum(
+            1 for r in robots if r.status == "STRANDED"
+        )
+        log_system_status(self.frame, env, robots, self.predictor, ga, self.current_penalty)
+        print(
+            f"[GA Eval] Gen {ga.generation}: Ext:{current_genome.extinguished_count}, "
+            f"SevBonus:{current_genome.severity_bonus:.1f}, Stranded:{current_genome.stranded_count}"
+        )
+        if self.chart_callback:
+            self.chart_callback(self.weight_history, self.frame, ga.generation)
+        # 先记录本次评估的统计与适应度：next_step 会把适应度换成记忆表均值，
+        # 冠军若在下一代重新仿真还会被清空统计
+        ga.evaluate_fitness(current_genome)
+        if self.telemetry:
+            self.telemetry.record_generation(self.frame, ga.generation, ga.current_idx, current_genome)
+        ga.next_step()
+        self.current_penalty = ga.get_current_genome().penalty
+
+    def close(self):
+        """结束仿真：把遥测缓冲区写盘，停止条带 worker"""
+        if self.telemetry:
+            self.telemetry.close()
+        if self.domain is not None:
+            self.domain.close()
+            self.domain = None
+
+    def snapshot(self, warp_label="1x"):
+        return SimSnapshot(self, warp_label)
+
+
+class TimeWarp:
+    """
+    时间加速控制：每发布一次快照 (即每个渲染帧) 推进 K 步仿真。
+    - 1x / 4x / 16x：K 固定，仍按 tick 频率节流
+    - max：不节流，按单批耗时调整 K，使每批约占一个显示帧的时间
+    - adaptive：不节流，根据渲染线程回报的实际帧率调整 K，保持目标显示帧率
+    """
+
+    LEVELS = [1, 4, 16, "max"]
+    MAX_STEPS = 4096  # K 的上限，避免单批过长导致输入迟滞
+
+    def __init__(self, level=1, adaptive=False, target_fps=FPS):
+        self.target_fps = target_fps
+        self.display_fps = float(target_fps)
+        self.steps = 1
+        self.set_level(level, adaptive)
+
+    @classmethod
+    def parse(cls, text):
+        """解析命令行参数：1 / 4 / 16 / max / auto"""
+        if text == "auto":
+            return cls(level="max", adaptive=True)
+        if text == "max":
+            return cls(level="max")
+        return cls(level=int(text))
+
+    def set_level(self, level, adaptive=False):
+        self.level = level
+        self.adaptive = adaptive
+        if level != "max":
+            self.steps = int(level)
+
+    @property
+    def throttled(self):
+        return self.level != "max"
+
+    def label(self):
+        if self.adaptive:
+            return f"auto (K={self.steps})"
+        if self.level == "max":
+            return f"max (K={self.steps})"
+        return f"{self.level}x"
+
+    def report_batch(self, elapsed, steps):
+        """仿真线程回报一批 steps 步的耗时，max 模式据此调整 K"""
+        if self.level != "max" or self.adaptive or elapsed <= 0:
+            return
+        budget = 1.0 / self.target_fps
+        per_step = elapsed / steps
+        self.steps = int(max(1, min(self.MAX_STEPS, budget / per_step)))
+
+    def report_display_fps(self, fps):
+        """渲染线程回报实际显示帧率，adaptive 模式据此增减 K"""
+        self.display_fps = fps
+        if not self.adaptive or fps <= 0:
+            return
+        if fps < self.target_fps * 0.9:
+            self.steps = max(1, int(self.steps * 0.8))
+        elif fps >= self.target_fps * 0.97:
+            self.steps = min(self.MAX_STEPS, self.steps + max(1, self.steps // 8))
+
+
+class SimulationThread(threading.Thread):
+    """
+    在独立线程中以固定 tick 频率推进仿真，每个 tick (时间加速时为每 K 步) 发布一份快照；
+    输入事件通过 commands 队列传入，避免渲染线程直接修改仿真状态。
+    stream (core.stream.StateStreamer) 非空时，每次发布快照后把本批变化交给状态流编码线程。
+    """
+
+    def __init__(self, simulation, tick_rate=SIM_TICK_RATE, buffer=None, warp=None, stream=None):
+        super().__init__(name="simulation", daemon=True)
+        self.sim = simulation
+        self.tick_rate = tick_rate
+        self.buffer = buffer if buffer is not None else SnapshotBuffer()
+        self.warp = warp if warp is not None else TimeWarp()
+        self.stream = stream
+        self.commands = queue.Queue()
+        self.error = None  # 仿真线程异常，渲染线程负责重新抛出
+        self._stop_event = threading.Event()
+        self.buffer.publish(self.sim.snapshot(self.warp.label()))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _drain_commands(self):
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            if command[0] == "set_warp":
+                self.warp.set_level(*command[1:])
+            else:
+                self.sim.handle_command(command)
+
+    def run(self):
+        period = 1.0 / self.tick_rate if self.tick_rate > 0 else 0.0
+        next_tick = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                self._drain_commands()
+
+                # 时间加速：连续推进 K 步，中间帧不构建快照
+                steps = self.warp.steps
+                batch_start = time.perf_counter()
+                if self.warp.throttled:
+                    for _ in range(steps):
+                        self.sim.step()
+                else:
+                    # 不节流时允许静默期快进，一批最多推进 steps 帧
+                    done = 0
+                    while done < steps:
+                        done += self.sim.advance(steps - done)
+                self.warp.report_batch(time.perf_counter() - batch_start, steps)
+                self.buffer.publish(self.sim.snapshot(self.warp.label()))
+                if self.stream is not None:
+                    self.stream.capture(self.sim)
+
+                if not self.warp.throttled:
+                    self._stop_event.wait(0)  # 让出 GIL 给渲染线程
+                    next_tick = time.perf_counter()
+                    continue
+
+                # 按 tick 频率节流；落后太多时不追帧，直接从当前时间重新计时
+                next_tick += period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    next_tick = time.perf_counter()
+        except Exception as exc:
+            self.error = exc
+            raise
+        finally:
+            self.sim.close()
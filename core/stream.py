@@ -0,0 +1,337 @@
+# core/stream.py
+"""
+实时状态流：仿真线程每发布一帧，就把上次以来改变的格子和 Agent 状态交给编码线程，
+编码线程打包成增量消息，推送给本地 TCP socket 上的所有看板。
+每帧开销只与改变的格数成正比，与地图大小无关；每条消息只编码一次，所有看板共享同一份字节。
+
+消息格式 (小端)，每条消息前有 u32 长度：
+    消息头   kind u8 | frame u32 | width u32 | height u32 | n_cells u32 | n_agents u32
+    格子段   关键帧：width*height 个 u8 (整张网格，按扁平索引顺序)
+             增量帧：n_cells 个 u32 扁平索引，随后 n_cells 个 u8 新状态
+    Agent 段 n_agents 行 AGENT_DTYPE (增量帧只含有变化的 Agent)
+每 STREAM_KEYFRAME_INTERVAL 条消息插入一次关键帧；新连接的看板先收到一份当前关键帧；
+编码线程长时间未取走变化、仿真侧积压被丢弃后，下一条消息也改为关键帧。
+
+看板端用 StreamDecoder 还原网格与 Agent 表，命令行查看：
+    python -m core.stream 127.0.0.1:8765
+"""
+import argparse
+import collections
+import queue
+import socket
+import struct
+import threading
+
+import numpy as np
+
+from configs.settings import STREAM_KEYFRAME_INTERVAL, STREAM_MAX_BACKLOG
+
+KEYFRAME, DELTA = 0, 1
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<BIIIII")
+
+# Agent 种类
+ROBOT, SUPPORTER, DRONE = 0, 1, 2
+
+AGENT_DTYPE = np.dtype([
+    ("id", "<u2"),  # Agent 表中的行号：机器人、救援机器人、无人机依次排列
+    ("kind", "u1"),
+    ("status", "i1"),  # 机器人状态编码 (agents.robot.STATUS_NAMES)，其他 Agent 为 -1
+    ("x", "<i4"),
+    ("y", "<i4"),
+    ("battery", "<f4"),
+    ("water", "<f4"),
+])
+
+
+def agent_table(sim):
+    """收集全部 Agent 的当前状态 (AGENT_DTYPE)，机器人直接取舰队数组"""
+    fleet = sim.fleet
+    n = len(fleet)
+    others = [(SUPPORTER, sim.supporter)] + [(DRONE, d) for d in sim.drones]
+    table = np.zeros(n + len(others), dtype=AGENT_DTYPE)
+    table["id"] = np.arange(len(table))
+    for name in ("status", "x", "y", "battery", "water"):
+        table[name][:n] = getattr(fleet, name)[:n]
+    for i, (kind, agent) in enumerate(others, n):
+        table[i] = (i, kind, -1, agent.x, agent.y, 0, 0)
+    return table
+
+
+def _pack(kind, frame, width, height, n_cells, cell_bytes, agents):
+    header = HEADER.pack(kind, frame, width, height, n_cells, len(agents))
+    agent_bytes = agents.tobytes()
+    size = len(header) + len(cell_bytes) + len(agent_bytes)
+    return b"".join((LENGTH.pack(size), header, cell_bytes, agent_bytes))
+
+
+def encode_keyframe(frame, grid, agents):
+    """完整关键帧：整张网格 + 全部 Agent"""
+    width, height = grid.shape
+    cells = np.ascontiguousarray(grid, dtype=np.uint8).tobytes()
+    return _pack(KEYFRAME, frame, width, height, grid.size, cells, agents)
+
+
+def encode_delta(frame, width, height, cells, values, agents):
+    """增量帧：改变的格子 (扁平索引 + 新状态，分两列打包) + 有变化的 Agent"""
+    body = cells.astype("<u4").tobytes() + values.astype(np.uint8).tobytes()
+    return _pack(DELTA, frame, width, height, len(cells), body, agents)
+
+
+class StreamMessage:
+    """解码后的一条消息；关键帧的 cells / values 为 None"""
+
+    def __init__(self, kind, frame, cells, values, agents, size):
+        self.kind = kind
+        self.frame = frame
+        self.cells = cells
+        self.values = values
+        self.agents = agents
+        self.size = size  # 含长度前缀的字节数
+
+
+class StreamDecoder:
+    """看板端：累积字节流、逐条解出消息，并维护网格与 Agent 表的当前状态"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.grid = None  # 收到首个关键帧之前为 None，此前的增量帧直接丢弃
+        self.agents = None
+        self.frame = -1
+        self.bytes_received = 0
+
+    @property
+    def synced(self):
+        return self.grid is not None
+
+    def feed(self, data):
+        """喂入收到的字节，返回其中完整的消息列表 (已应用到 grid / agents)"""
+        self._buffer += data
+        self.bytes_received += len(data)
+        messages = []
+        while len(self._buffer) >= LENGTH.size:
+            (size,) = LENGTH.unpack_from(self._buffer)
+            end = LENGTH.size + size
+            if len(self._buffer) < end:
+                break
+            body = bytes(self._buffer[LENGTH.size:end])
+            del self._buffer[:end]
+            message = self._apply(body, end)
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def _apply(self, body, size):
+        kind, frame, width, height, n_cells, n_agents = HEADER.unpack_from(body)
+        offset = HEADER.size
+        cells = values = None
+        if kind == KEYFRAME:
+            grid = np.frombuffer(body, np.uint8, n_cells, offset)
+            offset += n_cells
+        else:
+            cells = np.frombuffer(body, "<u4", n_cells, offset)
+            offset += 4 * n_cells
+            values = np.frombuffer(body, np.uint8, n_cells, offset)
+            offset += n_cells
+        agents = np.frombuffer(body, AGENT_DTYPE, n_agents, offset)
+
+        if kind == KEYFRAME:
+            self.grid = grid.reshape(width, height).copy()
+            self.agents = agents.copy()
+        elif not self.synced:
+            return None
+        else:
+            self.grid.ravel()[cells] = values
+            self.agents[agents["id"]] = agents
+        self.frame = frame
+        return StreamMessage(kind, frame, cells, values, agents, size)
+
+
+class _Viewer:
+    """一个已连接的看板：非阻塞 socket 与待发送的消息队列"""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.chunks = collections.deque()
+        self.offset = 0  # 队首消息已发出的字节数
+        self.size = 0  # 队列中尚未发出的总字节数
+
+
+class StateStreamer(threading.Thread):
+    """
+    状态流编码线程：仿真线程调用 capture() 交出本帧改变的格子与 Agent 表 (开销只与变化量有关)，
+    本线程维护一份网格镜像，编码消息并以非阻塞方式推送给所有看板；
+    看板积压超过 max_backlog 时丢弃其积压，改发关键帧重新同步，慢看板不会拖慢仿真。
+    """
+
+    def __init__(self, sim, host="127.0.0.1", port=0,
+                 keyframe_interval=STREAM_KEYFRAME_INTERVAL, max_backlog=STREAM_MAX_BACKLOG,
+                 max_queue=64):
+        super().__init__(name="stream", daemon=True)
+        env = sim.env
+        env.track_changes = True
+        env.drain_changed_cells()
+        self.width, self.height = env.width, env.height
+        self.grid = env.grid.astype(np.uint8)  # 网格镜像，只由编码线程修改
+        self.agents = agent_table(sim)
+        self.frame = sim.frame
+        self.keyframe_interval = keyframe_interval
+        self.max_backlog = max_backlog
+        self.queue = queue.Queue(max_queue)
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()[:2]
+        self.viewers = []
+        self.messages = 0
+        self.bytes_encoded = 0
+        self.resyncs = 0
+        self._since_keyframe = 0
+        self._keyframe = None  # 缓存 (messages, bytes)，同一时刻的多个新看板共用
+        self._stop_event = threading.Event()
+
+    # --- 仿真线程侧 ---
+    def capture(self, sim):
+        """
+        取走改变的格子及其新值和 Agent 表放入队列；队列满时跳过，变化留到下次一起发送。
+        积压过多已被 GridMap 丢弃时改交整张网格 (cells 为 None)，编码线程据此发送关键帧
+        """
+        if self.queue.full():
+            return
+        env = sim.env
+        if env.changes_overflowed:
+            env.changes_overflowed = False
+            env.drain_changed_cells()
+            self.queue.put_nowait((sim.frame, None, env.grid.astype(np.uint8), agent_table(sim)))
+            return
+        cells = env.drain_changed_cells()
+        values = env.grid.ravel()[cells].astype(np.uint8)
+        self.queue.put_nowait((sim.frame, cells, values, agent_table(sim)))
+
+    def stop(self):
+        self._stop_event.set()
+
+    # --- 编码线程侧 ---
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                self._accept()
+                try:
+                    item = self.queue.get(timeout=0.05)
+                except queue.Empty:
+                    item = None
+                if item is not None:
+                    self._publish(*item)
+                self.viewers = [v for v in self.viewers if self._flush(v) or self._drop(v)]
+        finally:
+            for viewer in self.viewers:
+                viewer.sock.close()
+            self.listener.close()
+
+    def _publish(self, frame, cells, values, agents):
+        if cells is None:
+            self.grid[:] = values  # 全图同步：增量已丢弃，只能以关键帧重发
+        else:
+            self.grid.ravel()[cells] = values
+        if len(agents) == len(self.agents):
+            changed = agents[agents != self.agents]
+        else:
+            changed = agents
+        self.agents = agents
+        self.frame = frame
+        self.messages += 1
+        self._since_keyframe += 1
+        if cells is None or self._since_keyframe >= self.keyframe_interval:
+            self._since_keyframe = 0
+            data = self._keyframe_bytes()
+        else:
+            data = encode_delta(frame, self.width, self.height, cells, values, changed)
+        self.bytes_encoded += len(data)
+        for viewer in self.viewers:
+            self._send(viewer, data)
+
+    def _keyframe_bytes(self):
+        if self._keyframe is None or self._keyframe[0] != self.messages:
+            self._keyframe = (self.messages, encode_keyframe(self.frame, self.grid, self.agents))
+        return self._keyframe[1]
+
+    def _accept(self):
+        while True:
+            try:
+                sock, address = self.listener.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            viewer = _Viewer(sock, address)
+            self.viewers.append(viewer)
+            print(f"[Stream] viewer connected from {address[0]}:{address[1]}")
+            self._send(viewer, self._keyframe_bytes())
+
+    def _send(self, viewer, data):
+        if viewer.size and viewer.size + len(data) > self.max_backlog:
+            # 看板跟不上：保留发送到一半的队首消息，丢弃其余积压，改发当前关键帧
+            head = viewer.chunks.popleft() if viewer.offset else None
+            viewer.chunks.clear()
+            viewer.size = 0
+            if head is not None:
+                viewer.chunks.append(head)
+                viewer.size = len(head) - viewer.offset
+            data = self._keyframe_bytes()
+            self.resyncs += 1
+        viewer.chunks.append(data)
+        viewer.size += len(data)
+
+    def _flush(self, viewer):
+        """尽量发送积压的消息；连接已断开时返回 False"""
+        while viewer.chunks:
+            head = viewer.chunks[0]
+            try:
+                sent = viewer.sock.send(memoryview(head)[viewer.offset:])
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            viewer.offset += sent
+            viewer.size -= sent
+            if viewer.offset == len(head):
+                viewer.chunks.popleft()
+                viewer.offset = 0
+        return True
+
+    def _drop(self, viewer):
+        viewer.sock.close()
+        print(f"[Stream] viewer {viewer.address[0]}:{viewer.address[1]} disconnected")
+        return False
+
+
+def watch(host, port, limit=0):
+    """连接状态流，逐条打印消息摘要；limit > 0 时收到 limit 条后退出"""
+    decoder = StreamDecoder()
+    count = 0
+    with socket.create_connection((host, port)) as sock:
+        while True:
+            data = sock.recv(1 << 16)
+            if not data:
+                return decoder
+            for message in decoder.feed(data):
+                count += 1
+                kind = "key" if message.kind == KEYFRAME else "delta"
+                n_cells = decoder.grid.size if message.cells is None else len(message.cells)
+                print(f"{kind:>5} frame {message.frame:>7}  cells {n_cells:>8}  "
+                      f"agents {len(message.agents):>3}  {message.size:>9} B  "
+                      f"fires {int(np.count_nonzero(decoder.grid == 2))}")
+                if limit and count >= limit:
+                    return decoder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EcoGuardian 状态流查看器")
+    parser.add_argument("address", help="HOST:PORT (main.py --stream 指定的端口)")
+    parser.add_argument("--limit", type=int, default=0, help="收到多少条消息后退出 (0 表示一直接收)")
+    args = parser.parse_args(argv)
+    host, _, port = args.address.rpartition(":")
+    watch(host or "127.0.0.1", int(port), args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# core/sweep.py
+"""
+参数扫描：把网格或随机设计展开成 (参数, 种子) 任务，在进程池中并行跑无头仿真，
+每局结果一到就追加写入同一张 CSV 结果表；重新运行时跳过表中已有的 run_id 实现断点续扫。
+
+用法:
+    python -m core.sweep --param FIRE_SPREAD_PROB=0.03,0.05,0.08 --param N_ROBOTS=3,6 \
+        --seeds 4 --frames 3000 --out sweeps/spread.csv
+    python -m core.sweep --random 64 --param WIND_STRENGTH=0.5:4.0 \
+        --param ROBOT_LOW_BATTERY_THRESHOLD=20:80 --seeds 2 --out sweeps/random.csv
+"""
+import argparse
+import contextlib
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from configs.settings import SWEEPABLE_SETTINGS, resolve_settings
+
+# 每局结束时写入结果表的指标列
+METRIC_FIELDS = [
+    "frames",
+    "active_fires",
+    "extinguished",
+    "burnt",
+    "trees_left",
+    "stranded",
+    "generations",
+    "best_fitness",
+    "penalty",
+    "radius",
+    "seconds",
+]
+
+
+def parse_param(text):
+    """解析 NAME=v1,v2,... (取值列表) 或 NAME=lo:hi (随机设计的均匀区间)"""
+    name, _, spec = text.partition("=")
+    name = name.strip()
+    if name not in SWEEPABLE_SETTINGS:
+        raise argparse.ArgumentTypeError(
+            f"{name!r} is not sweepable; choose from {', '.join(SWEEPABLE_SETTINGS)}"
+        )
+    if ":" in spec:
+        lo, hi = (_number(v) for v in spec.split(":", 1))
+        return name, (lo, hi)
+    return name, [_number(v) for v in spec.split(",")]
+
+
+def _number(text):
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def grid_design(params):
+    """全因子网格：每个参数都必须是取值列表"""
+    names = sorted(params)
+    for name in names:
+        if isinstance(params[name], tuple):
+            raise ValueError(f"{name}: ranges (lo:hi) need --random, use a value list for a grid")
+    return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+
+def random_design(params, n_points, seed=0):
+    """随机设计：区间参数均匀采样 (两端都是整数时取整数)，列表参数随机选取"""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(n_points):
+        point = {}
+        for name in sorted(params):
+            spec = params[name]
+            if isinstance(spec, tuple):
+                lo, hi = spec
+                if isinstance(lo, int) and isinstance(hi, int):
+                    point[name] = rng.randint(lo, hi)
+                else:
+                    point[name] = round(rng.uniform(lo, hi), 6)
+            else:
+                point[name] = rng.choice(spec)
+        points.append(point)
+    return points
+
+
+def run_id(point, seed, terrain=None):
+    """同一 (参数, 种子, 地形) 组合的稳定编号，用于续扫时去重"""
+    key = {"params": point, "seed": seed}
+    if terrain:
+        key["terrain"] = terrain
+    key = json.dumps(key, sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def run_episode(task):
+    """
+    在当前进程中跑一局无头仿真并返回结果行。
+    参数通过 Simulation(settings=...) 注入；两个全局随机源都按种子重置，保证可复现。
+    地形按内存映射 (写时复制) 加载，各 worker 共享同一份页缓存。
+    """
+    rid, point, seed, frames, terrain = task
+    from core.simulation import Simulation  # 在 worker 进程内导入
+
+    random.seed(seed)
+    np.random.seed(seed)
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        sim = Simulation(settings=point, terrain=terrain)
+        while sim.frame < frames:
+            sim.advance(frames - sim.frame)  # 静默期整段快进
+    grid = sim.env.grid
+    ga = sim.ga
+    row = {"run_id": rid, "seed": seed}
+    row.update(point)
+    row.update({
+        "frames": sim.frame,
+        "active_fires": int(np.count_nonzero(grid == 2)),
+        "extinguished": int(np.count_nonzero(grid == 6)),
+        "burnt": int(np.count_nonzero(grid == 4)),
+        "trees_left": int(np.count_nonzero(grid == 1)),
+        "stranded": sum(1 for r in sim.robots if r.status == "STRANDED"),
+        "generations": ga.generation,
+        "best_fitness": float(ga.best_fitness()),
+        "penalty": round(sim.current_penalty, 3),
+        "radius": ga.get_current_genome().radius,
+        "seconds": round(time.perf_counter() - t0, 3),
+    })
+    return row
+
+
+def load_completed(path, fieldnames):
+    """读取已有结果表中的 run_id；表头与本次扫描不一致时拒绝续写"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != fieldnames:
+            raise ValueError(
+                f"{path} was written by a sweep over different columns: {reader.fieldnames}"
+            )
+        return {row["run_id"] for row in reader}
+
+
+def run_sweep(points, seeds, frames, out, workers=None, terrain=None):
+    """并行执行全部 (参数点 x 种子) 任务，跳过 out 中已完成的 run，逐行追加结果"""
+    names = sorted({name for point in points for name in point})
+    fieldnames = ["run_id", "seed"] + names + METRIC_FIELDS
+    completed = load_completed(out, fieldnames)
+
+    tasks = []
+    for point in points:
+        resolve_settings(point)  # 提前校验，避免在 worker 中才失败
+        for seed in seeds:
+            rid = run_id(point, seed, terrain)
+            if rid not in completed:
+                tasks.append((rid, point, seed, frames, terrain))
+    total = len(points) * len(seeds)
+    print(f"[Sweep] {total} runs, {total - len(tasks)} already in {out}, {len(tasks)} to go")
+    if not tasks:
+        return
+
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    write_header = not (os.path.exists(out) and os.path.getsize(out))
+    workers = workers or os.cpu_count() or 1
+    # spawn: worker 只导入无头模块，不继承父进程的随机状态
+    ctx = multiprocessing.get_context("spawn")
+    with open(out, "a", newline="", encoding="utf-8") as f, ctx.Pool(min(workers, len(tasks))) as pool:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        if write_header:
+            writer.writeheader()
+            f.flush()
+        for done, row in enumerate(pool.imap_unordered(run_episode, tasks), 1):
+            writer.writerow(row)
+            f.flush()  # 每局落盘一次，中断后可续扫
+            print(f"[Sweep] {done}/{len(tasks)} run {row['run_id']} "
+                  f"ext={row['extinguished']} burnt={row['burnt']} ({row['seconds']}s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EcoGuardian 并行参数扫描")
+    parser.add_argument("--param", action="append", type=parse_param, default=[],
+                        metavar="NAME=v1,v2|lo:hi", help="扫描参数，可重复")
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="随机设计的参数点数 (0 表示全因子网格)")
+    parser.add_argument("--design-seed", type=int, default=0,
+                        help="随机设计的种子 (续扫时须与首次相同)")
+    parser.add_argument("--seeds", type=int, default=1, help="每个参数点的仿真种子数")
+    parser.add_argument("--frames", type=int, default=2000, help="每局推进的帧数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认全部核心)")
+    parser.add_argument("--out", default="sweeps/results.csv", help="结果表路径")
+    parser.add_argument("--terrain", default=None, help="所有局共用的地形目录 (默认每局随机生成)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = dict(args.param)
+    if args.random:
+        points = random_design(params, args.random, args.design_seed)
+    else:
+        points = grid_design(params)
+    run_sweep(points, list(range(args.seeds)), args.frames, args.out, args.workers, args.terrain)
+
+
+if __name__ == "__main__":
+    main()
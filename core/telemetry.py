@@ -0,0 +1,187 @@
+# core/telemetry.py
+import json
+import os
+import time
+import numpy as np
+
+# 每帧记录的固定字段
+FRAME_FIELDS = [
+    ("frame", np.int64),
+    ("generation", np.int32),
+    ("individual", np.int32),
+    ("active_fires", np.int32),
+    ("extinguished", np.int32),
+    ("discovered", np.int32),
+    ("robots_idle", np.int32),
+    ("robots_stranded", np.int32),
+    ("robots_moving", np.int32),
+    ("penalty", np.float32),
+    ("radius", np.int32),
+    ("w_prox", np.float32),
+    ("w_sev", np.float32),
+    ("w_bat", np.float32),
+    ("w_wat", np.float32),
+    ("w_obs", np.float32),
+    ("w_wind", np.float32),
+]
+
+# 每个 GA 个体评估结束时记录的字段
+GENERATION_FIELDS = [
+    ("frame", np.int64),
+    ("generation", np.int32),
+    ("individual", np.int32),
+    ("penalty", np.float32),
+    ("radius", np.int32),
+    ("extinguished_count", np.int32),
+    ("severity_bonus", np.float32),
+    ("stranded_count", np.int32),
+    ("crowded_frames", np.int32),
+    ("idle_frames", np.int32),
+    ("fitness", np.float32),
+]
+
+
+class ColumnStream:
+    """
+    定长 schema 的列式记录流：记录先写入预分配的结构化数组块，
+    块满 (或 flush) 时把每一列追加到各自的二进制文件 <dir>/<name>/<field>.bin；
+    目录中已有记录时只在 schema 完全一致时续写，否则报错，避免不同格式的数据混在同一列文件里
+    """
+
+    def __init__(self, directory, name, fields, block_size=4096):
+        self.path = os.path.join(directory, name)
+        os.makedirs(self.path, exist_ok=True)
+        self.dtype = np.dtype(fields)
+        self.block = np.zeros(block_size, dtype=self.dtype)
+        self.count = 0  # 块内待写记录数
+        schema = {field: np.dtype(kind).str for field, kind in fields}
+        schema_file = os.path.join(self.path, "schema.json")
+        if os.path.exists(schema_file):
+            with open(schema_file, encoding="utf-8") as f:
+                existing = json.load(f)
+            if existing != schema:
+                raise ValueError(
+                    f"{self.path} already holds telemetry with a different schema; "
+                    f"use another directory or run id"
+                )
+            return
+        with open(schema_file, "w", encoding="utf-8") as f:
+            json.dump(schema, f, indent=1)
+
+    def append(self, record):
+        """追加一条记录 (按字段顺序的元组)"""
+        self.block[self.count] = record
+        self.count += 1
+        if self.count == len(self.block):
+            self.flush()
+
+    def extend(self, records):
+        """追加一整段结构化记录 (快进时批量写入)：先落盘块内缓存，再按列直接写入"""
+        self.flush()
+        for field in self.dtype.names:
+            with open(os.path.join(self.path, field + ".bin"), "ab") as f:
+                f.write(np.ascontiguousarray(records[field]).tobytes())
+
+    def flush(self):
+        if self.count == 0:
+            return
+        for field in self.dtype.names:
+            with open(os.path.join(self.path, field + ".bin"), "ab") as f:
+                f.write(np.ascontiguousarray(self.block[field][: self.count]).tobytes())
+        self.count = 0
+
+
+def new_run_id():
+    """按启动时间 (加进程号防止同一秒内撞名) 生成的运行编号，字典序即时间顺序"""
+    return time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+
+def list_runs(directory="telemetry"):
+    """目录下的运行编号，按时间从旧到新"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory)
+        if os.path.isdir(os.path.join(directory, name, "frames"))
+    )
+
+
+class TelemetryWriter:
+    """
+    仿真遥测写入器：每帧一条 frames 记录，每个 GA 个体一条 generations 记录。
+    每次运行写入独立的子目录 <directory>/<run_id>/，多次运行不会混在同一组列文件中；
+    传入已存在的 run_id 时在其后续写 (schema 必须一致)。
+    """
+
+    def __init__(self, directory="telemetry", block_size=4096, run_id=None):
+        self.run_id = run_id or new_run_id()
+        self.directory = os.path.join(directory, self.run_id)
+        self.frames = ColumnStream(self.directory, "frames", FRAME_FIELDS, block_size)
+        self.generations = ColumnStream(self.directory, "generations", GENERATION_FIELDS, 256)
+
+    def record_frame(self, sim):
+        self.frames.append(self._frame_record(sim))
+
+    def record_frames(self, sim, first_frame, count):
+        """快进区间 [first_frame, first_frame + count) 的逐帧记录：除帧号外与当前状态相同"""
+        records = np.empty(count, dtype=self.frames.dtype)
+        records[:] = self._frame_record(sim)
+        records["frame"] = np.arange(first_frame, first_frame + count)
+        self.frames.extend(records)
+
+    def _frame_record(self, sim):
+        env, robots, ga = sim.env, sim.robots, sim.ga
+        genome = ga.get_current_genome()
+        w = sim.predictor.weights
+        idle = stranded = 0
+        for r in robots:
+            if r.status == "IDLE":
+                idle += 1
+            elif r.status == "STRANDED":
+                stranded += 1
+        counts = env.cell_counts()
+        return (
+            sim.frame, ga.generation, ga.current_idx,
+            counts[2], counts[6],
+            sim.discovered_count, idle, stranded, len(robots) - idle - stranded,
+            genome.penalty, genome.radius,
+            w[0], w[1], w[2], w[3], w[4], w[5],
+        )
+
+    def record_generation(self, frame, generation, individual, genome):
+        self.generations.append((
+            frame, generation, individual, genome.penalty, genome.radius,
+            genome.extinguished_count, genome.severity_bonus, genome.stranded_count,
+            genome.crowded_frames, getattr(genome, "idle_frames", 0), genome.fitness,
+        ))
+
+    def flush(self):
+        self.frames.flush()
+        self.generations.flush()
+
+    def close(self):
+        self.flush()
+
+
+def load_telemetry(directory="telemetry", name="frames", run_id=None):
+    """
+    以内存映射方式加载一个记录流，返回 {字段名: np.memmap}。
+    directory 为遥测根目录时读取 run_id 指定的运行 (默认最近一次)，也可以直接传某次运行的目录。
+    """
+    if run_id is None and not os.path.isdir(os.path.join(directory, name)):
+        runs = list_runs(directory)
+        if not runs:
+            raise FileNotFoundError(f"no telemetry runs in {directory}")
+        run_id = runs[-1]
+    path = os.path.join(directory, run_id or "", name)
+    with open(os.path.join(path, "schema.json"), encoding="utf-8") as f:
+        schema = json.load(f)
+    columns = {}
+    for field, kind in schema.items():
+        filename = os.path.join(path, field + ".bin")
+        dtype = np.dtype(kind)
+        if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+            columns[field] = np.zeros(0, dtype=dtype)
+            continue
+        columns[field] = np.memmap(filename, dtype=dtype, mode="r")
+    return columns
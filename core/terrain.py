@@ -0,0 +1,140 @@
+# core/terrain.py
+"""
+地形栅格的读写：状态 (state)、燃料 (fuel)、干燥度 (dryness) 三张栅格放在同一目录，
+格式为 .npy 或裸二进制 (raw)，加载时按内存映射 (写时复制) 打开：
+启动时不读取整张地图，多个进程加载同一地形时共享页缓存，只有被仿真改写的页才会复制到进程私有内存。
+
+目录结构：
+    terrain.json   {"width": W, "height": H, "depots": [[x, y], ...],
+                    "rasters": {"state": {"file": "state.npy"},
+                                "fuel": {"file": "fuel.raw", "dtype": "<i2"}, ...}}
+    state.npy / fuel.npy / dryness.npy (raw 文件的 dtype 在 terrain.json 中给出，形状为 (W, H))
+缺少 fuel 时树木取 TREE_MAX_FUEL，缺少 dryness 时全为 0。
+
+用法:
+    env = GridMap(terrain=load_terrain("maps/ridge"))
+    python -m core.terrain maps/ridge --size 4000 3000 --patch-scale 12   # 生成一张随机地形
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+
+from configs.settings import *
+
+METADATA = "terrain.json"
+
+# 各栅格保存时使用的 dtype (加载时保留文件中的 dtype)
+RASTER_DTYPES = {
+    "state": np.uint8,
+    "fuel": np.int16,
+    "dryness": np.float32,
+}
+
+
+class Terrain:
+    """一组形状为 (W, H) 的状态 / 燃料 / 干燥度栅格及补给站坐标，用于构建 GridMap"""
+
+    def __init__(self, grid, fuel=None, dryness=None, depots=None):
+        self.grid = grid
+        self.fuel = fuel if fuel is not None else np.where(grid == 1, TREE_MAX_FUEL, 0)
+        self.dryness = dryness if dryness is not None else np.zeros(grid.shape, dtype=np.float32)
+        for name, raster in (("fuel", self.fuel), ("dryness", self.dryness)):
+            if raster.shape != grid.shape:
+                raise ValueError(f"{name} raster has shape {raster.shape}, expected {grid.shape}")
+        if self.fuel.dtype.kind == "u":
+            # 燃料逐刻减 1 后与 0 比较，无符号类型会下溢
+            self.fuel = self.fuel.astype(np.int16)
+        if depots is None:
+            depots = [tuple(int(v) for v in xy) for xy in np.argwhere(grid == 5)] or None
+        self.depots = depots  # None 表示由 GridMap 放在四角
+
+    @property
+    def shape(self):
+        return self.grid.shape
+
+
+def _open_raster(path, spec, shape, mode):
+    if path.endswith(".npy"):
+        raster = np.load(path, mmap_mode=mode)
+    else:
+        raster = np.memmap(path, dtype=np.dtype(spec["dtype"]), mode=mode, shape=shape)
+    if raster.shape != shape:
+        raise ValueError(f"{path} has shape {raster.shape}, expected {shape}")
+    return raster
+
+
+def load_terrain(path, mode="c"):
+    """
+    加载地形：path 为含 terrain.json 的目录，或单个状态栅格 .npy 文件。
+    mode 为 numpy 内存映射模式，默认 "c" (写时复制，仿真的改写不会写回文件)。
+    """
+    if path.endswith(".npy"):
+        return Terrain(np.load(path, mmap_mode=mode))
+    with open(os.path.join(path, METADATA), encoding="utf-8") as f:
+        meta = json.load(f)
+    shape = (meta["width"], meta["height"])
+    rasters = {
+        name: _open_raster(os.path.join(path, spec["file"]), spec, shape, mode)
+        for name, spec in meta["rasters"].items()
+    }
+    if "state" not in rasters:
+        raise ValueError(f"{path}: terrain needs a state raster")
+    depots = meta.get("depots")
+    return Terrain(
+        rasters["state"],
+        rasters.get("fuel"),
+        rasters.get("dryness"),
+        [tuple(xy) for xy in depots] if depots else None,
+    )
+
+
+def save_terrain(directory, grid, fuel=None, dryness=None, depots=None, raw=False):
+    """把栅格写成地形目录 (raw=True 时写裸二进制文件)，补给站默认取状态为 5 的格子"""
+    os.makedirs(directory, exist_ok=True)
+    terrain = Terrain(np.asarray(grid), fuel, dryness, depots)
+    rasters = {}
+    for name, raster in (("state", terrain.grid), ("fuel", terrain.fuel), ("dryness", terrain.dryness)):
+        data = np.ascontiguousarray(raster, dtype=RASTER_DTYPES[name])
+        if raw:
+            filename = f"{name}.raw"
+            data.tofile(os.path.join(directory, filename))
+            rasters[name] = {"file": filename, "dtype": data.dtype.str}
+        else:
+            filename = f"{name}.npy"
+            np.save(os.path.join(directory, filename), data)
+            rasters[name] = {"file": filename}
+    meta = {
+        "width": int(terrain.shape[0]),
+        "height": int(terrain.shape[1]),
+        "depots": [list(xy) for xy in terrain.depots] if terrain.depots else None,
+        "rasters": rasters,
+    }
+    with open(os.path.join(directory, METADATA), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def main(argv=None):
+    from core.grid_map import GridMap
+
+    parser = argparse.ArgumentParser(description="生成随机地形并保存为可内存映射的地形目录")
+    parser.add_argument("directory")
+    parser.add_argument("--size", type=int, nargs=2, default=(GRID_WIDTH, GRID_HEIGHT), metavar=("W", "H"))
+    parser.add_argument("--density", type=float, default=TREE_DENSITY)
+    parser.add_argument("--patch-scale", type=int, default=FOREST_PATCH_SCALE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--raw", action="store_true", help="写裸二进制栅格而不是 .npy")
+    args = parser.parse_args(argv)
+
+    np.random.seed(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(*args.size, density=args.density, patch_scale=args.patch_scale)
+    save_terrain(args.directory, env.grid, env.fuel_grid, env.dryness_grid, env.depots, raw=args.raw)
+    print(f"[Terrain] wrote {args.size[0]}x{args.size[1]} terrain to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
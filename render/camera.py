@@ -0,0 +1,91 @@
+# render/camera.py
+import math
+
+from configs.settings import *
+
+
+class Camera:
+    """
+    视口相机：世界坐标以格为单位，scale 为每格像素数。
+    (x0, y0) 是视口左上角对应的世界坐标 (可为小数)，平移和缩放后都会被限制在地图范围内；
+    地图比视口小时居中显示。
+    """
+
+    def __init__(self, world_width, world_height,
+                 view_width=GRID_WIDTH * CELL_SIZE, view_height=WINDOW_HEIGHT, scale=CELL_SIZE):
+        self.world_width, self.world_height = world_width, world_height
+        self.view_width, self.view_height = view_width, view_height
+        # 最小缩放为整张地图正好放进视口
+        self.min_scale = min(view_width / world_width, view_height / world_height, scale)
+        self.max_scale = max(CAMERA_MAX_CELL_SIZE, scale)
+        self.scale = scale
+        self.x0 = self.y0 = 0.0
+        self.clamp()
+
+    @property
+    def rect(self):
+        """视口在屏幕上的矩形 (x, y, w, h)"""
+        return (0, 0, self.view_width, self.view_height)
+
+    @property
+    def lod_block(self):
+        """当前缩放下每个绘制块覆盖的格数 (边长)，1 表示逐格绘制"""
+        if self.scale >= CAMERA_LOD_CELL_PIXELS:
+            return 1
+        return math.ceil(CAMERA_LOD_CELL_PIXELS / self.scale)
+
+    def clamp(self):
+        self.scale = min(max(self.scale, self.min_scale), self.max_scale)
+        self.x0 = self._clamp_axis(self.x0, self.view_width, self.world_width)
+        self.y0 = self._clamp_axis(self.y0, self.view_height, self.world_height)
+
+    def _clamp_axis(self, origin, view, world):
+        span = view / self.scale
+        if span >= world:
+            return (world - span) / 2
+        return min(max(origin, 0.0), world - span)
+
+    def pan(self, dx, dy):
+        """按屏幕像素平移"""
+        self.x0 += dx / self.scale
+        self.y0 += dy / self.scale
+        self.clamp()
+
+    def zoom(self, factor, px=None, py=None):
+        """以屏幕点 (px, py) (默认视口中心) 为锚点缩放，锚点下的世界坐标保持不动"""
+        px = self.view_width / 2 if px is None else px
+        py = self.view_height / 2 if py is None else py
+        wx, wy = self.x0 + px / self.scale, self.y0 + py / self.scale
+        self.scale *= factor
+        self.clamp()
+        self.x0, self.y0 = wx - px / self.scale, wy - py / self.scale
+        self.clamp()
+
+    def fit(self):
+        """缩小到整张地图可见"""
+        self.scale = self.min_scale
+        self.clamp()
+
+    def contains_screen(self, px, py):
+        return 0 <= px < self.view_width and 0 <= py < self.view_height
+
+    def visible_cells(self):
+        """视口覆盖的格子范围 [x_lo, x_hi) x [y_lo, y_hi) (已裁剪到地图内)"""
+        x_lo = max(0, math.floor(self.x0))
+        y_lo = max(0, math.floor(self.y0))
+        x_hi = min(self.world_width, math.ceil(self.x0 + self.view_width / self.scale))
+        y_hi = min(self.world_height, math.ceil(self.y0 + self.view_height / self.scale))
+        return x_lo, x_hi, y_lo, y_hi
+
+    def visible(self, x_min, y_min, x_max, y_max):
+        """格子包围盒 [x_min, x_max] x [y_min, y_max] 是否与视口相交"""
+        x_lo, x_hi, y_lo, y_hi = self.visible_cells()
+        return x_max >= x_lo and x_min < x_hi and y_max >= y_lo and y_min < y_hi
+
+    def to_screen(self, x, y):
+        """格子左上角的屏幕坐标 (标量或数组)"""
+        return (x - self.x0) * self.scale, (y - self.y0) * self.scale
+
+    def to_cell(self, px, py):
+        """屏幕坐标所在的格子"""
+        return math.floor(self.x0 + px / self.scale), math.floor(self.y0 + py / self.scale)
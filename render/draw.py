@@ -0,0 +1,258 @@
+# render/draw.py
+import numpy as np
+import pygame
+from configs.settings import *
+from render.camera import Camera
+
+
+CELL_COLORS = {
+    0: COLOR_EMPTY,
+    1: COLOR_TREE,
+    2: COLOR_FIRE,
+    3: COLOR_WALL,
+    4: COLOR_BURNT,
+    5: COLOR_DEPOT,
+    6: COLOR_EXTINGUISHED,
+}
+
+
+# 状态编号 -> RGB 调色板，整块网格一次查表上色
+PALETTE = np.array([CELL_COLORS[state] for state in range(len(CELL_COLORS))], dtype=np.uint8)
+
+
+def downsample_grid(grid, block):
+    """
+    按 block x block 聚合网格 (缩小视图用)：块内有火则为火，否则取块内出现最多的状态。
+    地图边缘不足一块的部分只统计实际存在的格子。
+    """
+    w, h = grid.shape
+    bw, bh = -(-w // block), -(-h // block)
+    padded = np.full((bw * block, bh * block), -1, dtype=np.int64)
+    padded[:w, :h] = grid
+    # 每格的 (块编号, 状态) 组合键，一次 bincount 得到各块的状态计数 (槽 0 为填充)
+    n_states = len(PALETTE) + 1
+    block_ids = np.arange(bw * bh).reshape(bw, 1, bh, 1) * n_states
+    keys = block_ids + padded.reshape(bw, block, bh, block) + 1
+    counts = np.bincount(keys.ravel(), minlength=bw * bh * n_states).reshape(bw, bh, n_states)[..., 1:]
+    out = counts.argmax(axis=2)
+    out[counts[..., 2] > 0] = 2
+    return out
+
+
+class _GridCache:
+    """同一快照、同一视口下复用已缩放好的网格图层 (渲染帧率高于仿真帧率时常见)"""
+    key = None
+    image = None
+
+
+def draw_grid(surface, snap, camera):
+    """只绘制视口内的格子；缩小到每格不足 CAMERA_LOD_CELL_PIXELS 像素时按块聚合"""
+    x_lo, x_hi, y_lo, y_hi = camera.visible_cells()
+    if x_lo >= x_hi or y_lo >= y_hi:
+        return
+    block = camera.lod_block
+    x_lo -= x_lo % block  # 块与世界坐标对齐，平移时不闪烁
+    y_lo -= y_lo % block
+    key = (snap.frame, x_lo, x_hi, y_lo, y_hi, block, camera.scale)
+    if _GridCache.key != key:
+        cells = snap.grid[x_lo:x_hi, y_lo:y_hi]
+        if block > 1:
+            cells = downsample_grid(cells, block)
+        size = (
+            max(1, round(cells.shape[0] * block * camera.scale)),
+            max(1, round(cells.shape[1] * block * camera.scale)),
+        )
+        image = pygame.surfarray.make_surface(PALETTE[cells])
+        _GridCache.key, _GridCache.image = key, pygame.transform.scale(image, size)
+    px, py = camera.to_screen(x_lo, y_lo)
+    surface.blit(_GridCache.image, (round(px), round(py)))
+
+
+def draw_robots(surface, snap, font, camera):
+    s = camera.scale
+    half = s / 2
+    detail = s >= CELL_SIZE / 2  # 缩得太小时不画电量 / 水量条和状态文字
+    for i, status in enumerate(snap.robot_status):
+        x, y = int(snap.robot_x[i]), int(snap.robot_y[i])
+        px, py = camera.to_screen(x, y)
+        path = snap.robot_paths[i]
+        if path:
+            xs, ys = zip(*path)
+            if camera.visible(min(min(xs), x), min(min(ys), y), max(max(xs), x), max(max(ys), y)):
+                pts = [(px + half, py + half)] + [
+                    (sx + half, sy + half)
+                    for sx, sy in zip(*camera.to_screen(np.array(xs), np.array(ys)))
+                ]
+                pygame.draw.lines(surface, COLOR_UGV, False, pts, 1)
+
+        if not camera.visible(x, y, x, y):
+            continue
+        pad = s / 10
+        rect_color = COLOR_UGV if status != "STRANDED" else (100, 100, 100)
+        pygame.draw.rect(
+            surface, rect_color, (px + pad, py + pad, max(1, s - 2 * pad), max(1, s - 2 * pad))
+        )
+        if not detail:
+            continue
+        bar = s - pad
+        pygame.draw.rect(
+            surface,
+            (0, 255, 0),
+            (px + pad / 2, py - 3, int(bar * snap.robot_battery[i] / snap.max_battery), 2),
+        )
+        pygame.draw.rect(
+            surface,
+            (0, 191, 255),
+            (px + pad / 2, py + s + 1, int(bar * snap.robot_water[i] / snap.max_water), 2),
+        )
+        if status == "IDLE":
+            text = font.render("Wait", True, (255, 255, 255))
+            surface.blit(text, (px, py - 12))
+
+
+class _ScanOverlay:
+    """无人机扫描范围的半透明图层：按像素尺寸预先构建一次，各无人机、各帧共用"""
+    surfaces = {}
+
+    @classmethod
+    def get(cls, size):
+        overlay = cls.surfaces.get(size)
+        if overlay is None:
+            if len(cls.surfaces) > 16:  # 缩放级别变化后旧尺寸不再使用
+                cls.surfaces.clear()
+            overlay = pygame.Surface(size, pygame.SRCALPHA)
+            overlay.fill((0, 191, 255, 30))
+            cls.surfaces[size] = overlay
+        return overlay
+
+
+def draw_drones(surface, snap, camera):
+    s = camera.scale
+    for x, y, radius in zip(snap.drone_x, snap.drone_y, snap.drone_radius):
+        x, y, radius = int(x), int(y), int(radius)
+        if not camera.visible(x - radius, y - radius, x + radius, y + radius):
+            continue
+        px, py = camera.to_screen(x, y)
+        if camera.visible(x, y, x, y):
+            pygame.draw.circle(
+                surface, COLOR_UAV, (px + s / 2, py + s / 2), max(1, s / 2 - 2)
+            )
+        # 绘制扫描范围阴影 (复用预先构建的半透明图层)
+        sx, sy = camera.to_screen(x - radius, y - radius)
+        side = max(1, round((radius * 2 + 1) * s))
+        surface.blit(_ScanOverlay.get((side, side)), (round(sx), round(sy)))
+
+
+def draw_supporter(surface, snap, camera):
+    x, y = snap.supporter
+    if not camera.visible(x, y, x, y):
+        return
+    s = camera.scale
+    padding = s / 10
+    px, py = camera.to_screen(x, y)
+    rect = pygame.Rect(px + padding, py + padding, max(1, s - padding * 2), max(1, s - padding * 2))
+    pygame.draw.rect(surface, COLOR_SUPPORT, rect)
+
+
+# 绘制侧边栏
+def draw_sidebar(surface, snap, font, camera):
+    pygame.draw.rect(
+        surface, (40, 40, 40), (GRID_WIDTH * CELL_SIZE, 0, SIDEBAR_WIDTH, WINDOW_HEIGHT)
+    )
+    w = snap.weights
+    info = [
+        f"--- ECO GUARDIAN 2.0 ---",
+        f"Gen: {snap.generation} | Frame: {snap.individual}",
+        f"Extinguished: {snap.extinguished}",
+        f"Discovered Fires: {snap.discovered_count}",
+        f"Penalty: {snap.penalty:.1f}",
+        f"Warp: {snap.warp_label} | Sim Frame: {snap.frame}",
+        f"Zoom: {camera.scale / CELL_SIZE:.2f}x | LOD: {camera.lod_block}",
+        f"------------------------",
+        f"ML Weights (Normalized):",
+        f"W_Prox: {w[0]:.3f}",
+        f"W_Sev:  {w[1]:.3f}",
+        f"W_Bat:  {w[2]:.3f}",
+        f"W_Wat:  {w[3]:.3f}",
+        f"W_Obs:  {w[4]:.3f}",
+        f"W_Wnd:  {w[5]:.3f}",  # 显示风向权重
+        f"------------------------",
+        f"LOGS:",
+    ] + list(snap.logs)
+    for i, text in enumerate(info):
+        surface.blit(
+            font.render(text, True, (200, 200, 200)),
+            (GRID_WIDTH * CELL_SIZE + 10, 20 + i * 22),
+        )
+
+
+def render(screen, snap, fonts, camera=None):
+    if camera is None:
+        camera = Camera(snap.width, snap.height)
+    screen.fill(COLOR_BG)
+    # 地图层只画在视口内，不覆盖侧边栏
+    screen.set_clip(camera.rect)
+    draw_grid(screen, snap, camera)
+    draw_robots(screen, snap, fonts["small"], camera)
+    draw_drones(screen, snap, camera)
+    draw_supporter(screen, snap, camera)
+    screen.set_clip(None)
+    draw_sidebar(screen, snap, fonts["sidebar"], camera)
+
+
+def create_fonts():
+    return {
+        "small": pygame.font.SysFont("Arial", 10),
+        "sidebar": pygame.font.SysFont("Arial", 14),
+    }
+
+
+# 时间加速快捷键：1/2/3/4 -> 1x/4x/16x/max，A -> 自适应
+WARP_KEYS = {
+    pygame.K_1: (1,),
+    pygame.K_2: (4,),
+    pygame.K_3: (16,),
+    pygame.K_4: ("max",),
+    pygame.K_a: ("max", True),
+}
+
+# 视口操作：方向键平移，滚轮 / +/- 缩放，右键或中键拖动平移，Home 显示整张地图
+CAMERA_PAN_KEYS = {
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+}
+CAMERA_ZOOM_STEP = 1.25
+
+
+def handle_camera_event(camera, event):
+    """处理视口相关的输入事件，返回是否已处理"""
+    if event.type == pygame.MOUSEWHEEL:
+        mx, my = pygame.mouse.get_pos()
+        if camera.contains_screen(mx, my):
+            camera.zoom(CAMERA_ZOOM_STEP ** event.y, mx, my)
+        return True
+    if event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+        camera.pan(-event.rel[0], -event.rel[1])
+        return True
+    if event.type == pygame.KEYDOWN:
+        if event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            camera.zoom(CAMERA_ZOOM_STEP)
+            return True
+        if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            camera.zoom(1 / CAMERA_ZOOM_STEP)
+            return True
+        if event.key == pygame.K_HOME:
+            camera.fit()
+            return True
+    return False
+
+
+def pan_camera_keys(camera):
+    """按住方向键时每帧平移 CAMERA_PAN_SPEED 像素"""
+    pressed = pygame.key.get_pressed()
+    dx = sum(d[0] for key, d in CAMERA_PAN_KEYS.items() if pressed[key])
+    dy = sum(d[1] for key, d in CAMERA_PAN_KEYS.items() if pressed[key])
+    if dx or dy:
+        camera.pan(dx * CAMERA_PAN_SPEED, dy * CAMERA_PAN_SPEED)
@@ -0,0 +1,50 @@
+# render/plots.py
+import os
+import numpy as np
+
+
+def save_weight_chart(history, frame, generation, save_dir="plots"):
+    """生成并保存当前的权重进化图"""
+    if not history:
+        return
+
+    # 确保目录存在
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+
+    # 准备数据
+    data_np = np.array(history)
+    x_axis = np.arange(len(history))
+
+    # matplotlib 只在真正绘图时才导入，无头仿真不为它付出启动开销
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # 设置绘图风格
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(10, 6))  # 图片大小 10x6 英寸
+
+    # 定义颜色和标签
+    labels = ["Prox (Dist)", "Sev (Fire)", "Bat", "Wat", "Wind", "Obs"]
+    indices = [0, 1, 2, 3, 5, 4]
+    colors = ["#ff3333", "#ffaa00", "#00ff00", "#3399ff", "#00ffff", "#aa66ff"]
+
+    # 绘制线条
+    for i, idx in enumerate(indices):
+        ax.plot(x_axis, data_np[:, i], label=labels[i], color=colors[i], linewidth=1.5)
+
+    # 设置装饰
+    ax.set_title(f"EcoGuardian ML Weights Evolution (Gen {generation} - Frame {frame})")
+    ax.set_xlabel("Simulation Frames")
+    ax.set_ylabel("Weight Value")
+    ax.set_ylim(-0.8, 1.2)  # 固定 Y 轴范围
+    ax.grid(True, linestyle="--", alpha=0.3)
+    ax.legend(loc="upper right")
+
+    # 保存文件
+    filename = f"{save_dir}/gen_{generation}_frame_{frame}.png"
+    plt.savefig(filename, dpi=100)
+    plt.close(fig)  # 关闭图表释放内存
+    print(f"[System] 📸 Chart saved to {filename}")
@@ -0,0 +1,69 @@
+"""
+条带分解火势后端的校验与扩展性基准：
+同一张大地图、同一随机种子，分别用 serial 与 1..N 个 worker 推进若干火势刻，
+校验各状态数组与 serial 完全一致，并报告每刻耗时与相对单 worker 的加速比。
+
+用法: python scripts/bench_domain.py [--size 1500] [--ticks 20] [--workers 1 2 4 8]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.domain import FireDomain  # noqa: E402
+from core.grid_map import GridMap  # noqa: E402
+
+
+def run(size, ticks, workers, fires):
+    random.seed(0)
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(size, size)
+        for _ in range(fires):
+            env.ignite_random()
+    domain = FireDomain(env, workers, seed=1)
+    try:
+        domain.tick()  # 预热 (worker 启动、页面映射)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            domain.tick()
+        per_tick = (time.perf_counter() - start) / ticks
+        state = [np.array(a) for a in domain.arrays]
+    finally:
+        domain.close()
+    return per_tick, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1500, help="地图边长 (格)")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--fires", type=int, default=200, help="初始火点数")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args(argv)
+
+    print(f"map {args.size}x{args.size} ({args.size * args.size / 1e6:.1f}M cells), "
+          f"{args.ticks} ticks, {os.cpu_count()} cores")
+    serial_time, reference = run(args.size, args.ticks, 0, args.fires)
+    print(f"{'serial':>8}: {serial_time * 1000:8.1f} ms/tick")
+    ok, base = True, None
+    for workers in args.workers:
+        per_tick, state = run(args.size, args.ticks, workers, args.fires)
+        same = all(np.array_equal(a, b) for a, b in zip(reference, state))
+        ok &= same
+        base = base or per_tick
+        print(f"{workers:>8}: {per_tick * 1000:8.1f} ms/tick  speedup {base / per_tick:5.2f}x"
+              f"  {'matches serial' if same else 'MISMATCH'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
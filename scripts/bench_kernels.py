@@ -0,0 +1,127 @@
+"""
+网格内核校验与基准：
+对每个内核比较逐格循环参考实现、NumPy 实现与 numba 实现 (若已安装) 的结果，
+任何不一致都以非零状态退出；随后报告各实现的单次耗时与相对逐格循环的加速比。
+
+用法: python scripts/bench_kernels.py [--repeat 200]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import kernels  # noqa: E402
+from core.grid_map import GridMap  # noqa: E402
+from core.pathfinding import GridAStar, build_cost_grid  # noqa: E402
+
+
+def make_world(seed=0, fire_ratio=0.15):
+    """一张带随机火点的标准地图"""
+    random.seed(seed)
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap()
+    trees = np.argwhere(env.grid == 1)
+    burning = trees[np.random.random(len(trees)) < fire_ratio]
+    env.grid[burning[:, 0], burning[:, 1]] = 2
+    return env
+
+
+def timed(fn, repeat):
+    fn()  # 预热 (numba 首次调用会触发编译)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6  # 微秒
+
+
+def same_result(a, b):
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    if isinstance(a, tuple):
+        return len(a) == len(b) and all(same_result(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def check(name, results):
+    reference = results[0][1]
+    for label, value in results[1:]:
+        same = same_result(value, reference)
+        if not same:
+            print(f"MISMATCH in {name}: {label} differs from loops")
+            return False
+    return True
+
+
+def cases(env):
+    """(内核名, {实现名: 无参调用}) 列表"""
+    compiled = kernels.numba_kernels()
+    w, h = env.width, env.height
+    grid = env.grid
+    fire_x, fire_y = np.nonzero(grid == 2)
+    centers = [(random.randrange(w), random.randrange(h)) for _ in range(32)]
+    offsets = kernels.NEIGHBOR_OFFSETS
+
+    def per_center(fn, r):
+        return lambda: np.stack([fn(grid, cx, cy, r) for cx, cy in centers])
+
+    yield "spread_candidates", {
+        "loops": lambda: kernels._spread_candidates_loops(grid, fire_x, fire_y, offsets),
+        "numpy": lambda: kernels._spread_candidates_numpy(grid, fire_x, fire_y, offsets),
+        "numba": compiled and (lambda: compiled["spread_candidates"](grid, fire_x, fire_y, offsets)),
+    }
+    yield "window_fire (x32)", {
+        "loops": per_center(kernels._window_fire_loops, 6),
+        "numpy": per_center(kernels._window_fire_numpy, 6),
+        "numba": compiled and per_center(compiled["window_fire"], 6),
+    }
+
+    # A*：GridAStar (纯 Python 扁平引擎) 作为基线，numba 版必须返回完全相同的路径
+    cost = build_cost_grid(grid, has_water=False)
+    pairs = []
+    while len(pairs) < 16:
+        a = (random.randrange(w), random.randrange(h))
+        b = (random.randrange(w), random.randrange(h))
+        if cost[a[0] * h + a[1]] >= 0:
+            pairs.append((a, b))
+    engine = GridAStar()
+    view = memoryview(cost)
+    yield "astar (x16)", {
+        "loops": lambda: [engine.search(view, w, h, a, b) for a, b in pairs],
+        "numba": compiled and (lambda: [kernels.astar_path(cost, w, h, a, b) for a, b in pairs]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"numba: {'available' if kernels.numba_kernels() else 'not installed'} | "
+          f"active backend: {'numba' if kernels.use_numba() else 'numpy'}")
+    print(f"{'kernel':<20}{'loops us':>12}{'numpy us':>12}{'numba us':>12}{'numpy x':>10}{'numba x':>10}")
+    ok = True
+    for seed, env in enumerate(make_world(seed) for seed in range(3)):
+        for name, impls in cases(env):
+            impls = {k: v for k, v in impls.items() if v}
+            ok &= check(name, [(label, fn()) for label, fn in impls.items()])
+            if seed:
+                continue  # 其余地图只做一致性校验
+            times = {label: timed(fn, args.repeat) for label, fn in impls.items()}
+            base = times["loops"]
+            cells = [f"{times[k]:>12.1f}" if k in times else f"{'-':>12}" for k in ("loops", "numpy", "numba")]
+            ratios = [f"{base / times[k]:>9.1f}x" if k in times else f"{'-':>10}" for k in ("numpy", "numba")]
+            print(f"{name:<20}" + "".join(cells) + "".join(ratios))
+    print("OK: all backends agree" if ok else "FAILED: backend results differ")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+状态流的校验与基准：
+1. 无头仿真 + StateStreamer + 本地看板 (StreamDecoder)，推进若干帧后校验看板还原的网格与 Agent 表
+   与仿真完全一致，并报告平均消息大小与仿真线程侧 capture() 的耗时
+2. 大地图上比较每个火势刻的增量帧与关键帧大小，说明增量开销随变化量而非地图大小增长
+
+用法: python scripts/bench_stream.py [--frames 3000] [--size 1000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.grid_map import GridMap  # noqa: E402
+from core.simulation import Simulation  # noqa: E402
+from core.stream import (  # noqa: E402
+    AGENT_DTYPE, StateStreamer, StreamDecoder, agent_table, encode_delta, encode_keyframe,
+)
+
+
+def check_roundtrip(frames, batch):
+    random.seed(0)
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulation()
+        streamer = StateStreamer(sim)
+        streamer.start()
+        decoder = StreamDecoder()
+        sock = socket.create_connection(streamer.address)
+        received = threading.Thread(target=lambda: _receive(sock, decoder), daemon=True)
+        received.start()
+
+        capture_time = 0.0
+        captures = 0
+        while sim.frame < frames:
+            for _ in range(batch):
+                sim.step()
+            start = time.perf_counter()
+            streamer.capture(sim)
+            capture_time += time.perf_counter() - start
+            captures += 1
+            time.sleep(0.001)  # 让出 GIL，模拟节流的仿真线程
+        while decoder.frame != sim.frame:  # 等待最后一帧送达
+            time.sleep(0.01)
+        streamer.stop()
+        streamer.join()
+        sock.close()
+
+    same_grid = np.array_equal(decoder.grid, sim.env.grid)
+    same_agents = np.array_equal(decoder.agents, agent_table(sim))
+    print(f"sim {sim.env.width}x{sim.env.height}, {sim.frame} frames, {streamer.messages} messages, "
+          f"{streamer.resyncs} resyncs")
+    print(f"  avg message {streamer.bytes_encoded / max(1, streamer.messages):8.1f} B"
+          f"  (keyframe {len(encode_keyframe(sim.frame, sim.env.grid, agent_table(sim)))} B)"
+          f"  capture {capture_time / captures * 1e6:6.1f} us")
+    print(f"  viewer grid {'matches' if same_grid else 'DIFFERS'}, "
+          f"agents {'match' if same_agents else 'DIFFER'}")
+    return same_grid and same_agents
+
+
+def _receive(sock, decoder):
+    with contextlib.suppress(OSError):
+        while True:
+            data = sock.recv(1 << 16)
+            if not data:
+                return
+            decoder.feed(data)
+
+
+def delta_scaling(size, ticks):
+    random.seed(0)
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(size, size)
+        for _ in range(50):
+            env.ignite_random()
+        env.track_changes = True
+        env.drain_changed_cells()
+        no_agents = np.zeros(0, dtype=AGENT_DTYPE)
+        delta_bytes, encode_time = 0, 0.0
+        for _ in range(ticks):
+            env.update_fire_spread()
+            start = time.perf_counter()
+            cells = env.drain_changed_cells()
+            delta_bytes += len(encode_delta(0, size, size, cells, env.grid.ravel()[cells], no_agents))
+            encode_time += time.perf_counter() - start
+        start = time.perf_counter()
+        key_bytes = len(encode_keyframe(0, env.grid, no_agents))
+        key_time = time.perf_counter() - start
+    print(f"map {size}x{size}: delta {delta_bytes / ticks:10.0f} B/tick ({encode_time / ticks * 1e3:.2f} ms)"
+          f"  keyframe {key_bytes:10d} B ({key_time * 1e3:.2f} ms)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--batch", type=int, default=4, help="每次 capture 之间推进的帧数")
+    parser.add_argument("--size", type=int, default=1000, help="大地图边长 (格)")
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args(argv)
+    ok = check_roundtrip(args.frames, args.batch)
+    delta_scaling(args.size, args.ticks)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
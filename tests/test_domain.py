@@ -0,0 +1,50 @@
+"""FireDomain.close()：状态复制回普通数组并删除共享内存段，外部仍持有共享数组视图时也不报错"""
+import contextlib
+import io
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from core import domain
+from core.domain import FireDomain
+from core.grid_map import GridMap
+
+
+def make_domain(workers):
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(30, 20)
+        FireDomain(env, workers, seed=0)
+        for _ in range(5):
+            env.update_fire_spread()
+    return env
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_close_copies_state_back(workers):
+    env = make_domain(workers)
+    names = [b.name for b in env.domain._blocks]
+    grid = env.grid.copy()
+    env.domain.close()
+    assert env.domain is None
+    assert np.array_equal(env.grid, grid)
+    assert not any(block.name in names for block, _ in domain._pending_blocks)  # 映射均已关闭
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_close_with_live_view():
+    env = make_domain(0)
+    view = env.grid[2:5]  # 例如异常回溯中残留的条带局部变量
+    name = env.domain._blocks[0].name
+    env.domain.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    assert len(domain._pending_blocks) == 1  # grid 的映射尚未关闭，视图仍可安全读取
+    assert view.sum() >= 0
+
+    # 视图释放后，下一次 close() 释放遗留的映射
+    del view
+    make_domain(0).domain.close()
+    assert domain._pending_blocks == []
@@ -0,0 +1,76 @@
+"""
+静默期快进：精确模式 (GridMap.quiet_fire_tick) 与逐刻 update_fire_spread 的状态与随机数消耗一致；
+默认的闭式快进预定的自燃在抽到的那一刻点燃
+"""
+import contextlib
+import io
+import random
+
+import numpy as np
+import pytest
+
+from core.domain import FireDomain
+from core.grid_map import GridMap
+
+TICKS = 40
+
+
+def run(seed, workers, quiet):
+    """推进 TICKS 个火势刻，quiet=True 时无火的刻尽量走 quiet_fire_tick；返回逐刻状态与最终随机数状态"""
+    random.seed(seed)
+    np.random.seed(seed)
+    states, refused = [], 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(30, 20)
+        env.grid[env.grid == 2] = 1
+        env.dryness_grid[env.grid == 1] += 95  # 几刻之后就会自燃
+        if workers is not None:
+            FireDomain(env, workers, seed=seed)
+        for _ in range(TICKS):
+            if quiet and not np.any(env.grid == 2):
+                if env.quiet_fire_tick():
+                    states.append((env.fire_tick, env.grid.copy(), env.dryness_grid.copy()))
+                    continue
+                refused += 1  # 本刻会自燃，交给正常推进
+            env.update_fire_spread()
+            states.append((env.fire_tick, env.grid.copy(), env.dryness_grid.copy()))
+        if env.domain is not None:
+            env.domain.close()
+    return states, np.random.get_state()[1], refused
+
+
+@pytest.mark.parametrize("workers", [None, 0])
+@pytest.mark.parametrize("seed", range(3))
+def test_quiet_ticks_match_stepping(seed, workers):
+    stepped, stepped_rng, _ = run(seed, workers, quiet=False)
+    quiet, quiet_rng, refused = run(seed, workers, quiet=True)
+    assert refused  # 至少有一刻因自燃被拒绝快进
+    for (tick_a, grid_a, dry_a), (tick_b, grid_b, dry_b) in zip(stepped, quiet):
+        assert tick_a == tick_b
+        assert np.array_equal(grid_a, grid_b)
+        assert np.array_equal(dry_a, dry_b)
+    assert np.array_equal(stepped_rng, quiet_rng)
+
+
+@pytest.mark.parametrize("workers", [None, 0])
+def test_closed_form_ignition_fires_on_sampled_tick(workers):
+    random.seed(0)
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(30, 20)
+        env.grid[env.grid == 2] = 1
+        env.dryness_grid[env.grid == 1] += 90
+        if workers is not None:
+            FireDomain(env, workers, seed=0)
+        k, cells = env.sample_spontaneous_ignition()
+        assert k >= 1 and len(cells)
+        env.forced_ignition = cells
+        env.skip_fire_ticks(k - 1)
+        env.advance_dryness(k - 1)
+        assert not np.any(env.grid == 2)
+        env.update_fire_spread()
+        assert env.forced_ignition is None
+        assert np.all(env.grid.ravel()[cells] == 2)
+        assert env.fire_tick == k
+        if env.domain is not None:
+            env.domain.close()
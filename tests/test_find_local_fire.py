@@ -0,0 +1,109 @@
+"""Robot.find_local_fire 的向量化实现与原逐格循环版的结果一致性"""
+import contextlib
+import io
+import random
+
+import numpy as np
+import pytest
+
+from agents.robot import RobotFleet
+from core.grid_map import GridMap
+
+
+def find_local_fire_loop(robot, grid_map, neighbors=None, search_radius=6, dynamic_radius=2):
+    """user-035 之前的逐格循环实现 (参考实现)"""
+    candidates = []
+    social_r = dynamic_radius
+    for dx in range(-search_radius, search_radius + 1):
+        for dy in range(-search_radius, search_radius + 1):
+            if dx == 0 and dy == 0:
+                continue
+            nx, ny = robot.x + dx, robot.y + dy
+            if grid_map.get_state(nx, ny) == 2:
+                is_taken = False
+                if neighbors:
+                    for other_bot in neighbors:
+                        if other_bot.id == robot.id:
+                            continue
+                        if other_bot.target:
+                            t_dist = abs(other_bot.target[0] - nx) + abs(other_bot.target[1] - ny)
+                            if t_dist <= social_r:
+                                is_taken = True
+                                break
+                        p_dist = abs(other_bot.x - nx) + abs(other_bot.y - ny)
+                        if p_dist <= social_r:
+                            is_taken = True
+                            break
+                if not is_taken:
+                    candidates.append((abs(dx) + abs(dy), (nx, ny)))
+    if candidates:
+        candidates.sort(key=lambda c: c[0])
+        return candidates[0][1]
+    return None
+
+
+def make_map(rng, width, height, fire_ratio):
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(width, height)
+    env.grid[...] = rng.choice([0, 1, 3], size=(width, height))
+    env.grid[rng.random((width, height)) < fire_ratio] = 2
+    return env
+
+
+def make_team(rng, env, n):
+    fleet = RobotFleet()
+    team = []
+    for i in range(n):
+        bot = fleet.add(i, int(rng.integers(env.width)), int(rng.integers(env.height)))
+        if rng.random() < 0.6:
+            bot.target = (int(rng.integers(env.width)), int(rng.integers(env.height)))
+        team.append(bot)
+    return team
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_loop_on_random_grids(seed):
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    env = make_map(rng, int(rng.integers(5, 30)), int(rng.integers(5, 30)), rng.uniform(0.02, 0.4))
+    team = make_team(rng, env, int(rng.integers(1, 5)))
+    for bot in team:
+        for radius, social in ((6, 2), (int(rng.integers(1, 9)), int(rng.integers(0, 5)))):
+            for neighbors in (None, team):
+                expected = find_local_fire_loop(bot, env, neighbors, radius, social)
+                got = bot.find_local_fire(env, neighbors, search_radius=radius, dynamic_radius=social)
+                assert got == expected
+
+
+@pytest.mark.parametrize("corner", [(0, 0), (19, 0), (0, 14), (19, 14), (10, 0), (0, 7)])
+def test_matches_loop_at_map_edges(corner):
+    rng = np.random.default_rng(sum(corner))
+    env = make_map(rng, 20, 15, 0.3)
+    team = make_team(rng, env, 3)
+    bot = team[0]
+    bot.x, bot.y = corner
+    for neighbors in (None, team):
+        expected = find_local_fire_loop(bot, env, neighbors)
+        assert bot.find_local_fire(env, neighbors) == expected
+
+
+def test_no_fire_returns_none():
+    rng = np.random.default_rng(0)
+    env = make_map(rng, 20, 15, 0.0)
+    team = make_team(rng, env, 3)
+    assert find_local_fire_loop(team[0], env, team) is None
+    assert team[0].find_local_fire(env, team) is None
+
+
+def test_own_cell_and_fully_claimed_fires_are_skipped():
+    rng = np.random.default_rng(1)
+    env = make_map(rng, 20, 15, 0.0)
+    team = make_team(rng, env, 2)
+    bot, mate = team
+    bot.x, bot.y = 5, 5
+    env.grid[5, 5] = 2  # 自身所在格不算
+    env.grid[8, 5] = 2
+    mate.x, mate.y, mate.target = 15, 12, (8, 6)  # 队友目标覆盖唯一的火点
+    assert bot.find_local_fire(env, team) is None
+    assert find_local_fire_loop(bot, env, team) is None
+    assert bot.find_local_fire(env) == (8, 5)
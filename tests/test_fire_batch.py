@@ -0,0 +1,45 @@
+"""BatchFireSimulator 与 GridMap 共用方向权重规则，逐格风场与蔓延系数生效"""
+import numpy as np
+
+from core.fire_batch import BatchFireSimulator
+from core.grid_map import direction_weights
+from configs.settings import FIRE_SPREAD_PROB, WIND_STRENGTH
+
+
+def seeds(n):
+    return np.random.SeedSequence(7).spawn(n)
+
+
+def test_uniform_wind_matches_direction_weights():
+    sim = BatchFireSimulator(3, 20, 15, seeds=seeds(3), winds=[(1, 0), (0, -1), (-1, 1)])
+    for i, (u, v) in enumerate(sim.wind_directions):
+        probs = direction_weights(np.full((20, 15), u), np.full((20, 15), v), np.ones((20, 15)),
+                                  FIRE_SPREAD_PROB, WIND_STRENGTH)
+        with np.errstate(divide="ignore"):
+            assert np.array_equal(sim.log_survival[:, i], np.log1p(-np.minimum(probs, 1.0)))
+
+
+def test_per_cell_fields_match_direction_weights():
+    rng = np.random.default_rng(0)
+    wind_u, wind_v = rng.uniform(-1, 1, (2, 2, 20, 15))  # 逐场景风场
+    modifier = rng.uniform(0, 2, (20, 15))  # 所有场景共用
+    sim = BatchFireSimulator(2, 20, 15, seeds=seeds(2), wind_u=wind_u, wind_v=wind_v,
+                             spread_modifier=modifier)
+    for i in range(2):
+        probs = direction_weights(wind_u[i], wind_v[i], modifier, FIRE_SPREAD_PROB, WIND_STRENGTH)
+        with np.errstate(divide="ignore"):
+            assert np.array_equal(sim.log_survival[:, i], np.log1p(-np.minimum(probs, 1.0)))
+
+
+def test_zero_modifier_stops_spread():
+    modifier = np.ones((30, 20))
+    modifier[15:] = 0.0  # 右半边不可燃
+    sim = BatchFireSimulator(4, 30, 20, seeds=seeds(4), n_ignitions=0, spread_modifier=modifier)
+    sim.grid[:, :15][sim.grid[:, :15] == 1] = 2  # 左半边全部着火
+    sim.dryness_grid[:] = 0
+    burned_right = sim.grid[:, 15:] == 2
+    for _ in range(30):
+        sim.update_fire_spread()
+        burned_right |= sim.grid[:, 15:] == 2
+    # 右半边只可能自燃，不会被左半边蔓延引燃 (自燃前干燥度需要越过阈值)
+    assert not burned_right.any()
@@ -0,0 +1,63 @@
+"""GridMap.label_fire_clusters：火团编号及格数 / 质心 / 包围盒与洪水填充参考结果一致"""
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from core.grid_map import GridMap
+
+
+def flood_clusters(fire):
+    """逐格 8 连通洪水填充，返回每个火团的成员坐标集合"""
+    w, h = fire.shape
+    seen = np.zeros_like(fire)
+    clusters = []
+    for x in range(w):
+        for y in range(h):
+            if not fire[x, y] or seen[x, y]:
+                continue
+            stack, members = [(x, y)], set()
+            seen[x, y] = True
+            while stack:
+                cx, cy = stack.pop()
+                members.add((cx, cy))
+                for nx in range(max(0, cx - 1), min(w, cx + 2)):
+                    for ny in range(max(0, cy - 1), min(h, cy + 2)):
+                        if fire[nx, ny] and not seen[nx, ny]:
+                            seen[nx, ny] = True
+                            stack.append((nx, ny))
+            clusters.append(members)
+    return clusters
+
+
+@pytest.mark.parametrize("density", [0.05, 0.3, 0.7])
+@pytest.mark.parametrize("seed", range(5))
+def test_cluster_stats_match_flood_fill(seed, density):
+    rng = np.random.default_rng(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(23, 17)
+    env.grid[:] = np.where(rng.random((23, 17)) < density, 2, 1)
+    clusters = env.label_fire_clusters()
+
+    expected = flood_clusters(env.grid == 2)
+    assert len(clusters) == len(expected)
+    by_members = {frozenset(divmod(int(i), 17) for i in c.cells): c for c in clusters}
+    for members in expected:
+        cluster = by_members[frozenset(members)]
+        xs, ys = np.array(sorted(members)).T
+        assert cluster.size == len(members)
+        assert cluster.centroid == pytest.approx((xs.mean(), ys.mean()))
+        assert cluster.bbox == (xs.min(), ys.min(), xs.max(), ys.max())
+        assert np.all(env.fire_labels[xs, ys] == cluster.label)
+
+
+def test_no_fire_clears_clusters():
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(10, 8)
+    env.grid[:] = 1
+    env.grid[2, 3] = 2
+    assert len(env.label_fire_clusters()) == 1
+    env.grid[2, 3] = 4
+    assert env.label_fire_clusters() == []
+    assert not env.fire_labels.any()
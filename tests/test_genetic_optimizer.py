@@ -0,0 +1,70 @@
+"""GeneticOptimizer 的记忆化：冠军定期重新仿真，记忆表保存多次评估的均值"""
+import contextlib
+import io
+import random
+
+from core.genetic_optimizer import GeneticOptimizer
+
+
+def run(ga, generations, score):
+    """模拟仿真循环：每次评估给当前个体一个由 score(genome) 给出的灭火数，返回被仿真的基因键序列"""
+    simulated = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while ga.generation <= generations:
+            genome = ga.get_current_genome()
+            assert genome.crowded_frames == 0  # 重新仿真前已清空上次的统计
+            simulated.append(genome.key())
+            genome.extinguished_count = score(genome)
+            genome.crowded_frames += 1
+            ga.next_step()
+    return simulated
+
+
+def test_elite_is_reevaluated_with_running_mean():
+    random.seed(0)
+    ga = GeneticOptimizer(pop_size=3, elite_reeval_interval=2)
+    scores = {}
+
+    def score(genome):
+        value = random.randint(0, 10)
+        scores.setdefault(genome.key(), []).append(value * 20.0 - 15.0)  # evaluate_fitness 的结果
+        return value
+
+    simulated = run(ga, 8, score)
+    assert any(len(values) > 1 for values in scores.values())  # 冠军被再次仿真
+    for key, values in scores.items():
+        mean, count = ga.memo[key]
+        assert count == len(values) == simulated.count(key)
+        assert abs(mean - sum(values) / len(values)) < 1e-9
+    assert ga.best_fitness() == max(mean for mean, _ in ga.memo.values())
+
+
+def test_no_reevaluation_when_disabled():
+    random.seed(0)
+    ga = GeneticOptimizer(pop_size=3, elite_reeval_interval=0)
+    simulated = run(ga, 6, lambda g: 5)
+    assert len(simulated) == len(set(simulated))
+    assert all(count == 1 for _, count in ga.memo.values())
+
+
+def test_population_stays_full_and_every_generation_simulates():
+    random.seed(3)
+    ga = GeneticOptimizer(pop_size=4, elite_reeval_interval=0)
+    generations = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(40):
+            generations.append(ga.generation)
+            assert len(ga.population) == 4
+            ga.get_current_genome().extinguished_count = 5
+            ga.next_step()
+    # 每一代至少真实仿真了一个个体，代数不会跳号
+    assert all(b - a in (0, 1) for a, b in zip(generations, generations[1:]))
+    assert ga.simulated_count == 40
+
+
+def test_single_individual_population_reevaluates_elite():
+    random.seed(0)
+    ga = GeneticOptimizer(pop_size=1)
+    simulated = run(ga, 5, lambda g: 3)
+    assert len(simulated) == 5 and len(set(simulated)) == 1
+    assert ga.memo[simulated[0]][1] == 5
@@ -0,0 +1,67 @@
+"""GridMap：单进程火势推进只为火点邻近的树抽随机数；灭火意图的认领去重"""
+import contextlib
+import io
+
+import numpy as np
+
+from core.grid_map import GridMap
+
+
+def quiet_map(w, h, **kwargs):
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(w, h, **kwargs)
+    env.grid[:] = 1
+    env.fuel_grid[:] = 10
+    env.dryness_grid[:] = 0
+    return env
+
+
+def test_spread_ignites_exactly_the_neighbours_when_certain():
+    env = quiet_map(12, 9, spread_prob=1.0, wind_strength=0.0)
+    env.grid[0, 0] = env.grid[6, 4] = 2
+    env.grid[5, 3] = 3
+    before = env.grid.copy()
+    env.update_fire_spread()
+    expected = before.copy()
+    for x, y in ((0, 0), (6, 4)):
+        window = expected[max(0, x - 1):x + 2, max(0, y - 1):y + 2]
+        window[window == 1] = 2
+    assert np.array_equal(env.grid, expected)
+    assert np.all(env.fuel_grid[[0, 6], [0, 4]] == 9)
+
+
+def test_spread_draws_one_random_per_candidate():
+    env = quiet_map(30, 20, spread_prob=0.0)
+    env.grid[10, 10] = 2
+    env.update_dryness = lambda: None  # 只看蔓延消耗的随机数
+    state = np.random.get_state()
+    env.update_fire_spread()
+    after = np.random.random()
+    np.random.set_state(state)
+    np.random.random(8)  # 一个火点、8 棵相邻的树
+    assert np.random.random() == after
+
+
+def resolve(env, *intents):
+    """按顺序登记 (x, y, budget) 意图并结算，返回各意图的用水量"""
+    used = []
+    for x, y, budget in intents:
+        env.queue_extinguish([x], [y], budget=budget, on_resolved=lambda part: used.append(int(part[0])))
+    env.resolve_actions()
+    return used
+
+
+def test_shared_fire_is_charged_to_first_claimant_only():
+    env = quiet_map(10, 8)
+    env.grid[4, 3:6] = 2
+    assert resolve(env, (3, 4, 10), (5, 4, 10)) == [3, 0]
+    assert np.all(env.grid[4, 3:6] == 6)
+
+
+def test_claim_passes_on_when_first_claimant_runs_dry():
+    env = quiet_map(10, 8)
+    env.grid[4, 3:6] = 2
+    # 第一个意图只够灭 (4, 3)，剩下两格由第二个意图认领
+    assert resolve(env, (3, 4, 1), (5, 4, 10)) == [1, 2]
+    assert np.all(env.grid[4, 3:6] == 6)
@@ -0,0 +1,47 @@
+"""
+进程池 / 批处理 worker 的无头导入：在干净的子进程中导入全部仿真模块并推进若干帧，
+pygame、matplotlib 从未被加载；导入路径上也没有 numba (内核首次选择后端时才按需导入)，
+仓库自身模块的导入耗时在几十毫秒内 (不含 NumPy 本身)
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 100  # 实测约 12 ms，留足余量避免机器抖动误报
+
+CHILD = r"""
+import contextlib, io, json, sys, time
+import numpy
+t0 = time.perf_counter()
+import configs.settings
+import core.grid_map, core.pathfinding, core.predictor, core.genetic_optimizer
+import core.fire_batch, core.simulation
+import agents.base_agent, agents.drone, agents.robot
+import_ms = (time.perf_counter() - t0) * 1000
+
+def loaded(*names):
+    return sorted(m for m in sys.modules if m.split(".")[0] in names)
+
+after_import = loaded("pygame", "matplotlib", "numba", "llvmlite")
+with contextlib.redirect_stdout(io.StringIO()):
+    sim = core.simulation.Simulation()
+    for _ in range(100):
+        sim.step()
+print(json.dumps({"import_ms": import_ms, "after_import": after_import,
+                  "after_steps": loaded("pygame", "matplotlib")}))
+"""
+
+
+def run_child():
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_headless_import():
+    report = run_child()
+    assert report["after_import"] == []
+    assert report["after_steps"] == []
+    assert report["import_ms"] < IMPORT_BUDGET_MS, report["import_ms"]
@@ -0,0 +1,103 @@
+"""core.kernels 各后端 (逐格循环参考实现 / NumPy / numba) 的结果一致性；未安装 numba 时跳过 numba 用例"""
+import random
+
+import numpy as np
+import pytest
+
+from core import kernels
+from core.pathfinding import GridAStar, build_cost_grid
+
+COMPILED = kernels.numba_kernels()
+BACKENDS = [
+    "numpy",
+    pytest.param("numba", marks=pytest.mark.skipif(COMPILED is None, reason="numba is not installed")),
+]
+SHAPES = [(1, 1), (3, 7), (17, 11), (40, 30)]
+
+
+def impl(backend, name):
+    return kernels.NUMPY[name] if backend == "numpy" else COMPILED[name]
+
+
+def random_grid(rng, w, h):
+    return rng.choice([0, 1, 1, 2, 3], size=(w, h))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("w,h", SHAPES)
+def test_spread_candidates(backend, w, h):
+    rng = np.random.default_rng(w * 100 + h)
+    grid = random_grid(rng, w, h)
+    xs, ys = np.nonzero(grid == 2)
+    expected = kernels._spread_candidates_loops(grid, xs, ys, kernels.NEIGHBOR_OFFSETS)
+    got = impl(backend, "spread_candidates")(grid, xs, ys, kernels.NEIGHBOR_OFFSETS)
+    assert all(np.array_equal(a, b) for a, b in zip(got, expected))
+
+    # 每个 (方向, 目标树) 恰好出现一次：目标格减去方向偏移就是一个火点
+    brute = {
+        (k, (x + dx) * h + y + dy)
+        for x, y in zip(xs, ys)
+        for k, (dx, dy) in enumerate(kernels.NEIGHBOR_OFFSETS)
+        if 0 <= x + dx < w and 0 <= y + dy < h and grid[x + dx, y + dy] == 1
+    }
+    assert len(expected[0]) == len(brute)
+    assert set(zip(expected[0].tolist(), expected[1].tolist())) == brute
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("w,h", SHAPES)
+def test_window_fire(backend, w, h):
+    rng = np.random.default_rng(w * 100 + h)
+    grid = random_grid(rng, w, h)
+    # 角落、边缘、窗口比地图大、完全越界的中心
+    centers = [(0, 0), (w - 1, h - 1), (w // 2, 0), (0, h // 2), (w // 2, h // 2), (-3, h + 2)]
+    for r in (0, 1, 6):
+        for cx, cy in centers:
+            expected = kernels._window_fire_loops(grid, cx, cy, r)
+            assert np.array_equal(impl(backend, "window_fire")(grid, cx, cy, r), expected), (cx, cy, r)
+
+
+def astar_pairs(seed, w, h, n):
+    rng = random.Random(seed)
+    grid = np.random.default_rng(seed).choice([0, 1, 3], size=(w, h), p=[0.6, 0.25, 0.15])
+    cost = build_cost_grid(grid, has_water=False)
+    pairs = []
+    while len(pairs) < n:
+        a = (rng.randrange(w), rng.randrange(h))
+        b = (rng.randrange(w), rng.randrange(h))
+        if cost[a[0] * h + a[1]] >= 0:
+            pairs.append((a, b))
+    return cost, pairs
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_astar_loops_matches_grid_astar(seed):
+    # 未编译的逐格循环版同样必须与 GridAStar 路径一致 (numba 版的源码)
+    w, h = 25, 20
+    cost, pairs = astar_pairs(seed, w, h, 12)
+    engine = GridAStar()
+    buf = kernels.AStarBuffers()
+    for a, b in pairs:
+        if cost[b[0] * h + b[1]] < 0:
+            continue  # 终点不可达时 astar_path 在调用内核前就返回 None
+        expected = engine.search(memoryview(cost), w, h, a, b)
+        gen = buf.prepare(w * h)
+        path = kernels._astar_loops(cost, w, h, a[0] * h + a[1], b[0] * h + b[1],
+                                    buf.g, buf.parent, buf.g_stamp, buf.closed, buf.heap_f, buf.heap_idx, gen)
+        got = [divmod(int(i), h) for i in path] or None
+        assert got == expected, (a, b)
+
+
+@pytest.mark.skipif(COMPILED is None, reason="numba is not installed")
+@pytest.mark.parametrize("seed", range(3))
+def test_astar_numba_matches_grid_astar(seed):
+    w, h = 60, 45
+    cost, pairs = astar_pairs(seed, w, h, 16)
+    engine = GridAStar()
+    for a, b in pairs:
+        assert kernels.astar_path(cost, w, h, a, b) == engine.search(memoryview(cost), w, h, a, b), (a, b)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        kernels.set_backend("cuda")
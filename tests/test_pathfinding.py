@@ -0,0 +1,43 @@
+"""astar_fast (GridAStar / numba 内核) 与原 astar 在随机起终点上返回完全相同的路径"""
+import contextlib
+import io
+import random
+
+import numpy as np
+import pytest
+
+from core import kernels
+from core.grid_map import GridMap
+from core.pathfinding import astar, astar_fast
+
+BACKENDS = [
+    "numpy",
+    pytest.param("numba", marks=pytest.mark.skipif(kernels.numba_kernels() is None, reason="numba is not installed")),
+]
+
+
+@pytest.fixture
+def backend(request):
+    previous = kernels.backend or "auto"
+    kernels.set_backend(request.param)
+    yield request.param
+    kernels.set_backend(previous)
+
+
+@pytest.mark.parametrize("backend", BACKENDS, indirect=True)
+@pytest.mark.parametrize("seed", range(3))
+def test_astar_fast_matches_astar(backend, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(40, 30)
+    rng = random.Random(seed)
+    checked = 0
+    while checked < 60:
+        a = (rng.randrange(env.width), rng.randrange(env.height))
+        b = (rng.randrange(env.width), rng.randrange(env.height))
+        if env.grid[a] == 3:
+            continue
+        has_water = checked % 2 == 0
+        assert astar_fast(env, a, b, has_water) == astar(env, a, b, has_water), (a, b, has_water)
+        checked += 1
@@ -0,0 +1,33 @@
+"""EfficiencyPredictor 小批量更新的步长与逐样本梯度下降一致"""
+import numpy as np
+
+from core.predictor import EfficiencyPredictor
+
+
+def sgd_step(predictor, features, label):
+    """逐样本梯度下降一步后的权重 (未施加约束)"""
+    x = np.append(features, 1.0)
+    error = predictor.sigmoid(x @ predictor.weights) - label
+    return predictor.weights - predictor.base_lr * error * x
+
+
+def test_single_new_sample_matches_sgd():
+    predictor = EfficiencyPredictor(learning_rate=0.1)
+    features = [0.9, 0.3, 1.0, 1.0, 0.0, -0.5]
+    expected = sgd_step(predictor, features, 0)
+    predictor.train(features, 0)
+    assert np.allclose(predictor.weights, expected)
+
+
+def test_step_scales_with_number_of_new_samples():
+    # k 个相同的新样本：一次更新的步长是单样本的 k 倍 (而不是与单样本相同)
+    k = 8
+    features = [0.9, 0.3, 1.0, 1.0, 0.0, -0.5]
+    single = EfficiencyPredictor(learning_rate=0.1)
+    single.train(features, 1)
+    batched = EfficiencyPredictor(learning_rate=0.1)
+    for _ in range(k):
+        batched.enqueue(features, 1)
+    batched.update()
+    start = EfficiencyPredictor().weights
+    assert np.allclose(batched.weights - start, k * (single.weights - start))
@@ -0,0 +1,45 @@
+"""RobotFleet 灭火用水：登记时扣水，结算后退回没用上的部分且不超过水箱上限"""
+import contextlib
+import io
+
+import numpy as np
+
+from agents.robot import RobotFleet
+from core.grid_map import GridMap
+
+
+def open_map():
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = GridMap(12, 10, depots=[(0, 0)])
+    env.grid[:] = 0
+    env.grid[0, 0] = 5
+    return env
+
+
+def test_low_water_check_sees_water_after_spraying():
+    env = open_map()
+    fleet = RobotFleet(max_water=10, water_reserve=5)
+    robot = fleet.add(0, 6, 5)
+    robot.water = 8
+    env.grid[5:8, 4] = 2  # 3 个火点
+    fleet.step(env)
+    assert robot.water == 5
+    assert robot.status == "RETURNING"  # 8 - 3 <= 预留水量，本帧就转入返航
+    env.resolve_actions()
+    assert robot.water == 5
+    assert not np.any(env.grid == 2)
+
+
+def test_refill_in_same_frame_is_not_charged_again():
+    env = open_map()
+    fleet = RobotFleet(max_water=10, water_reserve=2)
+    robot = fleet.add(0, 1, 0)
+    robot.water = 6
+    robot.status = "RETURNING"
+    robot.set_target(0, 0, env)
+    env.grid[2, 1] = env.grid[1, 1] = 2
+    fleet.step(env)  # 先在 (1, 0) 喷水，再走到补给站加满
+    assert (robot.x, robot.y) == (0, 0)
+    env.resolve_actions()
+    assert robot.water == 10
+    assert not np.any(env.grid == 2)
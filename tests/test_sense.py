@@ -0,0 +1,49 @@
+"""Simulation.sense：按扫描窗口与火点列表感知，结果与逐格覆盖掩码一致；网格版本缓存随写入失效"""
+import contextlib
+import io
+import random
+
+import numpy as np
+
+from core.simulation import Simulation
+
+
+def brute_cover(drones, w, h):
+    cover = np.zeros((w, h), dtype=bool)
+    for d in drones:
+        r = d.scan_radius
+        cover[max(0, d.x - r):d.x + r + 1, max(0, d.y - r):d.y + r + 1] = True
+    return cover
+
+
+def test_sense_matches_coverage_mask():
+    random.seed(0)
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulation()
+    env = sim.env
+    rng = np.random.default_rng(0)
+    for frame in range(1, 6):
+        for d in sim.drones:
+            d.x, d.y = int(rng.integers(-2, env.width + 2)), int(rng.integers(-2, env.height + 2))
+        fire = rng.random((env.width, env.height)) < 0.2
+        env.grid[fire] = 2
+        env.version += 1
+        expected = sim.discovered | (brute_cover(sim.drones, env.width, env.height) & (env.grid == 2))
+        sim.sense(frame)
+        assert np.array_equal(sim.discovered, expected)
+        assert sim.discovered_count == np.count_nonzero(expected)
+        scanned = env.last_scan_frame == frame
+        assert np.array_equal(scanned, brute_cover(sim.drones, env.width, env.height))
+
+
+def test_counts_follow_version():
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulation()
+    env = sim.env
+    fires = len(env.fire_cells())
+    assert env.cell_counts()[2] == fires == np.count_nonzero(env.grid == 2)
+    x, y = divmod(int(env.fire_cells()[0]), env.height)
+    env.set_state(x, y, 6)
+    assert len(env.fire_cells()) == fires - 1
+    assert env.cell_counts()[6] == np.count_nonzero(env.grid == 6)
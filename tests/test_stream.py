@@ -0,0 +1,52 @@
+"""状态流：编码线程不取走变化时 GridMap 的积压有界，溢出后以关键帧重新同步"""
+import contextlib
+import io
+import random
+
+import numpy as np
+
+from core.simulation import Simulation
+from core.stream import StateStreamer, StreamDecoder, agent_table, encode_keyframe
+
+
+def test_overflow_drops_deltas_and_resyncs_with_keyframe():
+    random.seed(0)
+    np.random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulation()
+        streamer = StateStreamer(sim)  # 不启动线程：模拟编码线程卡住
+    try:
+        env = sim.env
+        # 仿真持续写入但无人取走：积压超过整图格数后被丢弃
+        for _ in range(3):
+            env.log_changes(np.arange(env.grid.size))
+        assert env.changes_overflowed
+        assert env._changed_count <= env.grid.size
+
+        env.grid[0, 0] = 2
+        streamer.capture(sim)
+        assert not env.changes_overflowed and len(env.drain_changed_cells()) == 0
+        frame, cells, values, agents = streamer.queue.get_nowait()
+        assert cells is None
+
+        before = streamer.bytes_encoded
+        streamer._publish(frame, cells, values, agents)
+        assert np.array_equal(streamer.grid, env.grid)
+        assert streamer.bytes_encoded - before == len(encode_keyframe(frame, env.grid, agent_table(sim)))
+        decoder = StreamDecoder()
+        decoder.feed(streamer._keyframe_bytes())
+        assert np.array_equal(decoder.grid, env.grid)
+    finally:
+        streamer.listener.close()
+
+
+def test_log_changes_below_cap_keeps_deltas():
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulation()
+    env = sim.env
+    env.track_changes = True
+    env.drain_changed_cells()
+    env.log_changes([5, 3, 5])
+    assert not env.changes_overflowed
+    assert env.drain_changed_cells().tolist() == [3, 5]
+    assert env._changed_count == 0
@@ -0,0 +1,40 @@
+"""遥测记录流：每次运行独立子目录、schema 不一致时报错、按运行编号加载"""
+import numpy as np
+import pytest
+
+from core.telemetry import GENERATION_FIELDS, ColumnStream, TelemetryWriter, list_runs, load_telemetry
+
+
+class Genome:
+    penalty, radius = 1.5, 3
+    extinguished_count, severity_bonus, stranded_count, crowded_frames, fitness = 4, 0.5, 0, 2, 7.0
+
+
+def write_run(root, run_id, n):
+    writer = TelemetryWriter(str(root), run_id=run_id)
+    for i in range(n):
+        writer.record_generation(i, 0, i, Genome())
+    writer.close()
+    return writer
+
+
+def test_runs_do_not_mix(tmp_path):
+    write_run(tmp_path, "20260101-000000-1", 3)
+    write_run(tmp_path, "20260101-000001-1", 5)
+    assert list_runs(str(tmp_path)) == ["20260101-000000-1", "20260101-000001-1"]
+    assert len(load_telemetry(str(tmp_path), "generations")["frame"]) == 5  # 默认最近一次
+    old = load_telemetry(str(tmp_path), "generations", run_id="20260101-000000-1")
+    assert np.array_equal(old["individual"], [0, 1, 2])
+
+
+def test_same_run_id_appends(tmp_path):
+    write_run(tmp_path, "run", 2)
+    writer = write_run(tmp_path, "run", 2)
+    assert np.array_equal(load_telemetry(writer.directory, "generations")["frame"], [0, 1, 0, 1])
+
+
+def test_schema_mismatch_raises(tmp_path):
+    ColumnStream(str(tmp_path), "generations", GENERATION_FIELDS)
+    with pytest.raises(ValueError):
+        ColumnStream(str(tmp_path), "generations", GENERATION_FIELDS[:-1])
+